@@ -28,12 +28,14 @@ from backend.app.api.routes.bank_account import (
     create as create_bank_account,
     activate as activate_bank_account,
     deposit,
+    bulk_deposit,
     transfer,
+    bulk_transfer,
     withdrawal,
     transaction_history,
 )
 
-from backend.app.api.routes.bank_account import statement
+from backend.app.api.routes.bank_account import statement, export
 
 from backend.app.api.routes.card import (
     create as create_vcard,
@@ -46,6 +48,9 @@ from backend.app.api.routes.card import (
 from backend.app.api.routes.transaction import (
     fraud_review,
     risk_history,
+    scoring_metrics,
+    idempotency_metrics,
+    shadow_report,
 )
 
 api_router = APIRouter()
@@ -69,10 +74,13 @@ api_router.include_router(delete_next_of_kin.router)
 api_router.include_router(create_bank_account.router)
 api_router.include_router(activate_bank_account.router)
 api_router.include_router(deposit.router)
+api_router.include_router(bulk_deposit.router)
 api_router.include_router(transfer.router)
+api_router.include_router(bulk_transfer.router)
 api_router.include_router(withdrawal.router)
 api_router.include_router(transaction_history.router)
 api_router.include_router(statement.router)
+api_router.include_router(export.router)
 api_router.include_router(create_vcard.router)
 api_router.include_router(activate_vcard.router)
 api_router.include_router(block_vcard.router)
@@ -80,3 +88,6 @@ api_router.include_router(topup_vcard.router)
 api_router.include_router(delete_vcard.router)
 api_router.include_router(fraud_review.router)
 api_router.include_router(risk_history.router)
+api_router.include_router(shadow_report.router)
+api_router.include_router(scoring_metrics.router)
+api_router.include_router(idempotency_metrics.router)
@@ -0,0 +1,126 @@
+import json
+import uuid
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile, status
+from backend.app.core.logging import get_logger
+
+from backend.app.api.routes.auth.dependencies import CurrentUser
+from backend.app.api.services.bulk_deposit import check_deposit_csv
+from backend.app.auth.schema import RoleChoicesEnum
+from backend.app.core.celery_app import celery_app
+from backend.app.core.config import settings
+from backend.app.core.tasks.bulk_deposit import (
+    batch_key,
+    process_bulk_deposit,
+    upload_key,
+)
+
+
+logger = get_logger()
+
+router = APIRouter(prefix="/bank-account")
+
+
+def _require_teller(current_user: CurrentUser) -> None:
+    if not current_user.role == RoleChoicesEnum.TELLER:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={"status": "error", "message": "Only tellers can process deposits"},
+        )
+
+
+@router.post("/deposit/bulk", status_code=status.HTTP_202_ACCEPTED)
+async def create_bulk_deposit(
+    current_user: CurrentUser,
+    description: str = Form(..., max_length=250),
+    file: UploadFile = File(...),
+) -> dict:
+    _require_teller(current_user)
+
+    try:
+        content = await file.read(settings.BULK_DEPOSIT_MAX_BYTES + 1)
+
+        if len(content) > settings.BULK_DEPOSIT_MAX_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail={
+                    "status": "error",
+                    "message": "The file is larger than "
+                    f"{settings.BULK_DEPOSIT_MAX_BYTES // (1024 * 1024)}MB",
+                },
+            )
+
+        check_deposit_csv(content)
+
+        # The file waits in Redis rather than in the task message
+        batch_reference = f"BDP{uuid.uuid4().hex[:8].upper()}"
+        celery_app.backend.client.set(
+            upload_key(batch_reference),
+            content,
+            ex=settings.BULK_DEPOSIT_UPLOAD_TTL_SECONDS,
+        )
+
+        task = process_bulk_deposit.delay(
+            batch_reference, str(current_user.id), description
+        )
+
+        redis_client = celery_app.backend.client
+        redis_client.hset(
+            batch_key(batch_reference),
+            mapping={"teller_id": str(current_user.id), "task_id": task.id},
+        )
+        redis_client.expire(
+            batch_key(batch_reference), settings.BULK_DEPOSIT_REPORT_TTL_SECONDS
+        )
+
+        return {
+            "status": "pending",
+            "message": "Bulk deposit scheduled",
+            "data": {"task_id": task.id, "batch_reference": batch_reference},
+        }
+    except HTTPException as http_ex:
+        raise http_ex
+    except Exception as e:
+        logger.error(f"Failed to schedule bulk deposit: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"status": "error", "message": "Failed to schedule bulk deposit"},
+        )
+
+
+@router.get(
+    "/deposit/bulk/{batch_reference}/status", status_code=status.HTTP_200_OK
+)
+async def get_bulk_deposit_status(
+    batch_reference: str, current_user: CurrentUser
+) -> dict:
+    _require_teller(current_user)
+
+    try:
+        batch = celery_app.backend.client.hgetall(batch_key(batch_reference))
+
+        # Reports list account numbers and amounts, only the teller who
+        # uploaded the file may read them
+        if batch.get(b"teller_id", b"").decode() != str(current_user.id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail={"status": "error", "message": "Bulk deposit not found"},
+            )
+
+        if b"report" in batch:
+            return {"status": "completed", "report": json.loads(batch[b"report"])}
+
+        task = celery_app.AsyncResult(batch[b"task_id"].decode())
+
+        if task.failed():
+            error = str(task.result) if task.result else "Unknown error occurred"
+            return {"status": "failed", "error": error}
+
+        return {"status": "pending", "batch_reference": batch_reference}
+    except HTTPException as http_ex:
+        raise http_ex
+    except Exception as e:
+        logger.error(f"Failed to get bulk deposit status: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"status": "error", "message": "Failed to get bulk deposit status"},
+        )
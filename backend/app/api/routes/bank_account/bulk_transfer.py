@@ -0,0 +1,222 @@
+from uuid import UUID
+from decimal import Decimal
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+from backend.app.core.db import get_session
+from backend.app.core.logging import get_logger
+
+from backend.app.api.routes.auth.dependencies import CurrentUser
+from backend.app.transaction.schema import (
+    BulkTransferLegSchema,
+    BulkTransferRequestSchema,
+    BulkTransferOTPVerificationSchema,
+    TransferResponseSchema,
+)
+
+from backend.app.core.services.transfer_otp import send_transfer_otp_email
+from backend.app.api.services.bulk_transfer import (
+    initiate_bulk_transfer,
+    complete_bulk_transfer,
+    get_bulk_transfer_report,
+    parse_bulk_transfer_csv,
+)
+from backend.app.core.utils.number_format import format_currency
+
+logger = get_logger()
+
+router = APIRouter(prefix="/bank-account")
+
+
+async def _initiate(
+    current_user: CurrentUser,
+    sender_account_id: UUID,
+    legs: list[BulkTransferLegSchema],
+    description: str,
+    security_answer: str,
+    session: AsyncSession,
+) -> TransferResponseSchema:
+    batch_reference, results, sender = await initiate_bulk_transfer(
+        sender_id=current_user.id,
+        sender_account_id=sender_account_id,
+        legs=legs,
+        description=description,
+        security_answer=security_answer,
+        session=session,
+    )
+
+    pending = [result for result in results if result["status"] == "pending"]
+
+    # One OTP confirms every pending leg of the batch
+    if pending:
+        try:
+            await send_transfer_otp_email(sender.email, sender.otp)
+        except Exception as e:
+            logger.error(f"Failed to send OTP email: {e}")
+
+    return TransferResponseSchema(
+        status="pending" if pending else "failed",
+        message=(
+            "Bulk transfer initiated. Please check your email for OTP verification"
+            if pending
+            else "No transfer in the batch can be made"
+        ),
+        data={
+            "batch_reference": batch_reference,
+            "pending_legs": len(pending),
+            "total_amount": format_currency(
+                sum((Decimal(result["amount"]) for result in pending), Decimal("0"))
+            ),
+            "legs": results,
+        },
+    )
+
+
+@router.post(
+    "/transfer/bulk/initiate",
+    response_model=TransferResponseSchema,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def initiate_bulk_money_transfer(
+    transfer_data: BulkTransferRequestSchema,
+    current_user: CurrentUser,
+    session: AsyncSession = Depends(get_session),
+) -> TransferResponseSchema:
+    try:
+        return await _initiate(
+            current_user,
+            transfer_data.sender_account_id,
+            transfer_data.legs,
+            transfer_data.description,
+            transfer_data.security_answer,
+            session,
+        )
+
+    except HTTPException as http_ex:
+        raise http_ex
+    except Exception as e:
+        logger.error(f"Failed to initiate bulk transfer: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"status": "error", "message": "Failed to initiate bulk transfer"},
+        )
+
+
+@router.post(
+    "/transfer/bulk/initiate/upload",
+    response_model=TransferResponseSchema,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def initiate_bulk_money_transfer_upload(
+    current_user: CurrentUser,
+    sender_account_id: UUID = Form(...),
+    security_answer: str = Form(..., max_length=30),
+    description: str = Form(..., max_length=250),
+    file: UploadFile = File(...),
+    session: AsyncSession = Depends(get_session),
+) -> TransferResponseSchema:
+    try:
+        legs = parse_bulk_transfer_csv(await file.read())
+
+        return await _initiate(
+            current_user,
+            sender_account_id,
+            legs,
+            description,
+            security_answer,
+            session,
+        )
+
+    except HTTPException as http_ex:
+        raise http_ex
+    except Exception as e:
+        logger.error(f"Failed to initiate bulk transfer: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"status": "error", "message": "Failed to initiate bulk transfer"},
+        )
+
+
+@router.post(
+    "/transfer/bulk/complete",
+    response_model=TransferResponseSchema,
+    status_code=status.HTTP_200_OK,
+)
+async def complete_bulk_money_transfer(
+    verification_data: BulkTransferOTPVerificationSchema,
+    current_user: CurrentUser,
+    session: AsyncSession = Depends(get_session),
+) -> TransferResponseSchema:
+    try:
+        results, sender_account, _ = await complete_bulk_transfer(
+            sender_id=current_user.id,
+            batch_reference=verification_data.batch_reference,
+            otp=verification_data.otp,
+            session=session,
+        )
+
+        completed = [result for result in results if result["status"] == "completed"]
+
+        return TransferResponseSchema(
+            status="success",
+            message=f"{len(completed)} of {len(results)} transfers completed",
+            data={
+                "batch_reference": verification_data.batch_reference,
+                "completed_legs": len(completed),
+                "total_amount": format_currency(
+                    sum(
+                        (Decimal(result["amount"]) for result in completed),
+                        Decimal("0"),
+                    )
+                ),
+                "balance": format_currency(sender_account.account_balance),
+                "legs": results,
+            },
+        )
+
+    except HTTPException as http_ex:
+        raise http_ex
+    except Exception as e:
+        logger.error(f"Failed to complete bulk transfer: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"status": "error", "message": "Failed to complete bulk transfer"},
+        )
+
+
+@router.get(
+    "/transfer/bulk/{batch_reference}",
+    response_model=TransferResponseSchema,
+    status_code=status.HTTP_200_OK,
+)
+async def get_bulk_money_transfer(
+    batch_reference: str,
+    current_user: CurrentUser,
+    session: AsyncSession = Depends(get_session),
+) -> TransferResponseSchema:
+    try:
+        results = await get_bulk_transfer_report(
+            sender_id=current_user.id,
+            batch_reference=batch_reference,
+            session=session,
+        )
+
+        if not results:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail={"status": "error", "message": "Bulk transfer not found"},
+            )
+
+        return TransferResponseSchema(
+            status="success",
+            message="Bulk transfer retrieved successfully",
+            data={"batch_reference": batch_reference, "legs": results},
+        )
+
+    except HTTPException as http_ex:
+        raise http_ex
+    except Exception as e:
+        logger.error(f"Failed to retrieve bulk transfer: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"status": "error", "message": "Failed to retrieve bulk transfer"},
+        )
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Header
 from backend.app.core.logging import get_logger
 from backend.app.core.db import get_session
 from sqlmodel.ext.asyncio.session import AsyncSession
@@ -9,6 +9,8 @@ from backend.app.transaction.schema import DepositRequestSchema
 from backend.app.transaction.enums import TransactionTypeEnum
 from backend.app.core.services.deposit_alert import send_deposit_alert
 from backend.app.auth.schema import RoleChoicesEnum
+from backend.app.core.idempotency import idempotency_store
+from backend.app.api.routes.bank_account.utils import validate_uuid4
 
 
 logger = get_logger()
@@ -21,6 +23,9 @@ async def create_deposit(
     deposit_data: DepositRequestSchema,
     current_user: CurrentUser,
     session: AsyncSession = Depends(get_session),
+    idempotency_key: str | None = Header(
+        default=None, description="Idempotency key for the deposit request"
+    ),
 ):
     if not current_user.role == RoleChoicesEnum.TELLER:
         raise HTTPException(
@@ -29,48 +34,69 @@ async def create_deposit(
         )
 
     try:
-        transaction, account, account_owner = await process_deposit(
-            amount=deposit_data.amount,
-            account_id=deposit_data.account_id,
-            teller_id=current_user.id,
-            description=deposit_data.description,
+        if idempotency_key is not None:
+            idempotency_key = validate_uuid4(idempotency_key)
+
+        async with idempotency_store.claim(
+            key=idempotency_key,
+            user_id=current_user.id,
+            endpoint="/deposit",
             session=session,
-        )
+        ) as claim:
+            if claim.response is not None:
+                return {
+                    "status": "success",
+                    "message": "Retrieved from cache",
+                    "data": claim.response,
+                }
 
-        if not account.account_number:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail={"status": "error", "message": "Account number is required"},
-            )
-        try:
-            currency_value = account.currency.value
-            await send_deposit_alert(
-                email=account_owner.email,
-                full_name=account_owner.full_name,
-                action=TransactionTypeEnum.Deposit.value,
-                amount=transaction.amount,
-                account_name=account.account_name,
-                account_number=account.account_number,
-                currency=currency_value,
+            transaction, account, account_owner = await process_deposit(
+                amount=deposit_data.amount,
+                account_id=deposit_data.account_id,
+                teller_id=current_user.id,
                 description=deposit_data.description,
-                transaction_date=transaction.completed_at or transaction.created_at,
-                reference=transaction.reference,
-                balance=transaction.balance_after,
+                session=session,
             )
-        except Exception as email_error:
-            logger.error(f"Failed to send transaction alert: {email_error}")
 
-        return {
-            "status": "success",
-            "message": "Deposit processed successfully",
-            "data": {
-                "transaction_id": transaction.id,
-                "reference": transaction.reference,
-                "amount": transaction.amount,
-                "balance": transaction.balance_after,
-                "status": transaction.transaction_status,
-            },
-        }
+            if not account.account_number:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail={"status": "error", "message": "Account number is required"},
+                )
+
+            response = {
+                "status": "success",
+                "message": "Deposit processed successfully",
+                "data": {
+                    "transaction_id": transaction.id,
+                    "reference": transaction.reference,
+                    "amount": transaction.amount,
+                    "balance": transaction.balance_after,
+                    "status": transaction.transaction_status,
+                },
+            }
+
+            await claim.save(response, status.HTTP_201_CREATED)
+
+            try:
+                currency_value = account.currency.value
+                await send_deposit_alert(
+                    email=account_owner.email,
+                    full_name=account_owner.full_name,
+                    action=TransactionTypeEnum.Deposit.value,
+                    amount=transaction.amount,
+                    account_name=account.account_name,
+                    account_number=account.account_number,
+                    currency=currency_value,
+                    description=deposit_data.description,
+                    transaction_date=transaction.completed_at or transaction.created_at,
+                    reference=transaction.reference,
+                    balance=transaction.balance_after,
+                )
+            except Exception as email_error:
+                logger.error(f"Failed to send transaction alert: {email_error}")
+
+            return response
     except HTTPException as http_ex:
         raise http_ex
     except Exception as e:
@@ -0,0 +1,101 @@
+from datetime import datetime, timezone
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.app.api.routes.auth.dependencies import CurrentUser
+from backend.app.api.services.export import (
+    EXPORT_MEDIA_TYPES,
+    stream_transaction_export,
+)
+from backend.app.bank_account.models import BankAccount
+from backend.app.core.db import get_session
+from backend.app.core.logging import get_logger
+from backend.app.transaction.schema import TransactionFilterParamsSchema
+
+logger = get_logger()
+
+router = APIRouter(prefix="/transactions")
+
+
+@router.get(
+    "/export",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    description="Stream the transaction history of the authenticated user as CSV or NDJSON",
+)
+async def export_transactions(
+    current_user: CurrentUser,
+    session: AsyncSession = Depends(get_session),
+    format: Literal["csv", "ndjson"] = Query(default="csv"),
+    gzip: bool = Query(default=False),
+    filters: TransactionFilterParamsSchema = Depends(),
+) -> StreamingResponse:
+    try:
+        if (
+            filters.start_date
+            and filters.end_date
+            and filters.start_date > filters.end_date
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "status": "error",
+                    "message": "Start date must be before end date",
+                },
+            )
+
+        result = await session.exec(
+            select(BankAccount.id).where(BankAccount.user_id == current_user.id)
+        )
+        account_ids = list(result.all())
+
+        if not account_ids:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail={
+                    "status": "error",
+                    "message": "No bank accounts found for this user",
+                },
+            )
+
+        body = stream_transaction_export(
+            user_id=current_user.id,
+            account_ids=account_ids,
+            export_format=format,
+            compress=gzip,
+            start_date=filters.start_date,
+            end_date=filters.end_date,
+            transaction_type=filters.transaction_type,
+            transaction_category=filters.transaction_category,
+            transaction_status=filters.status,
+            min_amount=filters.min_amount,
+            max_amount=filters.max_amount,
+        )
+
+        filename = (
+            f"transactions-{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')}"
+            f".{format}{'.gz' if gzip else ''}"
+        )
+
+        return StreamingResponse(
+            body,
+            media_type="application/gzip" if gzip else EXPORT_MEDIA_TYPES[format],
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
+
+    except HTTPException as http_ex:
+        raise http_ex
+    except Exception as e:
+        logger.error(f"Error exporting transactions: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "status": "error",
+                "message": "Failed to export transactions",
+                "action": "Please try again later",
+            },
+        )
@@ -1,8 +1,10 @@
+import gzip
 from datetime import datetime, timezone, timedelta
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Response
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from backend.app.api.routes.auth.dependencies import CurrentUser
+from backend.app.auth.schema import RoleChoicesEnum
 from backend.app.transaction.schema import (
     StatementRequestSchema,
     StatementResponseSchema,
@@ -13,6 +15,7 @@ from backend.app.api.services.transaction import generate_user_statement
 from backend.app.core.celery_app import celery_app
 from backend.app.core.db import get_session
 from backend.app.core.logging import get_logger
+from backend.app.core.statement_cache import StatementCache
 from sqlmodel import select
 
 
@@ -73,6 +76,7 @@ async def generate_statement(
             end_date=request.end_date,
             session=session,
             account_number=request.account_number,
+            renderer=request.renderer.value if request.renderer else None,
         )
 
         celery_app.AsyncResult(result["task_id"])
@@ -80,9 +84,14 @@ async def generate_statement(
         generated_at = datetime.now(timezone.utc)
         expires_at = generated_at + timedelta(hours=1)
 
+        # A cached statement keeps the times it was stored with
+        if result.get("generated_at"):
+            generated_at = datetime.fromisoformat(result["generated_at"])
+            expires_at = datetime.fromisoformat(result["expires_at"])
+
         return StatementResponseSchema(
-            status="pending",
-            message="Statement generation initiated",
+            status=result["status"],
+            message=result["message"],
             task_id=result["task_id"],
             statement_id=result["statement_id"],
             generated_at=generated_at,
@@ -111,8 +120,29 @@ async def generate_statement(
         )
 
 
+@router.get(
+    "/statement/cache-metrics",
+    status_code=status.HTTP_200_OK,
+    description="Hits, misses and joined builds of the statement cache. Only accessible for account executives",
+)
+async def get_statement_cache_metrics(current_user: CurrentUser) -> dict:
+    if current_user.role != RoleChoicesEnum.ACCOUNT_EXECUTIVE:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={
+                "status": "error",
+                "message": "Only account executives can view statement cache metrics",
+            },
+        )
+
+    return {
+        "status": "success",
+        "cache": StatementCache(celery_app.backend.client).stats(),
+    }
+
+
 @router.get("/statement/{statement_id}")
-async def get_statement(statement_id: str) -> Response:
+async def get_statement(statement_id: str, request: Request) -> Response:
     try:
         redis_client = celery_app.backend.client
         pdf_data = redis_client.get(f"statement:{statement_id}")
@@ -125,12 +155,21 @@ async def get_statement(statement_id: str) -> Response:
                     "message": "Statement not found or has expired",
                 },
             )
+        headers = {
+            "Content-Disposition": f"attachment;filename=statement_{statement_id}.pdf",
+        }
+
+        # Statements are stored gzipped, clients that accept gzip get them as is
+        if pdf_data[:2] == b"\x1f\x8b":
+            if "gzip" in request.headers.get("accept-encoding", ""):
+                headers["Content-Encoding"] = "gzip"
+            else:
+                pdf_data = gzip.decompress(pdf_data)
+
         return Response(
             content=pdf_data,
             media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment;filename=statement_{statement_id}.pdf",
-            },
+            headers=headers,
         )
 
     except HTTPException:
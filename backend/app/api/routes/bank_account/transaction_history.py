@@ -61,6 +61,10 @@ async def get_transaction_history(
 
         for trn in transactions:
             metadata = trn.transaction_metadata or {}
+            # Same formatting as User.full_name
+            counterparty_name = (
+                trn.counterparty_name.title().strip() if trn.counterparty_name else None
+            )
 
             response = TransactionHistoryResponseSchema(
                 id=trn.id,
@@ -77,8 +81,8 @@ async def get_transaction_history(
                 converted_amount=metadata.get("converted_amount"),
                 from_currency=metadata.get("from_currency"),
                 to_currency=metadata.get("to_currency"),
-                counterparty_name=metadata.get("counterparty_name"),
-                counterparty_account=metadata.get("counterparty_account"),
+                counterparty_name=counterparty_name,
+                counterparty_account=trn.counterparty_account,
             )
 
             transaction_responses.append(response)
@@ -1,8 +1,6 @@
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status, Header
-from datetime import timezone, timedelta, datetime
 from decimal import Decimal
-from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from backend.app.core.db import get_session
 from backend.app.core.logging import get_logger
@@ -17,7 +15,7 @@ from backend.app.transaction.schema import (
 from backend.app.core.services.transfer_otp import send_transfer_otp_email
 from backend.app.core.services.transfer_alert import send_transfer_alert
 from backend.app.api.services.transaction import initiate_transfer, complete_transfer
-from backend.app.transaction.models import IdempotencyKey
+from backend.app.core.idempotency import idempotency_store
 from backend.app.core.utils.number_format import format_currency
 
 from backend.app.api.routes.bank_account.utils import validate_uuid4
@@ -52,78 +50,66 @@ async def initiate_money_transfer(
                 },
             )
 
-        existing_key_result = await session.exec(
-            select(IdempotencyKey).where(
-                IdempotencyKey.key == idempotency_key,
-                IdempotencyKey.user_id == current_user.id,
-                IdempotencyKey.endpoint == "/transfer/initiate",
-                IdempotencyKey.expires_at > datetime.now(timezone.utc),
-            )
-        )
-
-        existing_key = existing_key_result.first()
-
-        if existing_key:
-            return TransferResponseSchema(
-                status="success",
-                message="Retrieved from cache",
-                data=existing_key.response_body,
+        async with idempotency_store.claim(
+            key=idempotency_key,
+            user_id=current_user.id,
+            endpoint="/transfer/initiate",
+            session=session,
+        ) as claim:
+            if claim.response is not None:
+                return TransferResponseSchema(
+                    status="success",
+                    message="Retrieved from cache",
+                    data=claim.response,
+                )
+
+            transaction, sender_account, receiver_account, sender, receiver = (
+                await initiate_transfer(
+                    sender_id=current_user.id,
+                    sender_account_id=transfer_data.sender_account_id,
+                    receiver_account_number=transfer_data.receiver_account_number,
+                    amount=transfer_data.amount,
+                    description=transfer_data.description,
+                    security_answer=transfer_data.security_answer,
+                    session=session,
+                )
             )
 
-        transaction, sender_account, receiver_account, sender, receiver = (
-            await initiate_transfer(
-                sender_id=current_user.id,
-                sender_account_id=transfer_data.sender_account_id,
-                receiver_account_number=transfer_data.receiver_account_number,
-                amount=transfer_data.amount,
-                description=transfer_data.description,
-                security_answer=transfer_data.security_answer,
-                session=session,
+            response = TransferResponseSchema(
+                status="pending",
+                message="Transfer initiated. Please check your email for OTP verification",
+                data={
+                    "reference": transaction.reference,
+                    "amount": format_currency(str(transaction.amount)),
+                    "converted_amount": (
+                        transaction.transaction_metadata.get("converted_amount", "N/A")
+                        if transaction.transaction_metadata
+                        else "N/A"
+                    ),
+                    "from_currency": (
+                        transaction.transaction_metadata.get("from_currency", "N/A")
+                        if transaction.transaction_metadata
+                        else "N/A"
+                    ),
+                    "to_currency": (
+                        transaction.transaction_metadata.get("to_currency", "N/A")
+                        if transaction.transaction_metadata
+                        else "N/A"
+                    ),
+                },
             )
-        )
-
-        try:
-            await send_transfer_otp_email(sender.email, sender.otp)
-        except Exception as e:
-            logger.error(f"Failed to send OTP email: {e}")
-
-        response = TransferResponseSchema(
-            status="pending",
-            message="Transfer initiated. Please check your email for OTP verification",
-            data={
-                "reference": transaction.reference,
-                "amount": format_currency(str(transaction.amount)),
-                "converted_amount": (
-                    transaction.transaction_metadata.get("converted_amount", "N/A")
-                    if transaction.transaction_metadata
-                    else "N/A"
-                ),
-                "from_currency": (
-                    transaction.transaction_metadata.get("from_currency", "N/A")
-                    if transaction.transaction_metadata
-                    else "N/A"
-                ),
-                "to_currency": (
-                    transaction.transaction_metadata.get("to_currency", "N/A")
-                    if transaction.transaction_metadata
-                    else "N/A"
-                ),
-            },
-        )
 
-        idempotency_record = IdempotencyKey(
-            key=idempotency_key,
-            user_id=current_user.id,
-            endpoint="/transfer/initiate",
-            response_code=status.HTTP_202_ACCEPTED,
-            response_body=response.model_dump(),
-            expires_at=datetime.now(timezone.utc) + timedelta(hours=24),
-        )
+            await claim.save(response.model_dump(), status.HTTP_202_ACCEPTED)
 
-        session.add(idempotency_record)
-        await session.commit()
+            # Mailed only once the response is stored. Had the save failed
+            # after the mail, a retry would run the transfer again and send a
+            # second OTP.
+            try:
+                await send_transfer_otp_email(sender.email, sender.otp)
+            except Exception as e:
+                logger.error(f"Failed to send OTP email: {e}")
 
-        return response
+            return response
 
     except HTTPException as http_ex:
         raise http_ex
@@ -1,8 +1,5 @@
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status, Header
-from datetime import timezone, timedelta, datetime
-from decimal import Decimal
-from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from backend.app.core.db import get_session
 from backend.app.core.logging import get_logger
@@ -13,7 +10,7 @@ from backend.app.transaction.schema import WithdrawalRequestSchema
 
 from backend.app.core.services.withdrawal_alert import send_withdrawal_alert
 from backend.app.api.services.transaction import process_withdrawal
-from backend.app.transaction.models import IdempotencyKey
+from backend.app.core.idempotency import idempotency_store
 
 from backend.app.api.routes.bank_account.utils import validate_uuid4
 
@@ -43,73 +40,59 @@ async def create_withdrawal(
                 },
             )
 
-        existing_key_result = await session.exec(
-            select(IdempotencyKey).where(
-                IdempotencyKey.key == idempotency_key,
-                IdempotencyKey.endpoint == "/withdraw",
-                IdempotencyKey.expires_at > datetime.now(timezone.utc),
+        async with idempotency_store.claim(
+            key=idempotency_key,
+            user_id=current_user.id,
+            endpoint="/withdraw",
+            session=session,
+        ) as claim:
+            if claim.response is not None:
+                return {
+                    "status": "success",
+                    "message": "Retrieved from cache",
+                    "data": claim.response,
+                }
+
+            transaction, account, user = await process_withdrawal(
+                account_number=withdrawal_data.account_number,
+                amount=withdrawal_data.amount,
+                username=withdrawal_data.username,
+                description=withdrawal_data.description,
+                session=session,
             )
-        )
-
-        existing_key = existing_key_result.first()
 
-        if existing_key:
-            return {
+            response = {
                 "status": "success",
-                "message": "Retrieved from cache",
-                "data": existing_key.response_body,
+                "message": "Withdrawal processed successfully",
+                "data": {
+                    "transaction_id": str(transaction.id),
+                    "reference": transaction.reference,
+                    "amount": str(transaction.amount),
+                    "balance": str(transaction.balance_after),
+                    "status": transaction.transaction_status.value,
+                },
             }
 
-        transaction, account, user = await process_withdrawal(
-            account_number=withdrawal_data.account_number,
-            amount=withdrawal_data.amount,
-            username=withdrawal_data.username,
-            description=withdrawal_data.description,
-            session=session,
-        )
-
-        try:
-            await send_withdrawal_alert(
-                email=user.email,
-                full_name=user.full_name,
-                amount=transaction.amount,
-                account_name=account.account_name,
-                account_number=account.account_number or "Unknown",
-                currency=account.currency.value,
-                description=transaction.description,
-                transaction_date=transaction.completed_at or transaction.created_at,
-                reference=transaction.reference,
-                balance=Decimal(str(account.account_balance)),
-            )
-
-        except Exception as e:
-            logger.error(f"Failed to send withdrawal alert: {e}")
-
-        response = {
-            "status": "success",
-            "message": "Withdrawal processed successfully",
-            "data": {
-                "transaction_id": str(transaction.id),
-                "reference": transaction.reference,
-                "amount": str(transaction.amount),
-                "balance": str(transaction.balance_after),
-                "status": transaction.transaction_status.value,
-            },
-        }
-
-        idempotency_record = IdempotencyKey(
-            key=idempotency_key,
-            user_id=user.id,
-            endpoint="/withdraw",
-            response_code=status.HTTP_201_CREATED,
-            response_body=response,
-            expires_at=datetime.now(timezone.utc) + timedelta(hours=24),
-        )
-
-        session.add(idempotency_record)
-
-        await session.commit()
-        return response
+            await claim.save(response, status.HTTP_201_CREATED)
+
+            try:
+                await send_withdrawal_alert(
+                    email=user.email,
+                    full_name=user.full_name,
+                    amount=transaction.amount,
+                    account_name=account.account_name,
+                    account_number=account.account_number or "Unknown",
+                    currency=account.currency.value,
+                    description=transaction.description,
+                    transaction_date=transaction.completed_at or transaction.created_at,
+                    reference=transaction.reference,
+                    balance=transaction.balance_after,
+                )
+
+            except Exception as e:
+                logger.error(f"Failed to send withdrawal alert: {e}")
+
+            return response
 
     except HTTPException as http_ex:
         raise http_ex
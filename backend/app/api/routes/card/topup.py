@@ -1,8 +1,6 @@
 from uuid import UUID
-from datetime import datetime, timezone, timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Header
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlmodel import select
 from backend.app.core.logging import get_logger
 from backend.app.core.db import get_session
 from backend.app.api.routes.bank_account.utils import validate_uuid4
@@ -14,7 +12,7 @@ from backend.app.virtual_card.schema import (
     CardTopupResponseSchema,
     CardTopUpSchema,
 )
-from backend.app.transaction.models import IdempotencyKey
+from backend.app.core.idempotency import idempotency_store
 
 
 logger = get_logger()
@@ -48,57 +46,42 @@ async def top_up_card(
                     "message": "Idempotency key header is requiered",
                 },
             )
-        existing_key_result = await session.exec(
-            select(IdempotencyKey).where(
-                IdempotencyKey.key == idempotency_key,
-                IdempotencyKey.user_id == current_user.id,
-                IdempotencyKey.endpoint == "/virtual-card/top-up",
-                IdempotencyKey.expires_at > datetime.now(timezone.utc),
+        async with idempotency_store.claim(
+            key=idempotency_key,
+            user_id=current_user.id,
+            endpoint="/virtual-card/top-up",
+            session=session,
+        ) as claim:
+            if claim.response is not None:
+                return CardTopupResponseSchema(
+                    status="success",
+                    message="Retrieved from cache",
+                    data=claim.response,
+                )
+
+            card, transaction = await top_up_virtual_card(
+                card_id=card_id,
+                account_number=top_up_data.account_number,
+                amount=top_up_data.amount,
+                description=top_up_data.description,
+                session=session,
             )
-        )
 
-        existing_key = existing_key_result.first()
-
-        if existing_key:
-            return CardTopupResponseSchema(
+            response = CardTopupResponseSchema(
                 status="success",
-                message="Retrieved from cache",
-                data=existing_key.response_body,
+                message="Card topped-up successfully",
+                data={
+                    "card_id": str(card.id),
+                    "transaction_id": str(transaction.id),
+                    "amount": str(transaction.amount),
+                    "new_balance": str(card.available_balance),
+                    "reference": transaction.reference,
+                },
             )
 
-        card, transaction = await top_up_virtual_card(
-            card_id=card_id,
-            account_number=top_up_data.account_number,
-            amount=top_up_data.amount,
-            description=top_up_data.description,
-            session=session,
-        )
-
-        response = CardTopupResponseSchema(
-            status="success",
-            message="Card topped-up successfully",
-            data={
-                "card_id": str(card.id),
-                "transaction_id": str(transaction.id),
-                "amount": str(transaction.amount),
-                "new_balance": str(card.available_balance),
-                "reference": transaction.reference,
-            },
-        )
-
-        idempotency_record = IdempotencyKey(
-            key=idempotency_key,
-            user_id=current_user.id,
-            endpoint="/virtual-card/top-up",
-            response_code=status.HTTP_200_OK,
-            response_body=response.model_dump(),
-            expires_at=datetime.now(timezone.utc) + timedelta(hours=24),
-        )
-
-        session.add(idempotency_record)
-        await session.commit()
+            await claim.save(response.model_dump(), status.HTTP_200_OK)
 
-        return response
+            return response
 
     except HTTPException:
         raise
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, HTTPException, status
+
+from backend.app.api.routes.auth.dependencies import CurrentUser
+from backend.app.auth.schema import RoleChoicesEnum
+from backend.app.core.config import settings
+from backend.app.core.idempotency import idempotency_store
+
+from backend.app.core.logging import get_logger
+
+logger = get_logger()
+
+router = APIRouter(prefix="/transaction")
+
+
+@router.get(
+    "/idempotency-metrics",
+    status_code=status.HTTP_200_OK,
+    description="Replayed, coalesced and executed requests of the money-moving endpoints. Only accessible for account executives",
+)
+async def get_idempotency_metrics(current_user: CurrentUser) -> dict:
+    if current_user.role != RoleChoicesEnum.ACCOUNT_EXECUTIVE:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={
+                "status": "error",
+                "message": "Only account executives can view idempotency metrics",
+            },
+        )
+
+    try:
+        return {
+            "status": "success",
+            "lock_seconds": settings.IDEMPOTENCY_LOCK_SECONDS,
+            "idempotency": idempotency_store.stats(),
+        }
+    except Exception as e:
+        logger.error(f"Failed to read idempotency metrics: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "status": "error",
+                "message": "Failed to read idempotency metrics",
+            },
+        )
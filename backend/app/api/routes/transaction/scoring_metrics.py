@@ -0,0 +1,38 @@
+from fastapi import APIRouter, HTTPException, status
+
+from backend.app.api.routes.auth.dependencies import CurrentUser
+from backend.app.auth.schema import RoleChoicesEnum
+from backend.app.core.ai.config import ai_settings
+from backend.app.core.ai.dispatcher import scoring_dispatcher
+from backend.app.core.ai.transaction_analyzer import cascade_stats
+
+from backend.app.core.logging import get_logger
+
+logger = get_logger()
+
+router = APIRouter(prefix="/transaction")
+
+
+@router.get(
+    "/scoring-metrics",
+    status_code=status.HTTP_200_OK,
+    description="Batch size, queueing delay and early exits of fraud scoring on this worker. Only accessible for account executives",
+)
+async def get_scoring_metrics(current_user: CurrentUser) -> dict:
+    if current_user.role != RoleChoicesEnum.ACCOUNT_EXECUTIVE:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail={
+                "status": "error",
+                "message": "Only account executives can view scoring metrics",
+            },
+        )
+
+    return {
+        "status": "success",
+        "enabled": ai_settings.SCORING_BATCH_ENABLED,
+        "window_ms": ai_settings.SCORING_BATCH_WINDOW_MS,
+        "max_batch_size": ai_settings.SCORING_BATCH_MAX_SIZE,
+        "dispatcher": scoring_dispatcher.stats(),
+        "cascade": cascade_stats.stats(),
+    }
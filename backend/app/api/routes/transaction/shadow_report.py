@@ -0,0 +1,69 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.app.api.routes.auth.dependencies import CurrentUser
+from backend.app.auth.schema import RoleChoicesEnum
+from backend.app.core.ai.config import ai_settings
+from backend.app.core.ai.shadow import screened_count, shadow_report, shadow_scorer
+
+from backend.app.core.db import get_session
+from backend.app.core.logging import get_logger
+
+logger = get_logger()
+
+router = APIRouter(prefix="/transaction")
+
+
+@router.get(
+    "/shadow-report",
+    status_code=status.HTTP_200_OK,
+    description="Compare flag rates and agreement of shadow models with production. Only accessible for account executives",
+)
+async def get_shadow_report(
+    current_user: CurrentUser,
+    start_date: datetime | None = Query(
+        default=None,
+        description="Filter from this date",
+    ),
+    end_date: datetime | None = Query(
+        default=None,
+        description="Filter until this date",
+    ),
+    session: AsyncSession = Depends(get_session),
+) -> dict:
+    try:
+        if current_user.role != RoleChoicesEnum.ACCOUNT_EXECUTIVE:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail={
+                    "status": "error",
+                    "message": "Only account executives can view shadow model reports",
+                },
+            )
+
+        models = await shadow_report(session, start_date, end_date)
+
+        return {
+            "status": "success",
+            "production_model_version": ai_settings.MODEL_VERSION,
+            "threshold": ai_settings.RISK_SCORE_TRESHOLD,
+            "models": models,
+            # Scored by production without factor scores, not in the models
+            "screened_excluded": await screened_count(session, start_date, end_date),
+            # Counters of this API worker only
+            "worker": shadow_scorer.stats(),
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to build shadow model report: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "status": "error",
+                "message": "Failed to build shadow model report",
+                "action": "Please try again later",
+            },
+        )
@@ -0,0 +1,272 @@
+import csv
+import io
+import time
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Iterator, TextIO
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import any_, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.app.auth.models import User
+from backend.app.bank_account.balance import apply_balance_changes, lock_accounts
+from backend.app.bank_account.enums import BankAccountStatusEnum
+from backend.app.bank_account.models import BankAccount
+from backend.app.core.config import settings
+from backend.app.core.logging import get_logger
+from backend.app.transaction.enums import (
+    TransactionCategoryEnum,
+    TransactionStatusEnum,
+    TransactionTypeEnum,
+)
+from backend.app.transaction.models import Transaction
+from backend.app.transaction.schema import BulkDepositRowSchema
+
+logger = get_logger()
+
+DEPOSIT_CSV_COLUMNS = ["account_number", "amount", "description"]
+
+# Every rejected row is counted, only the first ones are listed
+REPORT_MAX_ERRORS = 100
+
+
+def deposit_csv_stream(content: bytes) -> TextIO:
+    return io.TextIOWrapper(io.BytesIO(content), encoding="utf-8-sig", newline="")
+
+
+def check_deposit_csv(content: bytes) -> None:
+    # Only the header is read here, the rows are validated by the task
+    try:
+        header = next(csv.reader(deposit_csv_stream(content)), [])
+    except (UnicodeDecodeError, csv.Error):
+        header = []
+
+    if set(DEPOSIT_CSV_COLUMNS[:2]) - set(header):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "status": "error",
+                "message": "The file must be a UTF-8 CSV with the columns "
+                f"{', '.join(DEPOSIT_CSV_COLUMNS)}",
+            },
+        )
+
+
+def iter_deposit_rows(
+    stream: TextIO,
+) -> Iterator[tuple[int, BulkDepositRowSchema | None, str | None]]:
+    # One row at a time, a file is never held as a list of rows
+    reader = csv.DictReader(stream)
+
+    if set(DEPOSIT_CSV_COLUMNS[:2]) - set(reader.fieldnames or []):
+        raise ValueError(
+            f"The file must have the columns {', '.join(DEPOSIT_CSV_COLUMNS)}"
+        )
+
+    for row in reader:
+        try:
+            yield reader.line_num, BulkDepositRowSchema.model_validate(
+                {
+                    "account_number": (row.get("account_number") or "").strip(),
+                    "amount": (row.get("amount") or "").strip(),
+                    "description": (row.get("description") or "").strip() or None,
+                }
+            ), None
+        except ValidationError as e:
+            error = e.errors()[0]
+            yield reader.line_num, None, f"Invalid {error['loc'][0]}: {error['msg']}"
+
+
+class BulkDepositReport:
+    def __init__(self, batch_reference: str):
+        self.batch_reference = batch_reference
+        self.rows = 0
+        self.posted = 0
+        self.already_posted = 0
+        self.rejected = 0
+        self.errors: list[dict] = []
+        self.accounts: set[uuid.UUID] = set()
+        self.totals: dict[str, Decimal] = {}
+        self.started = time.perf_counter()
+
+    def reject(self, line: int, message: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < REPORT_MAX_ERRORS:
+            self.errors.append({"line": line, "message": message})
+
+    def as_dict(self) -> dict:
+        elapsed_s = time.perf_counter() - self.started
+
+        return {
+            "batch_reference": self.batch_reference,
+            "rows": self.rows,
+            "posted": self.posted,
+            "already_posted": self.already_posted,
+            "rejected": self.rejected,
+            "accounts_credited": len(self.accounts),
+            "totals": {
+                currency: str(total) for currency, total in sorted(self.totals.items())
+            },
+            "errors": self.errors,
+            "elapsed_s": round(elapsed_s, 3),
+            "rows_per_second": round(self.rows / elapsed_s, 1) if elapsed_s else 0,
+        }
+
+
+async def _post_chunk(
+    session: AsyncSession,
+    chunk: list[tuple[int, BulkDepositRowSchema]],
+    *,
+    teller: User | None,
+    description: str,
+    report: BulkDepositReport,
+) -> None:
+    # Resolved with one query and posted in one database transaction, the
+    # credits as one balance UPDATE and the rows as one executemany INSERT
+    accounts_result = await session.exec(
+        select(BankAccount.account_number, BankAccount.id).where(
+            BankAccount.account_number
+            == any_(list({row.account_number for _, row in chunk}))
+        )
+    )
+    account_ids = dict(accounts_result.all())
+
+    accounts = await lock_accounts(session, set(account_ids.values()))
+
+    deposits = []
+    for line, row in chunk:
+        account = accounts.get(account_ids.get(row.account_number))
+
+        if not account:
+            report.reject(line, "Account not found")
+        elif account.account_status != BankAccountStatusEnum.Active:
+            report.reject(line, "Account is not active")
+        else:
+            deposits.append((line, row, account))
+
+    if not deposits:
+        await session.rollback()
+        return
+
+    balances = await apply_balance_changes(
+        session, [(account, row.amount) for _, row, account in deposits]
+    )
+    if balances is None:
+        raise ValueError("Failed to credit the accounts")
+
+    # Each row shows the balance as if the deposits were made one by one
+    running = dict(balances)
+    for _, row, account in deposits:
+        running[account.id] -= row.amount
+
+    completed_at = datetime.now(timezone.utc)
+    transactions = []
+    for line, row, account in deposits:
+        balance_before = running[account.id]
+        running[account.id] = balance_before + row.amount
+
+        transaction_metadata = {
+            "currency": account.currency.value,
+            "account_number": account.account_number,
+            "batch_reference": report.batch_reference,
+            "batch_line": line,
+        }
+        if teller:
+            transaction_metadata["teller_name"] = teller.full_name
+            transaction_metadata["teller_email"] = teller.email
+
+        transactions.append(
+            Transaction(
+                amount=row.amount,
+                description=row.description or description,
+                reference=f"{report.batch_reference}-{line:06d}",
+                transaction_type=TransactionTypeEnum.Deposit,
+                transaction_category=TransactionCategoryEnum.Credit,
+                transaction_status=TransactionStatusEnum.Completed,
+                balance_before=balance_before,
+                balance_after=running[account.id],
+                receiver_account_id=account.id,
+                receiver_id=account.user_id,
+                processed_by=teller.id if teller else None,
+                completed_at=completed_at,
+                transaction_metadata=transaction_metadata,
+            )
+        )
+
+    try:
+        await session.exec(
+            insert(Transaction),
+            params=[
+                {
+                    table_column.name: getattr(transaction, table_column.name)
+                    for table_column in Transaction.__table__.columns
+                }
+                for transaction in transactions
+            ],
+        )
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+
+        # References are derived from the batch and the line, a task that is
+        # run again skips the chunks it had already committed
+        references = [transaction.reference for transaction in transactions]
+        existing = await session.exec(
+            select(func.count()).where(Transaction.reference == any_(references))
+        )
+        if existing.one() != len(references):
+            raise
+
+        report.already_posted += len(references)
+        return
+
+    report.posted += len(deposits)
+    for _, row, account in deposits:
+        report.accounts.add(account.id)
+        currency = account.currency.value
+        report.totals[currency] = report.totals.get(currency, Decimal("0")) + row.amount
+
+
+async def ingest_bulk_deposit(
+    stream: TextIO,
+    *,
+    batch_reference: str,
+    teller_id: uuid.UUID,
+    description: str,
+    session: AsyncSession,
+    chunk_rows: int = settings.BULK_DEPOSIT_CHUNK_ROWS,
+) -> dict:
+    report = BulkDepositReport(batch_reference)
+    teller = await session.get(User, teller_id)
+    chunk: list[tuple[int, BulkDepositRowSchema]] = []
+
+    for line, row, error in iter_deposit_rows(stream):
+        report.rows += 1
+
+        if error:
+            report.reject(line, error)
+            continue
+
+        chunk.append((line, row))
+        if len(chunk) == chunk_rows:
+            await _post_chunk(
+                session, chunk, teller=teller, description=description, report=report
+            )
+            chunk = []
+
+    if chunk:
+        await _post_chunk(
+            session, chunk, teller=teller, description=description, report=report
+        )
+
+    result = report.as_dict()
+    logger.info(
+        f"Bulk deposit {batch_reference}: {report.posted} of {report.rows} rows "
+        f"posted at {result['rows_per_second']} rows/s"
+    )
+    return result
@@ -0,0 +1,671 @@
+import csv
+import io
+import uuid
+from datetime import datetime, timezone, timedelta
+from decimal import Decimal
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import (
+    Numeric,
+    Uuid,
+    column,
+    insert,
+    literal,
+    literal_column,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import any_, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.app.auth.models import User
+from backend.app.auth.utils import generate_otp
+from backend.app.bank_account.balance import (
+    apply_balance_changes,
+    load_total_balance,
+    lock_accounts,
+)
+from backend.app.bank_account.enums import BankAccountStatusEnum
+from backend.app.bank_account.models import BankAccount
+from backend.app.bank_account.utils import calculate_conversion
+from backend.app.core.ai.feature_store import feature_store
+from backend.app.core.ai.service import TransactionAIService
+from backend.app.core.config import settings
+from backend.app.core.logging import get_logger
+from backend.app.transaction.enums import (
+    TransactionCategoryEnum,
+    TransactionFailureReason,
+    TransactionStatusEnum,
+    TransactionTypeEnum,
+)
+from backend.app.transaction.models import Transaction
+from backend.app.transaction.schema import BulkTransferLegSchema
+
+logger = get_logger()
+
+# Spelled out rather than bound, so queries match ix_transaction_batch_reference
+BATCH_REFERENCE = Transaction.transaction_metadata.op("->>")(
+    literal_column("'batch_reference'")
+)
+
+CSV_COLUMNS = ["receiver_account_number", "amount", "description"]
+
+
+def parse_bulk_transfer_csv(content: bytes) -> list[BulkTransferLegSchema]:
+    try:
+        reader = csv.DictReader(io.StringIO(content.decode("utf-8-sig")))
+        missing = set(CSV_COLUMNS[:2]) - set(reader.fieldnames or [])
+    except UnicodeDecodeError:
+        missing = None
+
+    if missing is None or missing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "status": "error",
+                "message": "The file must be a UTF-8 CSV with the columns "
+                f"{', '.join(CSV_COLUMNS)}",
+            },
+        )
+
+    legs = []
+    for row in reader:
+        if len(legs) == settings.BULK_TRANSFER_MAX_LEGS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "status": "error",
+                    "message": "A bulk transfer can have at most "
+                    f"{settings.BULK_TRANSFER_MAX_LEGS} legs",
+                },
+            )
+
+        try:
+            legs.append(
+                BulkTransferLegSchema.model_validate(
+                    {
+                        "receiver_account_number": (
+                            row.get("receiver_account_number") or ""
+                        ).strip(),
+                        "amount": (row.get("amount") or "").strip(),
+                        "description": (row.get("description") or "").strip()
+                        or None,
+                    }
+                )
+            )
+        except ValidationError as e:
+            error = e.errors()[0]
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "status": "error",
+                    "message": f"Invalid {error['loc'][0]} on line "
+                    f"{reader.line_num}: {error['msg']}",
+                },
+            )
+
+    if not legs:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"status": "error", "message": "The file has no transfers"},
+        )
+
+    return legs
+
+
+def _leg_result(
+    leg: int,
+    receiver_account_number: str,
+    amount: Decimal,
+    leg_status: TransactionStatusEnum | str,
+    reference: str | None = None,
+    message: str | None = None,
+) -> dict:
+    return {
+        "leg": leg,
+        "receiver_account_number": receiver_account_number,
+        "amount": str(amount),
+        "reference": reference,
+        "status": (
+            leg_status.value
+            if isinstance(leg_status, TransactionStatusEnum)
+            else leg_status
+        ),
+        "message": message,
+    }
+
+
+def _failure_details(
+    reason: TransactionFailureReason, error_message: str, **details
+) -> dict:
+    # Same shape mark_transaction_failed writes for a single transaction
+    return {
+        "failure_details": {
+            "reason": reason.value,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "error_message": error_message,
+            **details,
+        }
+    }
+
+
+async def _fail_legs(
+    session: AsyncSession,
+    transaction_ids: list[uuid.UUID],
+    reason: TransactionFailureReason,
+    error_message: str,
+) -> None:
+    await session.exec(
+        update(Transaction)
+        .where(Transaction.id == any_(transaction_ids))
+        .values(
+            transaction_status=TransactionStatusEnum.Failed,
+            failed_reason=reason.value,
+            transaction_metadata=Transaction.transaction_metadata.op("||")(
+                literal(_failure_details(reason, error_message), JSONB)
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    logger.error(
+        f"{len(transaction_ids)} bulk transfer legs failed",
+        extra={"reason": reason.value},
+    )
+
+
+async def initiate_bulk_transfer(
+    *,
+    sender_id: uuid.UUID,
+    sender_account_id: uuid.UUID,
+    legs: list[BulkTransferLegSchema],
+    description: str,
+    security_answer: str,
+    session: AsyncSession,
+) -> tuple[str, list[dict], User]:
+    if len(legs) > settings.BULK_TRANSFER_MAX_LEGS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "status": "error",
+                "message": "A bulk transfer can have at most "
+                f"{settings.BULK_TRANSFER_MAX_LEGS} legs",
+            },
+        )
+
+    try:
+        sender_result = await session.exec(
+            select(BankAccount, User)
+            .join(User)
+            .where(
+                BankAccount.id == sender_account_id,
+                BankAccount.user_id == sender_id,
+            )
+        )
+        sender_data = sender_result.first()
+
+        if not sender_data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail={"status": "error", "message": "Sender account not found"},
+            )
+
+        sender_account, sender = sender_data
+
+        if sender_account.account_status != BankAccountStatusEnum.Active:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={"status": "error", "message": "Sender account is not active"},
+            )
+
+        if security_answer != sender.security_answer:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail={"status": "error", "message": "Incorrect security answer"},
+            )
+
+        # Every receiver, with its owner, in one round trip
+        receivers_result = await session.exec(
+            select(BankAccount, User)
+            .join(User)
+            .where(
+                BankAccount.account_number
+                == any_(list({leg.receiver_account_number for leg in legs}))
+            )
+        )
+        receivers = {
+            account.account_number: (account, owner)
+            for account, owner in receivers_result.all()
+        }
+
+        batch_reference = f"BLK{uuid.uuid4().hex[:8].upper()}"
+        results: list[dict] = []
+        transactions: list[Transaction] = []
+
+        for index, leg in enumerate(legs, start=1):
+            receiver_data = receivers.get(leg.receiver_account_number)
+
+            if not receiver_data:
+                rejection = "Receiver account not found"
+            elif receiver_data[0].user_id == sender_id:
+                rejection = "Cannot transfer to your own account"
+            elif receiver_data[0].account_status != BankAccountStatusEnum.Active:
+                rejection = "Receiver account is not active"
+            else:
+                rejection = None
+
+            if not rejection:
+                receiver_account, receiver = receiver_data
+                try:
+                    if sender_account.currency != receiver_account.currency:
+                        converted_amount, exchange_rate, conversion_fee = (
+                            calculate_conversion(
+                                leg.amount,
+                                sender_account.currency,
+                                receiver_account.currency,
+                            )
+                        )
+                    else:
+                        converted_amount = leg.amount
+                        exchange_rate = Decimal("1.0")
+                        conversion_fee = Decimal("0")
+                except Exception as e:
+                    rejection = f"Currency conversion failed: {str(e)}"
+
+            # Rejected legs are reported, never written
+            if rejection:
+                results.append(
+                    _leg_result(
+                        index,
+                        leg.receiver_account_number,
+                        leg.amount,
+                        "rejected",
+                        message=rejection,
+                    )
+                )
+                continue
+
+            transaction = Transaction(
+                amount=leg.amount,
+                description=leg.description or description,
+                reference=f"{batch_reference}-{index:05d}",
+                transaction_type=TransactionTypeEnum.Transfer,
+                transaction_category=TransactionCategoryEnum.Debit,
+                transaction_status=TransactionStatusEnum.Pending,
+                balance_before=Decimal(str(sender_account.account_balance)),
+                balance_after=Decimal(str(sender_account.account_balance))
+                - leg.amount,
+                sender_account_id=sender_account.id,
+                receiver_account_id=receiver_account.id,
+                sender_id=sender.id,
+                receiver_id=receiver.id,
+                transaction_metadata={
+                    "batch_reference": batch_reference,
+                    "batch_leg": index,
+                    "conversion_rate": str(exchange_rate),
+                    "conversion_fee": str(conversion_fee),
+                    "original_amount": str(leg.amount),
+                    "converted_amount": str(converted_amount),
+                    "from_currency": sender_account.currency.value,
+                    "to_currency": receiver_account.currency.value,
+                },
+            )
+            transactions.append(transaction)
+            results.append(
+                _leg_result(
+                    index,
+                    leg.receiver_account_number,
+                    leg.amount,
+                    TransactionStatusEnum.Pending,
+                    reference=transaction.reference,
+                )
+            )
+
+        if not transactions:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "status": "error",
+                    "message": "No transfer in the batch can be made",
+                    "legs": results,
+                },
+            )
+
+        total = sum((transaction.amount for transaction in transactions), Decimal("0"))
+
+        if await load_total_balance(session, sender_account) < total:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "status": "error",
+                    "message": "Insufficient balance",
+                    "required_amount": str(total),
+                },
+            )
+
+        # All legs in one analyzer call, flagged ones are written as failed
+        # and the rest of the batch goes ahead
+        ai_service = TransactionAIService(session)
+        analyses = await ai_service.analyze_batch(transactions, sender_id)
+
+        by_reference = {result["reference"]: result for result in results}
+        for transaction, analysis in zip(transactions, analyses):
+            if not analysis["needs_review"]:
+                continue
+
+            transaction.transaction_status = TransactionStatusEnum.Failed
+            transaction.failed_reason = (
+                TransactionFailureReason.SUSPICIOUS_ACTIVITY.value
+            )
+            transaction.transaction_metadata = {
+                **transaction.transaction_metadata,
+                **_failure_details(
+                    TransactionFailureReason.SUSPICIOUS_ACTIVITY,
+                    "This transaction has been flagged as potentially fraudulent. An account executive will review the transaction, before it's either approved or rejected.",
+                    risk_score=analysis["risk_score"],
+                    risk_factors=analysis["risk_factors"],
+                    ai_model_version=analysis["model_version"],
+                ),
+            }
+            by_reference[transaction.reference].update(
+                status=TransactionStatusEnum.Failed.value,
+                message="Flagged for review as potentially fraudulent",
+            )
+
+        # The legs, their risk scores and the OTP are written by one commit
+        await session.exec(
+            insert(Transaction),
+            params=[
+                {
+                    table_column.name: getattr(transaction, table_column.name)
+                    for table_column in Transaction.__table__.columns
+                }
+                for transaction in transactions
+            ],
+        )
+        await ai_service.save_batch_scores(transactions, analyses)
+
+        if any(
+            transaction.transaction_status == TransactionStatusEnum.Pending
+            for transaction in transactions
+        ):
+            sender.otp = generate_otp()
+            sender.otp_expiry_time = datetime.now(timezone.utc) + timedelta(
+                minutes=settings.OTP_EXPIRATION_MINUTES
+            )
+            session.add(sender)
+
+        await session.commit()
+
+        feature_store.record_transactions(sender_id, transactions)
+
+        return batch_reference, results, sender
+
+    except HTTPException:
+        await session.rollback()
+        raise
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"Failed to initiate bulk transfer: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "status": "error",
+                "message": "Failed to initiate bulk transfer",
+            },
+        )
+
+
+async def complete_bulk_transfer(
+    *,
+    sender_id: uuid.UUID,
+    batch_reference: str,
+    otp: str,
+    session: AsyncSession,
+) -> tuple[list[dict], BankAccount, User]:
+    try:
+        sender = await session.get(User, sender_id)
+
+        # Locked, a second confirmation of the same batch waits here and then
+        # finds no pending leg
+        legs_result = await session.exec(
+            select(Transaction, BankAccount.account_number)
+            .join(BankAccount, BankAccount.id == Transaction.receiver_account_id)
+            .where(
+                BATCH_REFERENCE == batch_reference,
+                Transaction.sender_id == sender_id,
+                Transaction.transaction_status == TransactionStatusEnum.Pending,
+            )
+            .order_by(Transaction.reference)
+            .with_for_update(of=Transaction)
+        )
+        legs = legs_result.all()
+
+        if not legs:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail={"status": "error", "message": "Bulk transfer not found"},
+            )
+
+        # Like a single transfer, a wrong or late OTP fails the whole batch so
+        # it cannot be guessed at until the OTP expires
+        if not sender or not sender.otp or sender.otp != otp:
+            await _fail_legs(
+                session,
+                [transaction.id for transaction, _ in legs],
+                TransactionFailureReason.INVALID_OTP,
+                "Invalid OTP",
+            )
+            await session.commit()
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail={"status": "error", "message": "Invalid OTP"},
+            )
+
+        if (
+            not sender.otp_expiry_time
+            or datetime.now(timezone.utc) > sender.otp_expiry_time
+        ):
+            await _fail_legs(
+                session,
+                [transaction.id for transaction, _ in legs],
+                TransactionFailureReason.OTP_EXPIRED,
+                "OTP has expired",
+            )
+            await session.commit()
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail={"status": "error", "message": "OTP has expired"},
+            )
+
+        sender_account_id = legs[0][0].sender_account_id
+        accounts = await lock_accounts(
+            session,
+            {sender_account_id}
+            | {transaction.receiver_account_id for transaction, _ in legs},
+        )
+        sender_account = accounts.get(sender_account_id)
+
+        if (
+            not sender_account
+            or sender_account.account_status != BankAccountStatusEnum.Active
+        ):
+            await _fail_legs(
+                session,
+                [transaction.id for transaction, _ in legs],
+                TransactionFailureReason.ACCOUNT_INACTIVE,
+                "Sender account is no longer active",
+            )
+            await session.commit()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "status": "error",
+                    "message": "Sender account is no longer active",
+                },
+            )
+
+        results: list[dict] = []
+        completed: list[Transaction] = []
+        inactive: list[uuid.UUID] = []
+
+        for transaction, account_number in legs:
+            receiver_account = accounts.get(transaction.receiver_account_id)
+            leg = transaction.transaction_metadata["batch_leg"]
+
+            if (
+                not receiver_account
+                or receiver_account.account_status != BankAccountStatusEnum.Active
+            ):
+                inactive.append(transaction.id)
+                results.append(
+                    _leg_result(
+                        leg,
+                        account_number,
+                        transaction.amount,
+                        TransactionStatusEnum.Failed,
+                        reference=transaction.reference,
+                        message="Receiver account is no longer active",
+                    )
+                )
+                continue
+
+            completed.append(transaction)
+            results.append(
+                _leg_result(
+                    leg,
+                    account_number,
+                    transaction.amount,
+                    TransactionStatusEnum.Completed,
+                    reference=transaction.reference,
+                )
+            )
+
+        if inactive:
+            await _fail_legs(
+                session,
+                inactive,
+                TransactionFailureReason.ACCOUNT_INACTIVE,
+                "Receiver account is no longer active",
+            )
+
+        total = sum((transaction.amount for transaction in completed), Decimal("0"))
+
+        # The sender's debit and every credit as one guarded UPDATE
+        balances = await apply_balance_changes(
+            session,
+            [(sender_account, -total)]
+            + [
+                (
+                    accounts[transaction.receiver_account_id],
+                    Decimal(transaction.transaction_metadata["converted_amount"]),
+                )
+                for transaction in completed
+            ],
+        )
+
+        if balances is None:
+            await _fail_legs(
+                session,
+                [transaction.id for transaction in completed],
+                TransactionFailureReason.INSUFFICIENT_BALANCE,
+                "Insufficient balance",
+            )
+            await session.commit()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "status": "error",
+                    "message": "Insufficient balance",
+                    "required_amount": str(total),
+                },
+            )
+
+        # Each leg shows the sender's balance as if the legs ran one by one
+        balance_after = balances[sender_account_id] + total
+        completed_legs = []
+        for transaction in completed:
+            balance_before = balance_after
+            balance_after = balance_before - transaction.amount
+            completed_legs.append((transaction.id, balance_before, balance_after))
+
+        if completed_legs:
+            changed = values(
+                column("id", Uuid),
+                column("balance_before", Numeric),
+                column("balance_after", Numeric),
+                name="legs",
+            ).data(completed_legs)
+
+            await session.exec(
+                update(Transaction)
+                .where(Transaction.id == changed.c.id)
+                .values(
+                    transaction_status=TransactionStatusEnum.Completed,
+                    completed_at=datetime.now(timezone.utc),
+                    balance_before=changed.c.balance_before,
+                    balance_after=changed.c.balance_after,
+                )
+                .execution_options(synchronize_session=False)
+            )
+
+        sender.otp = ""
+        sender.otp_expiry_time = None
+        session.add(sender)
+
+        await session.commit()
+
+        return results, sender_account, sender
+
+    except HTTPException:
+        await session.rollback()
+        raise
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"Failed to complete bulk transfer: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "status": "error",
+                "message": "Failed to complete the bulk transfer",
+            },
+        )
+
+
+async def get_bulk_transfer_report(
+    *, sender_id: uuid.UUID, batch_reference: str, session: AsyncSession
+) -> list[dict]:
+    # Legs rejected when the batch was initiated were never written
+    result = await session.exec(
+        select(
+            Transaction.transaction_metadata,
+            Transaction.reference,
+            Transaction.amount,
+            Transaction.transaction_status,
+            Transaction.failed_reason,
+            BankAccount.account_number,
+        )
+        .join(BankAccount, BankAccount.id == Transaction.receiver_account_id)
+        .where(BATCH_REFERENCE == batch_reference, Transaction.sender_id == sender_id)
+        .order_by(Transaction.reference)
+    )
+
+    return [
+        _leg_result(
+            metadata["batch_leg"],
+            account_number,
+            amount,
+            transaction_status,
+            reference=reference,
+            message=failed_reason,
+        )
+        for (
+            metadata,
+            reference,
+            amount,
+            transaction_status,
+            failed_reason,
+            account_number,
+        ) in result.all()
+    ]
@@ -5,9 +5,12 @@ from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from fastapi import HTTPException, status
 from decimal import Decimal
+from sqlalchemy import Float, Numeric, cast, update
+from sqlalchemy.orm.attributes import set_committed_value
 
 from backend.app.virtual_card.models import VirtualCard
 from backend.app.bank_account.models import BankAccount
+from backend.app.bank_account.balance import adjust_balance, load_total_balance
 from backend.app.auth.models import User
 from backend.app.transaction.models import Transaction
 from backend.app.transaction.enums import (
@@ -24,12 +27,33 @@ from backend.app.virtual_card.utils import (
     generate_card_expiry_date,
 )
 
+from backend.app.core.ai.feature_store import feature_store
 from backend.app.core.logging import get_logger
 
 
 logger = get_logger()
 
 
+def card_top_up(card_id: UUID, amount: Decimal, topped_up_at: datetime):
+    # Both running totals in one UPDATE, in numeric like balance_update, so
+    # concurrent top-ups of a card cannot lose one another
+    return (
+        update(VirtualCard)
+        .where(VirtualCard.id == card_id)
+        .values(
+            available_balance=cast(
+                cast(VirtualCard.available_balance, Numeric) + amount, Float
+            ),
+            total_topped_up=cast(
+                cast(VirtualCard.total_topped_up, Numeric) + amount, Float
+            ),
+            last_top_up_date=topped_up_at,
+        )
+        .returning(VirtualCard.available_balance, VirtualCard.total_topped_up)
+        .execution_options(synchronize_session=False)
+    )
+
+
 async def create_virtual_card(
     user_id: UUID,
     bank_account_id: UUID,
@@ -251,7 +275,7 @@ async def top_up_virtual_card(
                 },
             )
 
-        if Decimal(str(bank_account.account_balance)) < Decimal(str(amount)):
+        if await load_total_balance(session, bank_account) < Decimal(str(amount)):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail={
@@ -271,8 +295,20 @@ async def top_up_virtual_card(
 
         reference = f"TOPUP{uuid.uuid4().hex[:8].upper()}"
 
-        balance_before = Decimal(str(bank_account.account_balance))
-        balance_after = balance_before - Decimal(str(amount))
+        balance_after = await adjust_balance(
+            session, bank_account, -Decimal(str(amount))
+        )
+
+        if balance_after is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "status": "error",
+                    "message": "Insufficient balance in bank account",
+                },
+            )
+
+        balance_before = balance_after + Decimal(str(amount))
         current_time = datetime.now(timezone.utc)
 
         transaction = Transaction(
@@ -295,18 +331,21 @@ async def top_up_virtual_card(
             },
         )
 
-        bank_account.account_balance = float(balance_after)
-        card.available_balance += amount
-        card.total_topped_up += amount
+        result = await session.exec(
+            card_top_up(card.id, Decimal(str(amount)), current_time)
+        )
+        available_balance, total_topped_up = result.one()
 
-        card.last_top_up_date = current_time
+        # Loaded without marking the card dirty, like the account balance
+        set_committed_value(card, "available_balance", available_balance)
+        set_committed_value(card, "total_topped_up", total_topped_up)
+        set_committed_value(card, "last_top_up_date", current_time)
 
         session.add(transaction)
-        session.add(bank_account)
-        session.add(card)
         await session.commit()
         await session.refresh(transaction)
-        await session.refresh(card)
+
+        feature_store.record_transaction(bank_account.user_id, transaction)
 
         return card, transaction
 
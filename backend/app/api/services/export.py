@@ -0,0 +1,153 @@
+import csv
+import io
+import json
+import uuid
+import zlib
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from typing import AsyncIterator, Literal
+
+from sqlalchemy.orm import aliased
+
+from backend.app.api.services.transaction import user_transactions_query
+from backend.app.bank_account.models import BankAccount
+from backend.app.core.config import settings
+from backend.app.core.db import async_session
+from backend.app.core.logging import get_logger
+from backend.app.transaction.models import Transaction
+
+logger = get_logger()
+
+ExportFormat = Literal["csv", "ndjson"]
+
+EXPORT_COLUMNS = [
+    "id",
+    "reference",
+    "created_at",
+    "completed_at",
+    "transaction_type",
+    "transaction_category",
+    "transaction_status",
+    "amount",
+    "balance_after",
+    "currency",
+    "description",
+    "sender_account",
+    "receiver_account",
+]
+
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def transaction_export_query(
+    user_id: uuid.UUID, account_ids: list[uuid.UUID], **filters
+):
+    # Same rows and order as the transaction history, one flat row each
+    sender_account = aliased(BankAccount)
+    receiver_account = aliased(BankAccount)
+
+    return (
+        user_transactions_query(user_id, account_ids, **filters)
+        .with_only_columns(
+            Transaction.id,
+            Transaction.reference,
+            Transaction.created_at,
+            Transaction.completed_at,
+            Transaction.transaction_type,
+            Transaction.transaction_category,
+            Transaction.transaction_status,
+            Transaction.amount,
+            Transaction.balance_after,
+            Transaction.transaction_metadata["currency"].astext.label("currency"),
+            Transaction.description,
+            sender_account.account_number.label("sender_account"),
+            receiver_account.account_number.label("receiver_account"),
+        )
+        .outerjoin(sender_account, sender_account.id == Transaction.sender_account_id)
+        .outerjoin(
+            receiver_account, receiver_account.id == Transaction.receiver_account_id
+        )
+    )
+
+
+def _export_value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    return value
+
+
+def _encode_csv(rows, header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow([_export_value(value) for value in row])
+    return buffer.getvalue().encode()
+
+
+def _encode_ndjson(rows) -> bytes:
+    return "".join(
+        json.dumps(
+            {
+                column: _export_value(value)
+                for column, value in zip(EXPORT_COLUMNS, row)
+            }
+        )
+        + "\n"
+        for row in rows
+    ).encode()
+
+
+async def stream_transaction_export(
+    user_id: uuid.UUID,
+    account_ids: list[uuid.UUID],
+    export_format: ExportFormat,
+    compress: bool = False,
+    chunk_size: int = settings.EXPORT_CHUNK_SIZE,
+    **filters,
+) -> AsyncIterator[bytes]:
+    # Rows come from a server-side cursor and leave as soon as each chunk is
+    # encoded. The generator owns its session, the request's one is closed
+    # before the body is streamed.
+    encode = _encode_csv if export_format == "csv" else _encode_ndjson
+    # wbits=31 writes a gzip container, a sync flush after every chunk sends
+    # what was compressed so far instead of holding it back
+    compressor = zlib.compressobj(wbits=31) if compress else None
+
+    def emit(data: bytes) -> bytes:
+        if compressor is None:
+            return data
+        return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    if export_format == "csv":
+        yield emit(_encode_csv([], header=True))
+
+    rows = 0
+    try:
+        async with async_session() as session:
+            result = await session.stream(
+                transaction_export_query(
+                    user_id, account_ids, **filters
+                ).execution_options(yield_per=chunk_size)
+            )
+
+            async for partition in result.partitions():
+                rows += len(partition)
+                yield emit(encode(partition))
+    except Exception as e:
+        # Headers are already sent, all that is left is to cut the body short
+        logger.error(
+            f"Transaction export for user {user_id} failed after {rows} rows: {e}"
+        )
+        raise
+
+    if compressor is not None:
+        yield compressor.flush()
+
+    logger.info(f"Exported {rows} transactions for user {user_id}")
@@ -0,0 +1,277 @@
+import math
+import uuid
+from datetime import datetime, timedelta
+from typing import AsyncIterator
+
+from sqlalchemy.orm import aliased
+from sqlmodel import any_, desc, func, or_, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.app.auth.models import User
+from backend.app.bank_account.balance import load_total_balance
+from backend.app.bank_account.models import BankAccount
+from backend.app.core.config import settings
+from backend.app.core.logging import get_logger
+from backend.app.transaction.enums import TransactionStatusEnum
+from backend.app.transaction.models import Transaction
+
+logger = get_logger()
+
+
+def statement_conditions(
+    account_ids: list[uuid.UUID], start_date: datetime, end_date: datetime
+) -> list:
+    return [
+        or_(
+            Transaction.sender_account_id == any_(account_ids),
+            Transaction.receiver_account_id == any_(account_ids),
+        ),
+        Transaction.created_at >= start_date,
+        Transaction.created_at <= end_date,
+        Transaction.transaction_status == TransactionStatusEnum.Completed,
+    ]
+
+
+def statement_transactions_query(
+    account_ids: list[uuid.UUID], start_date: datetime, end_date: datetime
+):
+    # Account numbers of both sides are joined in, not looked up per row
+    sender_account = aliased(BankAccount)
+    receiver_account = aliased(BankAccount)
+
+    return (
+        select(
+            Transaction.reference,
+            Transaction.amount,
+            Transaction.description,
+            Transaction.created_at,
+            Transaction.transaction_type,
+            Transaction.transaction_category,
+            Transaction.balance_after,
+            Transaction.transaction_metadata,
+            sender_account.account_number.label("sender_account"),
+            receiver_account.account_number.label("receiver_account"),
+        )
+        .outerjoin(sender_account, sender_account.id == Transaction.sender_account_id)
+        .outerjoin(
+            receiver_account, receiver_account.id == Transaction.receiver_account_id
+        )
+        .where(*statement_conditions(account_ids, start_date, end_date))
+        .order_by(desc(Transaction.created_at))
+    )
+
+
+async def statement_watermark(
+    account_ids: list[uuid.UUID],
+    start_date: datetime,
+    end_date: datetime,
+    session: AsyncSession,
+) -> dict:
+    # Any row added, removed or updated (updated_at has onupdate) changes it.
+    # Rows are a contiguous run by created_at, so count and both ends of the
+    # run tell apart two periods that select different rows.
+    result = await session.exec(
+        select(
+            func.count(),
+            func.min(Transaction.created_at),
+            func.max(Transaction.created_at),
+            func.max(Transaction.updated_at),
+        ).where(*statement_conditions(account_ids, start_date, end_date))
+    )
+    count, first_created, last_created, last_updated = result.one()
+
+    return {
+        "transactions": count,
+        "first_created": first_created.isoformat() if first_created else None,
+        "last_created": last_created.isoformat() if last_created else None,
+        "last_updated": last_updated.isoformat() if last_updated else None,
+    }
+
+
+async def get_statement_owner(
+    user_id: uuid.UUID,
+    session: AsyncSession,
+    account_number: str | None = None,
+) -> tuple[dict, list[uuid.UUID]]:
+    user_query = select(User).where(User.id == user_id)
+    result = await session.exec(user_query)
+    user = result.first()
+
+    if not user:
+        raise ValueError(f"User {user_id} not found")
+
+    if account_number:
+        account_query = select(BankAccount).where(
+            BankAccount.account_number == account_number,
+            BankAccount.user_id == user_id,
+        )
+        account_result = await session.exec(account_query)
+        account = account_result.first()
+
+        if not account:
+            raise ValueError(f"Account not found or does not belong to the user")
+
+        accounts = [account]
+    else:
+        accounts_query = select(BankAccount).where(BankAccount.user_id == user_id)
+        accounts_result = await session.exec(accounts_query)
+        accounts = accounts_result.all()
+
+    account_details = []
+
+    for acc in accounts:
+        if acc.account_number:
+            account_details.append(
+                {
+                    "account_number": acc.account_number,
+                    "account_name": acc.account_name,
+                    "account_type": acc.account_type,
+                    "currency": acc.currency.value,
+                    "balance": float(await load_total_balance(session, acc)),
+                }
+            )
+
+    user_data = {
+        "username": user.username,
+        "email": user.email,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "full_name": f"{user.first_name} {user.middle_name + ' ' if user.middle_name else ''} {user.last_name}".title().strip(),
+        "accounts": account_details,
+    }
+
+    return user_data, [acc.id for acc in accounts]
+
+
+def statement_row(trn) -> dict:
+    return {
+        "reference": trn.reference,
+        "amount": trn.amount,
+        "description": trn.description,
+        "created_at": trn.created_at.strftime("%Y-%m-%d"),
+        "transaction_type": trn.transaction_type.value,
+        "transaction_category": trn.transaction_category.value,
+        "balance_after": str(trn.balance_after),
+        "sender_account": trn.sender_account,
+        "receiver_account": trn.receiver_account,
+        "metadata": trn.transaction_metadata,
+    }
+
+
+async def stream_statement_transactions(
+    account_ids: list[uuid.UUID],
+    start_date: datetime,
+    end_date: datetime,
+    session: AsyncSession,
+    chunk_size: int = settings.STATEMENT_CHUNK_SIZE,
+) -> AsyncIterator[list[dict]]:
+    # Rows come from a server-side cursor, chunk_size at a time
+    result = await session.stream(
+        statement_transactions_query(account_ids, start_date, end_date).execution_options(
+            yield_per=chunk_size
+        )
+    )
+
+    async for partition in result.partitions():
+        yield [statement_row(trn) for trn in partition]
+
+
+def _month_windows(
+    start_date: datetime, end_date: datetime
+) -> list[tuple[datetime, datetime]]:
+    # Calendar months newest first, the order the statement lists rows in
+    windows = []
+    window_start = start_date
+
+    while window_start <= end_date:
+        next_month = (window_start.replace(day=1) + timedelta(days=32)).replace(
+            day=1, hour=0, minute=0, second=0, microsecond=0
+        )
+        windows.append(
+            (window_start, min(next_month - timedelta(microseconds=1), end_date))
+        )
+        window_start = next_month
+
+    return windows[::-1]
+
+
+def plan_statement_sections(
+    account_numbers: list[str],
+    start_date: datetime,
+    end_date: datetime,
+    months: int = settings.STATEMENT_FANOUT_MONTHS,
+    max_sections: int = settings.STATEMENT_FANOUT_MAX_SECTIONS,
+) -> list[dict]:
+    # One section per account, long ranges are split by month as well
+    if (end_date - start_date).days > months * 31:
+        windows = _month_windows(start_date, end_date)
+    else:
+        windows = [(start_date, end_date)]
+
+    per_account = max(1, max_sections // max(len(account_numbers), 1))
+    if len(windows) > per_account:
+        size = math.ceil(len(windows) / per_account)
+        windows = [
+            (group[-1][0], group[0][1])
+            for group in (
+                windows[index : index + size]
+                for index in range(0, len(windows), size)
+            )
+        ]
+
+    sections = []
+    for account_number in account_numbers:
+        for window_start, window_end in windows:
+            title = "Transaction History"
+            if len(account_numbers) > 1:
+                title += f" - Account {account_number}"
+            if len(windows) > 1:
+                title += (
+                    f" - {window_start.strftime('%Y-%m-%d')} to "
+                    f"{window_end.strftime('%Y-%m-%d')}"
+                )
+
+            sections.append(
+                {
+                    "account_number": account_number,
+                    "start_date": window_start,
+                    "end_date": window_end,
+                    "title": title,
+                }
+            )
+
+    return sections
+
+
+async def prepare_statement_data(
+    user_id: uuid.UUID,
+    start_date: datetime,
+    end_date: datetime,
+    session: AsyncSession,
+    account_number: str | None = None,
+) -> dict:
+    try:
+        user_data, account_ids = await get_statement_owner(
+            user_id, session, account_number
+        )
+
+        transaction_data = []
+        async for chunk in stream_statement_transactions(
+            account_ids, start_date, end_date, session
+        ):
+            transaction_data.extend(chunk)
+
+        return {
+            "user": user_data,
+            "transactions": transaction_data,
+            "start_date": start_date.strftime("%Y-%m-%d"),
+            "end_date": end_date.strftime("%Y-%m-%d"),
+            "is_single_account": bool(account_number),
+        }
+
+    except ValueError as ve:
+        logger.error(f"Error preparing statement data: {ve}")
+        raise
+    except Exception as e:
+        logger.error(f"Error preparing statement data: {e}")
+        raise
@@ -1,6 +1,8 @@
 import uuid
 from datetime import datetime, timezone, timedelta
-from sqlmodel import select, or_, desc, func, any_
+from sqlmodel import select, or_, desc, func, any_, case
+from sqlalchemy import Row
+from sqlalchemy.orm import aliased
 from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import Any
 from fastapi import HTTPException, status
@@ -20,15 +22,25 @@ from backend.app.bank_account.enums import BankAccountStatusEnum
 from backend.app.auth.models import User
 from backend.app.core.config import settings
 from backend.app.bank_account.utils import calculate_conversion
+from backend.app.bank_account.balance import (
+    adjust_balance,
+    adjust_balances,
+    load_total_balance,
+)
 from backend.app.transaction.utils import mark_transaction_failed
-from backend.app.core.tasks.statement import generate_statement_pdf
+from backend.app.core.tasks.statement import queue_statement
 
 from backend.app.core.logging import get_logger
+from backend.app.api.services.statement import (
+    get_statement_owner,
+    statement_watermark,
+)
+from backend.app.core.celery_app import celery_app
+from backend.app.core.statement_cache import StatementCache, statement_fingerprint
 
-from backend.app.core.tasks.statement import generate_statement_pdf
 from backend.app.core.ai.enums import AIReviewStatusEnum
-from backend.app.core.ai.models import TransactionRiskScore
-from backend.app.core.ai.service import TransactionAIService
+from backend.app.core.ai.service import TransactionAIService, with_risk_score
+from backend.app.core.ai.feature_store import feature_store
 from backend.app.core.services.transfer_alert import send_transfer_alert
 from backend.app.core.services.withdrawal_alert import send_withdrawal_alert
 
@@ -74,8 +86,18 @@ async def process_deposit(
 
         reference = f"DEP{uuid.uuid4().hex[:8].upper()}"
 
-        balance_before = Decimal(str(account.account_balance))
-        balance_after = balance_before + amount
+        balance_after = await adjust_balance(session, account, amount)
+
+        if balance_after is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "status": "error",
+                    "message": "Failed to credit the account",
+                },
+            )
+
+        balance_before = balance_after - amount
 
         transaction = Transaction(
             amount=amount,
@@ -103,17 +125,13 @@ async def process_deposit(
             transaction.transaction_metadata["teller_name"] = teller.full_name
             transaction.transaction_metadata["teller_email"] = teller.email
 
-        account.account_balance = float(balance_after)
-
         transaction.transaction_status = TransactionStatusEnum.Completed
         transaction.completed_at = datetime.now(timezone.utc)
 
         session.add(transaction)
-        session.add(account)
         await session.commit()
 
         await session.refresh(transaction)
-        await session.refresh(account)
 
         return transaction, account, account_owner
 
@@ -143,15 +161,28 @@ async def initiate_transfer(
     session: AsyncSession,
 ) -> tuple[Transaction, BankAccount, BankAccount, User, User]:
     try:
-        receiver_account_result = await session.exec(
-            select(BankAccount).where(
-                BankAccount.account_number == receiver_account_number,
-                BankAccount.user_id == sender_id,
+        # Sender and receiver, with their owners, in one round trip
+        parties_stmt = (
+            select(BankAccount, User)
+            .join(User)
+            .where(
+                or_(
+                    (BankAccount.id == sender_account_id)
+                    & (BankAccount.user_id == sender_id),
+                    BankAccount.account_number == receiver_account_number,
+                )
             )
         )
-        receiver_account = receiver_account_result.first()
+        parties_result = await session.exec(parties_stmt)
+
+        sender_data = receiver_data = None
+        for account, owner in parties_result.all():
+            if account.id == sender_account_id and account.user_id == sender_id:
+                sender_data = account, owner
+            if account.account_number == receiver_account_number:
+                receiver_data = account, owner
 
-        if receiver_account:
+        if receiver_data and receiver_data[0].user_id == sender_id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail={
@@ -161,17 +192,6 @@ async def initiate_transfer(
                 },
             )
 
-        sender_stmt = (
-            select(BankAccount, User)
-            .join(User)
-            .where(
-                BankAccount.id == sender_account_id, BankAccount.user_id == sender_id
-            )
-        )
-
-        sender_result = await session.exec(sender_stmt)
-        sender_data = sender_result.first()
-
         if not sender_data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -192,15 +212,6 @@ async def initiate_transfer(
                 detail={"status": "error", "message": "Incorrect security answer"},
             )
 
-        receiver_stmt = (
-            select(BankAccount, User)
-            .join(User)
-            .where(BankAccount.account_number == receiver_account_number)
-        )
-        receiver_result = await session.exec(receiver_stmt)
-
-        receiver_data = receiver_result.first()
-
         if not receiver_data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -221,7 +232,7 @@ async def initiate_transfer(
                 },
             )
 
-        if Decimal(str(sender_account.account_balance)) < amount:
+        if await load_total_balance(session, sender_account) < amount:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail={
@@ -274,16 +285,20 @@ async def initiate_transfer(
             },
         )
 
+        # The transaction, its risk score and the OTP are written by a single
+        # commit, scoring reads the transaction through this session
         session.add(transaction)
-        await session.commit()
-        await session.refresh(transaction)
 
         ai_service = TransactionAIService(session)
-        risk_analysis = await ai_service.analyze_transaction(transaction, sender_id)
+        risk_analysis = await ai_service.analyze_transaction(
+            transaction, sender_id, commit=False
+        )
 
         # If transaction is flagged as high risk, block it
         if risk_analysis.get("needs_review", False):
             await ai_service.handle_flagged_transacion(transaction, risk_analysis)
+            feature_store.record_transaction(sender_id, transaction)
+            ai_service.submit_shadow_scores(transaction, risk_analysis)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail={
@@ -303,10 +318,13 @@ async def initiate_transfer(
             minutes=settings.OTP_EXPIRATION_MINUTES
         )
 
-        session.add(transaction)
         session.add(sender)
         await session.commit()
-        await session.refresh(transaction)
+
+        # Only once the transaction exists, a rollback must not leave it in
+        # the profile
+        feature_store.record_transaction(sender_id, transaction)
+        ai_service.submit_shadow_scores(transaction, risk_analysis)
 
         return transaction, sender_account, receiver_account, sender, receiver
 
@@ -452,7 +470,7 @@ async def complete_transfer(
                 },
             )
 
-        if Decimal(str(sender_account.account_balance)) < transaction.amount:
+        if await load_total_balance(session, sender_account) < transaction.amount:
             await mark_transaction_failed(
                 transaction=transaction,
                 reason=TransactionFailureReason.INSUFFICIENT_BALANCE,
@@ -496,10 +514,6 @@ async def complete_transfer(
 
         converted_amount = Decimal(transaction.transaction_metadata["converted_amount"])
 
-        sender_account.account_balance = float(
-            Decimal(str(sender_account.account_balance)) - transaction.amount
-        )
-
         if not receiver_account:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -509,10 +523,35 @@ async def complete_transfer(
                 },
             )
 
-        receiver_account.account_balance = float(
-            Decimal(str(receiver_account.account_balance)) + converted_amount
+        balances = await adjust_balances(
+            session,
+            [
+                (sender_account, -transaction.amount),
+                (receiver_account, converted_amount),
+            ],
         )
 
+        if balances is None:
+            # Another payment spent the balance after the check above
+            await mark_transaction_failed(
+                transaction=transaction,
+                reason=TransactionFailureReason.INSUFFICIENT_BALANCE,
+                details={"required_amount": str(transaction.amount)},
+                session=session,
+                error_message="Insufficient balance",
+            )
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "status": "error",
+                    "message": "Insufficient balance",
+                },
+            )
+
+        sender_balance, _ = balances
+
+        transaction.balance_before = sender_balance + transaction.amount
+        transaction.balance_after = sender_balance
         transaction.transaction_status = TransactionStatusEnum.Completed
         transaction.completed_at = datetime.now(timezone.utc)
 
@@ -520,15 +559,11 @@ async def complete_transfer(
         sender.otp_expiry_time = None
 
         session.add(transaction)
-        session.add(sender_account)
-        session.add(receiver_account)
         session.add(sender)
 
         await session.commit()
 
         await session.refresh(transaction)
-        await session.refresh(sender_account)
-        await session.refresh(receiver_account)
         await session.refresh(sender)
         await session.refresh(receiver)
 
@@ -603,7 +638,7 @@ async def process_withdrawal(
                 detail={"status": "error", "message": "Account is not active"},
             )
 
-        if Decimal(str(account.account_balance)) < amount:
+        if await load_total_balance(session, account) < amount:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail={"status": "error", "message": "Insufficient balance"},
@@ -637,6 +672,8 @@ async def process_withdrawal(
         await session.commit()
         await session.refresh(transaction)
 
+        feature_store.record_transaction(user.id, transaction)
+
         ai_service = TransactionAIService(session)
         risk_analysis = await ai_service.analyze_transaction(transaction, user.id)
 
@@ -655,16 +692,31 @@ async def process_withdrawal(
                 },
             )
 
+        balance_after = await adjust_balance(session, account, -amount)
+
+        if balance_after is None:
+            await mark_transaction_failed(
+                transaction=transaction,
+                reason=TransactionFailureReason.INSUFFICIENT_BALANCE,
+                details={"required_amount": str(amount)},
+                session=session,
+                error_message="Insufficient balance",
+            )
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={"status": "error", "message": "Insufficient balance"},
+            )
+
+        transaction.balance_before = balance_after + amount
+        transaction.balance_after = balance_after
         transaction.transaction_status = TransactionStatusEnum.Completed
         transaction.completed_at = datetime.now(timezone.utc)
 
-        account.account_balance = float(balance_after)
-
-        session.add(account)
+        session.add(transaction)
         await session.commit()
 
-        await session.refresh(account)
-
+        # account_balance already holds what adjust_balance returned, shards
+        # included, a refresh would reload the bare column
         return transaction, account, user
 
     except HTTPException:
@@ -682,6 +734,109 @@ async def process_withdrawal(
         )
 
 
+def user_transactions_query(
+    user_id: uuid.UUID,
+    account_ids: list[uuid.UUID],
+    start_date: datetime | None = None,
+    end_date: datetime | None = None,
+    transaction_type: TransactionTypeEnum | None = None,
+    transaction_category: TransactionCategoryEnum | None = None,
+    transaction_status: TransactionStatusEnum | None = None,
+    min_amount: Decimal | None = None,
+    max_amount: Decimal | None = None,
+):
+    # We want to get any situation where user is either:
+    # sender, receiver or has bank account where money were sent to/from
+    query = select(Transaction).where(
+        or_(
+            Transaction.sender_id == user_id,
+            Transaction.receiver_id == user_id,
+            Transaction.sender_account_id == any_(account_ids),
+            Transaction.receiver_account_id == any_(account_ids),
+        )
+    )
+
+    if start_date:
+        query = query.where(Transaction.created_at >= start_date)
+    if end_date:
+        query = query.where(Transaction.created_at <= end_date)
+    if transaction_type:
+        query = query.where(Transaction.transaction_type == transaction_type)
+    if transaction_category:
+        query = query.where(Transaction.transaction_category == transaction_category)
+    if transaction_status:
+        query = query.where(Transaction.transaction_status == transaction_status)
+    if min_amount is not None:
+        query = query.where(Transaction.amount >= min_amount)
+    if max_amount is not None:
+        query = query.where(Transaction.amount <= max_amount)
+
+    return query.order_by(desc(Transaction.created_at))
+
+
+def transaction_history_query(
+    user_id: uuid.UUID,
+    account_ids: list[uuid.UUID],
+    skip: int = 0,
+    limit: int = 20,
+    **filters,
+):
+    # The page is cut first and only its rows are joined to the other party,
+    # which is the receiver when the user sent the transaction
+    page = (
+        user_transactions_query(user_id, account_ids, **filters)
+        .offset(skip)
+        .limit(limit)
+        .subquery()
+    )
+
+    counterparty = aliased(User)
+    counterparty_account = aliased(BankAccount)
+    is_sender = page.c.sender_id == user_id
+
+    return (
+        select(
+            page.c.id,
+            page.c.reference,
+            page.c.amount,
+            page.c.description,
+            page.c.transaction_type,
+            page.c.transaction_category,
+            page.c.transaction_status,
+            page.c.created_at,
+            page.c.completed_at,
+            page.c.balance_after,
+            page.c.transaction_metadata,
+            case(
+                (
+                    counterparty.id.is_not(None),
+                    func.concat_ws(
+                        " ",
+                        counterparty.first_name,
+                        func.nullif(counterparty.middle_name, ""),
+                        counterparty.last_name,
+                    ),
+                ),
+            ).label("counterparty_name"),
+            counterparty_account.account_number.label("counterparty_account"),
+        )
+        .outerjoin(
+            counterparty,
+            counterparty.id
+            == case((is_sender, page.c.receiver_id), else_=page.c.sender_id),
+        )
+        .outerjoin(
+            counterparty_account,
+            counterparty_account.id
+            == case(
+                (is_sender, page.c.receiver_account_id),
+                else_=page.c.sender_account_id,
+            ),
+        )
+        .order_by(desc(page.c.created_at))
+    )
+
+
 async def get_user_transactions(
     user_id: uuid.UUID,
     session: AsyncSession,
@@ -694,7 +849,7 @@ async def get_user_transactions(
     transaction_status: TransactionStatusEnum | None = None,
     min_amount: Decimal | None = None,
     max_amount: Decimal | None = None,
-) -> tuple[list[Transaction], int]:
+) -> tuple[list[Row], int]:
     try:
         account_stmt = select(BankAccount.id).where(BankAccount.user_id == user_id)
         result = await session.exec(account_stmt)
@@ -703,78 +858,29 @@ async def get_user_transactions(
         if not account_ids:
             return [], 0
 
-        # We want to get any situation where user is either:
-        # sender, receiver or has bank account where money were sent to/from
-        base_query = select(Transaction).where(
-            or_(
-                Transaction.sender_id == user_id,
-                Transaction.receiver_id == user_id,
-                Transaction.sender_account_id == any_(account_ids),
-                Transaction.receiver_account_id == any_(account_ids),
-            )
-        )
-
-        if start_date:
-            base_query = base_query.where(Transaction.created_at >= start_date)
-        if end_date:
-            base_query = base_query.where(Transaction.created_at <= end_date)
-        if transaction_type:
-            base_query = base_query.where(
-                Transaction.transaction_type == transaction_type
-            )
-        if transaction_category:
-            base_query = base_query.where(
-                Transaction.transaction_category == transaction_category
-            )
-        if transaction_status:
-            base_query = base_query.where(
-                Transaction.transaction_status == transaction_status
-            )
-        if min_amount is not None:
-            base_query = base_query.where(Transaction.amount >= min_amount)
-        if max_amount is not None:
-            base_query = base_query.where(Transaction.amount <= max_amount)
-
-        base_query = base_query.order_by(desc(Transaction.created_at))
+        filters = {
+            "start_date": start_date,
+            "end_date": end_date,
+            "transaction_type": transaction_type,
+            "transaction_category": transaction_category,
+            "transaction_status": transaction_status,
+            "min_amount": min_amount,
+            "max_amount": max_amount,
+        }
 
-        count_query = select(func.count()).select_from(base_query.subquery())
+        count_query = select(func.count()).select_from(
+            user_transactions_query(user_id, account_ids, **filters)
+            .order_by(None)
+            .subquery()
+        )
         total = await session.exec(count_query)
         total_count = total.first() or 0
 
-        transactions = await session.exec(base_query.offset(skip).limit(limit))
-
-        transaction_list = list(transactions.all())
-
-        for transaction in transaction_list:
-            await session.refresh(
-                transaction,
-                ["sender", "receiver", "sender_account", "receiver_account"],
-            )
-            if not transaction.transaction_metadata:
-                transaction.transaction_metadata = {}
-
-            if transaction.sender_id == user_id:
-                if transaction.receiver:
-                    transaction.transaction_metadata["counterparty_name"] = (
-                        transaction.receiver.full_name
-                    )
-
-                if transaction.receiver_account:
-                    transaction.transaction_metadata["counterparty_account"] = (
-                        transaction.receiver_account.account_number
-                    )
-            else:
-                if transaction.sender:
-                    transaction.transaction_metadata["counterparty_name"] = (
-                        transaction.sender.full_name
-                    )
-
-                if transaction.sender_account:
-                    transaction.transaction_metadata["counterparty_account"] = (
-                        transaction.sender_account.account_number
-                    )
+        result = await session.exec(
+            transaction_history_query(user_id, account_ids, skip, limit, **filters)
+        )
 
-        return transaction_list, total_count
+        return list(result.all()), total_count
 
     except Exception as e:
         logger.error(f"Error fetching user transactions: {e}")
@@ -831,155 +937,86 @@ async def get_user_statement_data(
         raise
 
 
-async def prepare_statement_data(
+async def generate_user_statement(
     user_id: uuid.UUID,
     start_date: datetime,
     end_date: datetime,
     session: AsyncSession,
     account_number: str | None = None,
+    renderer: str | None = None,
 ) -> dict:
     try:
-        user_query = select(User).where(User.id == user_id)
-        result = await session.exec(user_query)
-        user = result.first()
-
-        if not user:
-            raise ValueError(f"User {user_id} not found")
-
-        if account_number:
-            account_query = select(BankAccount).where(
-                BankAccount.account_number == account_number,
-                BankAccount.user_id == user_id,
-            )
-            account_result = await session.exec(account_query)
-            account = account_result.first()
-
-            if not account:
-                raise ValueError(f"Account not found or does not belong to the user")
-
-            accounts = [account]
-        else:
-            accounts_query = select(BankAccount).where(BankAccount.user_id == user_id)
-            accounts_result = await session.exec(accounts_query)
-            accounts = accounts_result.all()
-
-        account_details = []
-
-        for acc in accounts:
-            if acc.account_number:
-                account_details.append(
-                    {
-                        "account_number": acc.account_number,
-                        "account_name": acc.account_name,
-                        "account_type": acc.account_type,
-                        "currency": acc.currency.value,
-                        "balance": acc.account_balance,
-                    }
-                )
-
-        account_ids = [acc.id for acc in accounts]
+        renderer = renderer or settings.STATEMENT_DEFAULT_RENDERER
 
-        transactions_query = (
-            select(Transaction)
-            .where(
-                or_(
-                    Transaction.sender_account_id == any_(account_ids),
-                    Transaction.receiver_account_id == any_(account_ids),
-                ),
-                Transaction.created_at >= start_date,
-                Transaction.created_at <= end_date,
-                Transaction.transaction_status == TransactionStatusEnum.Completed,
-            )
-            .order_by(desc(Transaction.created_at))
+        # Only the owner and a watermark of the rows are read here, the worker
+        # streams the transactions
+        user_data, account_ids = await get_statement_owner(
+            user_id, session, account_number
         )
-
-        result = await session.exec(transactions_query)
-        transactions = result.all()
-
-        user_data = {
-            "username": user.username,
-            "email": user.email,
-            "first_name": user.first_name,
-            "last_name": user.last_name,
-            "full_name": f"{user.first_name} {user.middle_name + ' ' if user.middle_name else ''} {user.last_name}".title().strip(),
-            "accounts": account_details,
-        }
-
-        transaction_data = []
-        for trn in transactions:
-            sender_account = (
-                await session.get(BankAccount, trn.sender_account_id)
-                if trn.sender_account_id
-                else None
-            )
-            receiver_account = (
-                await session.get(BankAccount, trn.receiver_account_id)
-                if trn.receiver_account_id
-                else None
-            )
-
-            transaction_data.append(
-                {
-                    "reference": trn.reference,
-                    "amount": trn.amount,
-                    "description": trn.description,
-                    "created_at": trn.created_at.strftime("%Y-%m-%d"),
-                    "transaction_type": trn.transaction_type.value,
-                    "transaction_category": trn.transaction_category.value,
-                    "balance_after": str(trn.balance_after),
-                    "sender_account": (
-                        sender_account.account_number if sender_account else None
-                    ),
-                    "receiver_account": (
-                        receiver_account.account_number if receiver_account else None
-                    ),
-                    "metadata": trn.transaction_metadata,
-                }
-            )
-        return {
-            "user": user_data,
-            "transactions": transaction_data,
-            "start_date": start_date.strftime("%Y-%m-%d"),
-            "end_date": end_date.strftime("%Y-%m-%d"),
-            "is_single_account": bool(account_number),
-        }
-
-    except ValueError as ve:
-        logger.error(f"Error preparing statement data: {ve}")
-        raise
-    except Exception as e:
-        logger.error(f"Error preparing statement data: {e}")
-        raise
-
-
-async def generate_user_statement(
-    user_id: uuid.UUID,
-    start_date: datetime,
-    end_date: datetime,
-    session: AsyncSession,
-    account_number: str | None = None,
-) -> dict:
-    try:
-        statement_data = await prepare_statement_data(
-            user_id=user_id,
-            start_date=start_date,
-            end_date=end_date,
-            session=session,
-            account_number=account_number,
+        watermark = await statement_watermark(
+            account_ids, start_date, end_date, session
+        )
+        fingerprint = statement_fingerprint(
+            user_id,
+            account_number,
+            start_date,
+            end_date,
+            user_data,
+            watermark,
+            renderer,
         )
 
-        statement_id = str(uuid.uuid4())
+        cache = StatementCache(celery_app.backend.client)
+
+        cached = cache.lookup(fingerprint)
+        if cached:
+            cache.record("hits")
+            return {
+                "status": "ready",
+                "message": "Statement already generated",
+                "statement_id": cached["statement_id"],
+                "task_id": cached.get("task_id"),
+                "generated_at": cached.get("generated_at"),
+                "expires_at": cached.get("expires_at"),
+            }
+
+        entry = {"statement_id": str(uuid.uuid4()), "task_id": str(uuid.uuid4())}
+
+        running = cache.claim(fingerprint, entry)
+        if running:
+            cache.record("joined")
+            return {
+                "status": "pending",
+                "message": "Statement generation already in progress",
+                "statement_id": running["statement_id"],
+                "task_id": running.get("task_id"),
+            }
+
+        cache.record("misses")
 
-        task = generate_statement_pdf.delay(
-            statement_data=statement_data,
-            statement_id=statement_id,
-        )
+        try:
+            queue_statement(
+                user_id=user_id,
+                start_date=start_date,
+                end_date=end_date,
+                statement_id=entry["statement_id"],
+                task_id=entry["task_id"],
+                account_numbers=[
+                    account["account_number"] for account in user_data["accounts"]
+                ],
+                account_number=account_number,
+                fingerprint=fingerprint,
+                renderer=renderer,
+            )
+        except Exception:
+            cache.release(fingerprint)
+            raise
 
         return {
             "status": "pending",
             "message": "Statement generation initiated",
-            "statement_id": statement_id,
-            "task_id": task.id,
+            "statement_id": entry["statement_id"],
+            "task_id": entry["task_id"],
         }
 
     except ValueError as ve:
@@ -1004,11 +1041,8 @@ async def review_flagged_transaction(
     session: AsyncSession,
 ) -> dict:
     try:
-        query = (
-            select(Transaction, TransactionRiskScore)
-            .join(TransactionRiskScore)
-            .where(Transaction.id == transaction_id)
-        )
+        query, _ = with_risk_score()
+        query = query.where(Transaction.id == transaction_id)
 
         result = await session.exec(query)
         transaction_data = result.first()
@@ -1040,6 +1074,9 @@ async def review_flagged_transaction(
             transaction.transaction_status = TransactionStatusEnum.Failed
         else:
             transaction.ai_review_status = AIReviewStatusEnum.CLEARED
+            # Explicit negatives for training the fraud model
+            risk_score.is_confirmed_fraud = False
+            risk_score.reviewed_by = reviewer_id
 
         if approve_transaction:
             if transaction.transaction_type == TransactionTypeEnum.Transfer:
@@ -1115,31 +1152,33 @@ async def _complete_approved_transfer(transaction: Transaction, session: AsyncSe
         except (TypeError, ValueError) as e:
             raise ValueError(f"Invalid converted amount format: {converted_amount_str}")
 
-        current_sender_balance = Decimal(str(sender_account.account_balance))
+        current_sender_balance = await load_total_balance(session, sender_account)
 
         if current_sender_balance < transaction.amount:
             raise ValueError("Insufficient balance for transfer")
 
-        try:
-            sender_account.account_balance = float(
-                current_sender_balance - transaction.amount
-            )
-            receiver_account.account_balance = float(
-                Decimal(str(receiver_account.account_balance)) + converted_amount
-            )
+        balances = await adjust_balances(
+            session,
+            [
+                (sender_account, -transaction.amount),
+                (receiver_account, converted_amount),
+            ],
+        )
+
+        if balances is None:
+            raise ValueError("Insufficient balance for transfer")
 
+        try:
+            transaction.balance_before = balances[0] + transaction.amount
+            transaction.balance_after = balances[0]
             transaction.transaction_status = TransactionStatusEnum.Completed
             transaction.completed_at = datetime.now(timezone.utc)
 
-            session.add(sender_account)
-            session.add(receiver_account)
             session.add(transaction)
 
             await session.commit()
 
             await session.refresh(transaction)
-            await session.refresh(sender_account)
-            await session.refresh(receiver_account)
 
             try:
                 await send_transfer_alert(
@@ -1205,24 +1244,25 @@ async def _complete_approved_withdrawal(
         if not account:
             raise ValueError("Account not found")
 
-        if Decimal(str(account.account_balance)) < transaction.amount:
+        if await load_total_balance(session, account) < transaction.amount:
             raise ValueError("Insufficient balance for withdrawal")
 
-        try:
-            account.account_balance = float(
-                Decimal(account.account_balance) - transaction.amount
-            )
+        balance_after = await adjust_balance(session, account, -transaction.amount)
+
+        if balance_after is None:
+            raise ValueError("Insufficient balance for withdrawal")
 
+        try:
+            transaction.balance_before = balance_after + transaction.amount
+            transaction.balance_after = balance_after
             transaction.transaction_status = TransactionStatusEnum.Completed
             transaction.completed_at = datetime.now(timezone.utc)
 
-            session.add(account)
             session.add(transaction)
 
             await session.commit()
 
             await session.refresh(transaction)
-            await session.refresh(account)
 
             try:
                 await send_withdrawal_alert(
@@ -1264,6 +1304,25 @@ async def _complete_approved_withdrawal(
         raise
 
 
+def risk_history_query(
+    user_id: uuid.UUID,
+    start_date: datetime | None = None,
+    end_date: datetime | None = None,
+    min_risk_score: float | None = None,
+):
+    query, risk_score = with_risk_score()
+    query = query.where(Transaction.sender_id == user_id)
+
+    if start_date:
+        query = query.where(Transaction.created_at >= start_date)
+    if end_date:
+        query = query.where(Transaction.created_at <= end_date)
+    if min_risk_score:
+        query = query.where(risk_score.risk_score >= min_risk_score)
+
+    return query.order_by(desc(Transaction.created_at), desc(risk_score.risk_score))
+
+
 async def get_user_risk_history(
     user_id: uuid.UUID,
     session: AsyncSession,
@@ -1274,24 +1333,7 @@ async def get_user_risk_history(
     limit: int = 20,
 ) -> tuple[list[dict], int]:
     try:
-        base_query = (
-            select(Transaction, TransactionRiskScore)
-            .join(TransactionRiskScore)
-            .where(Transaction.sender_id == user_id)
-        )
-
-        if start_date:
-            base_query = base_query.where(Transaction.created_at >= start_date)
-        if end_date:
-            base_query = base_query.where(Transaction.created_at <= end_date)
-        if min_risk_score:
-            base_query = base_query.where(
-                TransactionRiskScore.risk_score >= min_risk_score
-            )
-
-        base_query = base_query.order_by(
-            desc(Transaction.created_at), desc(TransactionRiskScore.risk_score)
-        )
+        base_query = risk_history_query(user_id, start_date, end_date, min_risk_score)
 
         count_query = select(func.count()).select_from(base_query.subquery())
         total_result = await session.exec(count_query)
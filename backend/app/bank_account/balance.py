@@ -0,0 +1,290 @@
+import random
+import uuid
+from decimal import Decimal
+
+from sqlalchemy import (
+    Float,
+    Numeric,
+    Uuid,
+    any_,
+    cast,
+    column,
+    delete,
+    func,
+    insert,
+    select,
+    update,
+    values,
+)
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.app.bank_account.models import BankAccount, BankAccountBalanceShard
+
+
+def balance_update(account_id, delta: Decimal):
+    # The balance column is a float, the sum is done in numeric so it rounds
+    # the way Decimal(str(balance)) + delta did in Python
+    new_balance = cast(BankAccount.account_balance, Numeric) + delta
+
+    return (
+        update(BankAccount)
+        .where(BankAccount.id == account_id, new_balance >= 0)
+        .values(account_balance=cast(new_balance, Float))
+        .returning(BankAccount.account_balance)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def shard_credit(account_id, shard: int, delta: Decimal):
+    new_balance = cast(BankAccountBalanceShard.balance, Numeric) + delta
+
+    return (
+        update(BankAccountBalanceShard)
+        .where(
+            BankAccountBalanceShard.account_id == account_id,
+            BankAccountBalanceShard.shard == shard,
+        )
+        .values(balance=cast(new_balance, Float))
+        .returning(BankAccountBalanceShard.balance)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def shard_fold(account_id, drop: bool = False):
+    # Moves every shard into account_balance in one statement. The shard rows
+    # are locked first, a credit running against one of them is either folded
+    # or lands after the fold, never lost. UPDATE ... RETURNING gives the new
+    # zeros, so the balances are read from the locked rows beforehand. DELETE
+    # ... RETURNING already gives the rows as they were.
+    shards = BankAccountBalanceShard.__table__
+
+    if drop:
+        emptied = delete(shards).where(shards.c.account_id == account_id)
+        folded = emptied.returning(shards.c.balance).cte("folded")
+    else:
+        old = (
+            select(shards.c.id, shards.c.balance)
+            .where(shards.c.account_id == account_id, shards.c.balance != 0)
+            .with_for_update()
+            .subquery("old")
+        )
+        emptied = (
+            update(shards)
+            .where(shards.c.id == old.c.id)
+            .values(balance=0)
+            .returning(old.c.balance)
+        )
+        folded = emptied.cte("folded")
+
+    pending = select(
+        func.coalesce(func.sum(cast(folded.c.balance, Numeric)), 0)
+    ).scalar_subquery()
+
+    return (
+        update(BankAccount)
+        .where(BankAccount.id == account_id)
+        .values(
+            account_balance=cast(
+                cast(BankAccount.account_balance, Numeric) + pending, Float
+            )
+        )
+        .returning(BankAccount.account_balance)
+        .add_cte(folded)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def total_balance(account_id):
+    pending = (
+        select(
+            func.coalesce(func.sum(cast(BankAccountBalanceShard.balance, Numeric)), 0)
+        )
+        .where(BankAccountBalanceShard.account_id == account_id)
+        .scalar_subquery()
+    )
+
+    return select(cast(BankAccount.account_balance, Numeric) + pending).where(
+        BankAccount.id == account_id
+    )
+
+
+async def load_total_balance(session: AsyncSession, account: BankAccount) -> Decimal:
+    # A sharded account shows its whole balance from here on. It is set
+    # without marking the account dirty, so it never reaches account_balance.
+    if not account.balance_shards:
+        return Decimal(str(account.account_balance))
+
+    result = await session.exec(total_balance(account.id))
+    balance = Decimal(result.scalar_one())
+
+    set_committed_value(account, "account_balance", float(balance))
+    return balance
+
+
+async def adjust_balance(
+    session: AsyncSession, account: BankAccount, delta: Decimal
+) -> Decimal | None:
+    # One UPDATE that applies delta and refuses to take the balance below
+    # zero, so concurrent payments can neither lose an update nor overdraw.
+    # Returns the new balance, or None when the account could not cover it.
+    if account.balance_shards and delta > 0:
+        result = await session.exec(
+            shard_credit(account.id, random.randrange(account.balance_shards), delta)
+        )
+        # No row when sharding was switched off after the account was loaded
+        if result.scalar_one_or_none() is not None:
+            return await load_total_balance(session, account)
+
+    result = await session.exec(balance_update(account.id, delta))
+    new_balance = result.scalar_one_or_none()
+
+    if new_balance is None and account.balance_shards:
+        # Debits are paid from account_balance, the shards are only folded
+        # in when it cannot cover one on its own
+        await session.exec(shard_fold(account.id))
+        result = await session.exec(balance_update(account.id, delta))
+        new_balance = result.scalar_one_or_none()
+
+    if new_balance is None:
+        return None
+
+    if account.balance_shards:
+        return await load_total_balance(session, account)
+
+    # Loaded without marking the account dirty, a flush must never write
+    # this value back over a newer one
+    set_committed_value(account, "account_balance", new_balance)
+    return Decimal(str(new_balance))
+
+
+async def adjust_balances(
+    session: AsyncSession, changes: list[tuple[BankAccount, Decimal]]
+) -> list[Decimal] | None:
+    # All or nothing, under a savepoint so a refused change undoes the ones
+    # before it without ending the caller's transaction. Rows are locked in
+    # id order, two transfers between the same accounts in opposite
+    # directions cannot deadlock.
+    previous = {account.id: account.account_balance for account, _ in changes}
+    new_balances = {}
+
+    savepoint = await session.begin_nested()
+    for account, delta in sorted(changes, key=lambda change: change[0].id):
+        new_balance = await adjust_balance(session, account, delta)
+
+        if new_balance is None:
+            await savepoint.rollback()
+            for changed, _ in changes:
+                set_committed_value(
+                    changed, "account_balance", previous[changed.id]
+                )
+            return None
+
+        new_balances[account.id] = new_balance
+
+    await savepoint.commit()
+    return [new_balances[account.id] for account, _ in changes]
+
+
+async def lock_accounts(
+    session: AsyncSession, account_ids
+) -> dict[uuid.UUID, BankAccount]:
+    # Loads and locks every account in id order, ahead of a change that
+    # touches many of them in one statement
+    result = await session.exec(
+        select(BankAccount)
+        .where(BankAccount.id == any_(list(account_ids)))
+        .order_by(BankAccount.id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return {account.id: account for account in result.scalars().all()}
+
+
+async def apply_balance_changes(
+    session: AsyncSession, changes: list[tuple[BankAccount, Decimal]]
+) -> dict[uuid.UUID, Decimal] | None:
+    # Many balance changes as one guarded UPDATE ... FROM (VALUES ...), all or
+    # nothing like adjust_balances. The accounts should be locked with
+    # lock_accounts first. Credits to sharded accounts still go to a shard.
+    deltas: dict[uuid.UUID, Decimal] = {}
+    accounts: dict[uuid.UUID, BankAccount] = {}
+    for account, delta in changes:
+        deltas[account.id] = deltas.get(account.id, Decimal("0")) + delta
+        accounts[account.id] = account
+
+    previous = {
+        account_id: account.account_balance for account_id, account in accounts.items()
+    }
+    new_balances: dict[uuid.UUID, Decimal] = {}
+
+    savepoint = await session.begin_nested()
+
+    for account_id, delta in list(deltas.items()):
+        account = accounts[account_id]
+        if not account.balance_shards:
+            continue
+
+        if delta > 0:
+            new_balances[account_id] = await adjust_balance(session, account, delta)
+            del deltas[account_id]
+        else:
+            await session.exec(shard_fold(account_id))
+
+    if deltas:
+        changed = values(
+            column("id", Uuid), column("delta", Numeric), name="changes"
+        ).data(list(deltas.items()))
+        new_balance = cast(BankAccount.account_balance, Numeric) + changed.c.delta
+
+        result = await session.exec(
+            update(BankAccount)
+            .where(BankAccount.id == changed.c.id, new_balance >= 0)
+            .values(account_balance=cast(new_balance, Float))
+            .returning(BankAccount.id, BankAccount.account_balance)
+            .execution_options(synchronize_session=False)
+        )
+        updated = dict(result.all())
+
+        if len(updated) < len(deltas):
+            await savepoint.rollback()
+            for account_id, balance in previous.items():
+                set_committed_value(accounts[account_id], "account_balance", balance)
+            return None
+
+        for account_id, balance in updated.items():
+            if accounts[account_id].balance_shards:
+                new_balances[account_id] = await load_total_balance(
+                    session, accounts[account_id]
+                )
+            else:
+                set_committed_value(accounts[account_id], "account_balance", balance)
+                new_balances[account_id] = Decimal(str(balance))
+
+    await savepoint.commit()
+    return new_balances
+
+
+async def set_balance_shards(
+    session: AsyncSession, account: BankAccount, shards: int
+) -> Decimal:
+    # Existing shards are folded in and dropped first, zero switches
+    # sharding off
+    result = await session.exec(shard_fold(account.id, drop=True))
+    balance = result.scalar_one()
+
+    if shards:
+        await session.exec(
+            insert(BankAccountBalanceShard),
+            params=[
+                {"account_id": account.id, "shard": shard, "balance": 0.0}
+                for shard in range(shards)
+            ],
+        )
+
+    set_committed_value(account, "account_balance", balance)
+    account.balance_shards = shards
+    session.add(account)
+    await session.flush()
+
+    return Decimal(str(balance))
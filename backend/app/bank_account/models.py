@@ -1,10 +1,10 @@
 import uuid
 from typing import TYPE_CHECKING
 from datetime import datetime, timezone
-from sqlmodel import Field, Column, Relationship
+from sqlmodel import Field, Column, Relationship, SQLModel
 
 from sqlalchemy.dialects import postgresql as pg
-from sqlalchemy import text, func
+from sqlalchemy import text, func, UniqueConstraint
 from backend.app.bank_account.schema import BankAccountBaseSchema
 
 
@@ -49,6 +49,10 @@ class BankAccount(BankAccountBaseSchema, table=True):
 
     user_id: uuid.UUID = Field(foreign_key="user.id", ondelete="CASCADE")
 
+    # Above zero, credits land on that many BankAccountBalanceShard rows and
+    # the balance is account_balance plus their sum
+    balance_shards: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+
     user: "User" = Relationship(back_populates="bank_accounts")
 
     sent_transactions: list["Transaction"] = Relationship(
@@ -65,3 +69,20 @@ class BankAccount(BankAccountBaseSchema, table=True):
         back_populates="bank_account",
         sa_relationship_kwargs={"cascade": "all, delete-orphan"},
     )
+
+
+class BankAccountBalanceShard(SQLModel, table=True):
+    # Credits waiting to be folded into the account balance, spread over
+    # several rows so receivers of many transfers do not queue on one lock
+    __table_args__ = (UniqueConstraint("account_id", "shard"),)
+
+    id: uuid.UUID = Field(
+        sa_column=Column(
+            pg.UUID(as_uuid=True),
+            primary_key=True,
+        ),
+        default_factory=uuid.uuid4,
+    )
+    account_id: uuid.UUID = Field(foreign_key="bankaccount.id", ondelete="CASCADE")
+    shard: int
+    balance: float = Field(default=0.0)
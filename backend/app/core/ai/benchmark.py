@@ -0,0 +1,346 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Callable
+
+import numpy as np
+
+from backend.app.core.ai.config import ai_settings
+from backend.app.core.ai.kernel import HistoryArrays, to_epoch_us
+from backend.app.core.ai.transaction_analyzer import TransactionAnalyzer
+from backend.app.core.model_registry import load_models
+from backend.app.transaction.enums import (
+    TransactionCategoryEnum,
+    TransactionStatusEnum,
+    TransactionTypeEnum,
+)
+from backend.app.transaction.models import Transaction
+
+HISTORY_SIZES = [10, 1_000, 10_000, 100_000]
+
+BASELINE_PATH = os.path.join("benchmarks", "analyzer.json")
+
+# Share of transactions per hour of the day, busy in the afternoon and quiet at night
+_HOURLY_WEIGHTS = np.array(
+    [1, 1, 1, 1, 1, 2, 3, 5, 7, 8, 8, 9, 10, 9, 9, 9, 8, 8, 7, 6, 5, 4, 3, 2],
+    dtype=np.float64,
+)
+_ROUND_AMOUNTS = np.array([50, 100, 200, 500, 1000, 5000], dtype=np.float64)
+
+
+def synthetic_history(
+    size: int,
+    seed: int = 42,
+    now: datetime | None = None,
+    window_days: int = ai_settings.ANALYSIS_WINDOW_DAYS,
+) -> tuple[Transaction, list[Transaction]]:
+    # Seeded history of one user spread over the analysis window. Amounts are
+    # log-normal with a share of round and recurring amounts, timestamps
+    # follow a daily activity curve. The returned transaction is the newest
+    # one and is part of the history, like in the live transfer flow.
+    rng = np.random.default_rng(seed)
+    now = now or datetime(2025, 6, 2, 14, 30, tzinfo=timezone.utc)
+
+    amounts = np.round(rng.lognormal(mean=5.0, sigma=1.2, size=size), 2)
+
+    round_mask = rng.random(size) < 0.15
+    amounts[round_mask] = rng.choice(_ROUND_AMOUNTS, size=int(round_mask.sum()))
+
+    recurring = np.round(rng.lognormal(mean=6.0, sigma=0.5, size=3), 2)
+    recurring_mask = rng.random(size) < 0.05
+    amounts[recurring_mask] = rng.choice(recurring, size=int(recurring_mask.sum()))
+
+    days = rng.integers(0, window_days, size=size)
+    hours = rng.choice(24, size=size, p=_HOURLY_WEIGHTS / _HOURLY_WEIGHTS.sum())
+    seconds = rng.integers(0, 3600, size=size)
+    offsets = np.sort(days * 86_400 + hours * 3600 + seconds)[::-1]
+
+    # Keep the newest transaction at "now" so the 24h window is never empty
+    offsets[-1] = 0
+    start = now - timedelta(days=window_days)
+
+    history = [
+        Transaction(
+            id=uuid.uuid4(),
+            amount=Decimal(f"{amount:.2f}"),
+            description="Synthetic transaction",
+            reference=f"BENCH{seed}{index:08d}",
+            transaction_type=TransactionTypeEnum.Transfer,
+            transaction_category=TransactionCategoryEnum.Debit,
+            transaction_status=TransactionStatusEnum.Completed,
+            balance_before=Decimal("0"),
+            balance_after=Decimal("0"),
+            created_at=start + timedelta(seconds=int(window_days * 86_400 - offset)),
+        )
+        for index, (amount, offset) in enumerate(zip(amounts, offsets))
+    ]
+
+    return history[-1], history
+
+
+class InMemoryAnalyzer(TransactionAnalyzer):
+    # Serves a fixed history instead of querying the database. Runs with the
+    # feature store and the cascade turned off, see run_benchmarks.
+    def __init__(self, history: list[Transaction]):
+        super().__init__()
+        self.history = history
+
+    async def get_user_recent_activity(self, transaction, user_id, session, days=90):
+        view = HistoryArrays.from_transactions(self.history)
+        return view.recent_activity(to_epoch_us(transaction.created_at))
+
+    async def load_history_from_db(
+        self, transaction, user_id, session, days=90, pending=False
+    ):
+        return HistoryArrays.from_transactions(self.history)
+
+
+def _iterations(size: int) -> int:
+    return max(20, min(2000, 200_000 // size))
+
+
+def measure(func: Callable[[], object], iterations: int) -> dict:
+    func()
+
+    timings = np.empty(iterations, dtype=np.int64)
+    for index in range(iterations):
+        started = time.perf_counter_ns()
+        func()
+        timings[index] = time.perf_counter_ns() - started
+
+    # Allocations are traced in a separate pass, tracing distorts the timings
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    func()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings_us = timings / 1000
+
+    return {
+        "iterations": iterations,
+        "mean_us": round(float(timings_us.mean()), 2),
+        "p50_us": round(float(np.percentile(timings_us, 50)), 2),
+        "p90_us": round(float(np.percentile(timings_us, 90)), 2),
+        "p99_us": round(float(np.percentile(timings_us, 99)), 2),
+        "peak_alloc_kib": round((peak - before) / 1024, 2),
+        "retained_alloc_kib": round((after - before) / 1024, 2),
+    }
+
+
+def run_benchmarks(sizes: list[int], seed: int) -> dict:
+    results = {}
+    loop = asyncio.new_event_loop()
+
+    # Every case times the analysis itself, never Redis or the screening exit
+    ai_settings.FEATURE_STORE_ENABLED = False
+    ai_settings.CASCADE_ENABLED = False
+
+    for size in sizes:
+        transaction, history = synthetic_history(size, seed)
+        view = HistoryArrays.from_transactions(history)
+        analyzer = InMemoryAnalyzer(history)
+        velocity_metrics = analyzer._check_velocity(transaction, view)
+        iterations = _iterations(size)
+
+        _, risk_factors = loop.run_until_complete(
+            analyzer.analyze_transaction(transaction, None, None)
+        )
+        if "error" in risk_factors:
+            raise RuntimeError(
+                f"analyze_transaction failed on {size} transactions: "
+                f"{risk_factors['error']}"
+            )
+
+        cases = {
+            "history_arrays": lambda: HistoryArrays.from_transactions(history),
+            "extract_features": lambda: analyzer.extract_features(
+                transaction, view, velocity_metrics
+            ),
+            "_check_velocity": lambda: analyzer._check_velocity(transaction, view),
+            "_detect_patterns": lambda: analyzer._detect_patterns(
+                transaction, view, velocity_metrics
+            ),
+            "score_transaction": lambda: analyzer.score_transaction(transaction, view),
+            # Includes turning the loaded Transaction rows into arrays
+            "analyze_transaction": lambda: loop.run_until_complete(
+                analyzer.analyze_transaction(transaction, None, None)
+            ),
+        }
+
+        results[str(size)] = {
+            name: measure(case, iterations) for name, case in cases.items()
+        }
+
+        print(f"{size} transactions", file=sys.stderr)
+        for name, stats in results[str(size)].items():
+            print(
+                f"  {name:<22} p50 {stats['p50_us']:>10.1f}us  "
+                f"p99 {stats['p99_us']:>10.1f}us  "
+                f"peak {stats['peak_alloc_kib']:>10.1f}KiB",
+                file=sys.stderr,
+            )
+
+    loop.close()
+    return results
+
+
+def verify_cascade(samples: int, seed: int) -> dict:
+    # The screening stage must never clear a transaction the full analysis
+    # would flag, and its stored score must never be below the full score
+    rng = np.random.default_rng(seed)
+    analyzer = TransactionAnalyzer()
+    threshold = ai_settings.RISK_SCORE_TRESHOLD
+
+    exits = 0
+    flagged = 0
+    violations = []
+
+    for sample in range(samples):
+        size = int(rng.choice([1, 2, 5, 20, 100, 400]))
+        now = datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(
+            minutes=int(rng.integers(0, 365 * 24 * 60))
+        )
+        transaction, history = synthetic_history(size, seed + sample, now)
+
+        # Bursts of recent activity and a wide spread of current amounts
+        for burst in history[-int(rng.integers(1, 8)) :]:
+            burst.created_at = now - timedelta(minutes=int(rng.integers(0, 1440)))
+        transaction.created_at = now
+        transaction.amount = Decimal(f"{rng.lognormal(5.0, 2.0):.2f}")
+
+        view = HistoryArrays.from_transactions(history)
+        recent_count, recent_volume = view.recent_activity(
+            to_epoch_us(transaction.created_at)
+        )
+
+        full_score, _ = analyzer.score_batch([(transaction, view)])[0]
+        screened = analyzer.screen_transaction(
+            transaction, recent_count, recent_volume
+        )
+
+        flagged += full_score >= threshold
+
+        if screened is None:
+            continue
+
+        exits += 1
+        if full_score >= threshold or screened[0] < full_score:
+            violations.append(
+                {"sample": sample, "full": full_score, "screened": screened[0]}
+            )
+
+    return {
+        "samples": samples,
+        "flagged": flagged,
+        "early_exits": exits,
+        "early_exit_fraction": round(exits / samples, 4) if samples else 0.0,
+        "violations": violations,
+    }
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list[str]:
+    regressions = []
+
+    for size, cases in current["results"].items():
+        for name, stats in cases.items():
+            previous = baseline.get("results", {}).get(size, {}).get(name)
+            if not previous:
+                continue
+
+            ratio = stats["p50_us"] / previous["p50_us"] if previous["p50_us"] else 1.0
+            if ratio > 1 + tolerance:
+                regressions.append(
+                    f"{name} @ {size}: p50 {previous['p50_us']}us -> "
+                    f"{stats['p50_us']}us ({ratio:.2f}x)"
+                )
+
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the fraud analyzer on synthetic histories"
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=HISTORY_SIZES)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=BASELINE_PATH)
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="Compare with the stored baseline instead of overwriting it",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed p50 slowdown before --compare fails",
+    )
+    parser.add_argument(
+        "--verify-cascade",
+        type=int,
+        default=0,
+        metavar="SAMPLES",
+        help="Check the screening stage against the full analysis and exit",
+    )
+    args = parser.parse_args()
+
+    load_models()
+
+    if args.verify_cascade:
+        report = verify_cascade(args.verify_cascade, args.seed)
+        print(json.dumps(report))
+        sys.exit(1 if report["violations"] else 0)
+
+    current = {
+        "meta": {
+            "revision": _git_revision(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "seed": args.seed,
+        },
+        "results": run_benchmarks(args.sizes, args.seed),
+    }
+
+    if args.compare:
+        with open(args.output) as baseline_file:
+            baseline = json.load(baseline_file)
+
+        regressions = compare(baseline, current, args.tolerance)
+        print(json.dumps({"baseline": baseline["meta"], "regressions": regressions}))
+        sys.exit(1 if regressions else 0)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as output:
+        json.dump(current, output, indent=2)
+        output.write("\n")
+
+    print(json.dumps({"output": args.output}))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -8,6 +10,53 @@ class AISettings(BaseSettings):
     MODEL_VERSION: str = "1.0.0"
     ANALYSIS_WINDOW_DAYS: int = 90
 
+    # "weighted_sum" combines the risk factors with RISK_WEIGHTS,
+    # "logistic_regression" loads the trained fraud_model_{MODEL_VERSION}.npz
+    MODEL_TYPE: Literal["weighted_sum", "logistic_regression"] = "weighted_sum"
+    # Defaults to the artifacts directory next to the analyzer
+    MODEL_ARTIFACT_DIR: str | None = None
+
+    # "aggregate" asks Postgres for the history aggregates in a single query,
+    # "columns" loads only (amount, created_at) pairs and aggregates in NumPy
+    FEATURE_QUERY_MODE: Literal["aggregate", "columns"] = "aggregate"
+
+    # Incremental per-user profiles in Redis, rebuilt from the database when
+    # missing or older than the max age (which also expires rows that have
+    # left the analysis window)
+    FEATURE_STORE_ENABLED: bool = True
+    FEATURE_STORE_MAX_AGE_SECONDS: int = 3600
+    # Width of one bucket in the 24 hour velocity ring
+    FEATURE_STORE_BUCKET_SECONDS: int = 900
+    # Screened transactions never load the full history, their senders'
+    # profiles are rebuilt by a worker once the scoring request has committed,
+    # at most once per window
+    FEATURE_STORE_WARM_DELAY_SECONDS: int = 5
+    FEATURE_STORE_WARM_WINDOW_SECONDS: int = 60
+
+    # Before loading a full history on a profile miss, try to prove from the
+    # amount, time and last 24 hours alone that the score stays below the
+    # threshold
+    CASCADE_ENABLED: bool = True
+
+    # Live scoring requests arriving within the window are scored as one
+    # batch with a single history query, a full batch is flushed at once
+    SCORING_BATCH_ENABLED: bool = True
+    SCORING_BATCH_WINDOW_MS: float = 5.0
+    SCORING_BATCH_MAX_SIZE: int = 64
+
+    # Candidate models scored in the background on live traffic, logistic
+    # regression artifact versions and/or alternative RISK_WEIGHTS by name
+    SHADOW_MODEL_VERSIONS: list[str] = []
+    SHADOW_RISK_WEIGHTS: dict[str, dict[str, float]] = {}
+    # Pending shadow scores beyond this are dropped rather than slowing requests
+    SHADOW_QUEUE_SIZE: int = 10000
+    SHADOW_BATCH_SIZE: int = 200
+
+    # Batch re-scoring of historical transactions
+    RESCORE_CHUNK_SIZE: int = 5000
+    RESCORE_PARTITIONS: int = 8
+    RESCORE_CHECKPOINT_TTL_SECONDS: int = 7 * 24 * 3600
+
     # Sum must add to 1.0 (100%)
     RISK_WEIGHTS: dict[str, float] = {
         "amount": 0.3,
@@ -0,0 +1,362 @@
+import asyncio
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import DateTime, Integer, Numeric, Uuid, and_, column, values
+from sqlmodel import any_, func, select
+
+from backend.app.core.ai.config import ai_settings
+from backend.app.core.ai.feature_store import feature_store
+from backend.app.core.ai.kernel import (
+    HistoryArrays,
+    HistorySummary,
+    HistoryView,
+    to_epoch_us,
+)
+from backend.app.core.ai.transaction_analyzer import TransactionAnalyzer
+from backend.app.core.db import async_session
+from backend.app.core.logging import get_logger
+from backend.app.transaction.models import Transaction
+
+logger = get_logger()
+
+
+class _ScoringRequest:
+    __slots__ = ("transaction", "user_id", "future", "enqueued_at", "pending")
+
+    def __init__(
+        self,
+        transaction: Transaction,
+        user_id: UUID,
+        future: asyncio.Future,
+        pending: bool = False,
+    ):
+        self.transaction = transaction
+        self.user_id = user_id
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+        # Not committed yet, the dispatcher's own sessions cannot see it
+        self.pending = pending
+
+
+class ScoringDispatcher:
+    # Coalesces scoring requests that arrive within a short window. The first
+    # request of a batch arms a timer, the batch is flushed when it fires or
+    # when the batch is full. A flush reads every profile from the feature
+    # store in one pipeline, loads the histories of all misses with a single
+    # query and resolves each caller's future. Misses take the same path as
+    # in the analyzer: screening where the cascade applies, then the history
+    # columns to rebuild profiles from, or the aggregate feature query when
+    # the feature store is off and FEATURE_QUERY_MODE is "aggregate".
+    def __init__(self):
+        self.analyzer = TransactionAnalyzer()
+        self._pending: list[_ScoringRequest] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        # The loop only keeps weak references to tasks, a running flush
+        # could otherwise be collected with its callers still waiting
+        self._tasks: set[asyncio.Task] = set()
+
+        self.batches = 0
+        self.requests = 0
+        self.batch_sizes: Counter[int] = Counter()
+        self.queue_delays_ms: deque[float] = deque(maxlen=10_000)
+
+    async def score(
+        self, transaction: Transaction, user_id: UUID, pending: bool = False
+    ) -> tuple[float, dict, dict[str, float] | None]:
+        loop = asyncio.get_running_loop()
+
+        if self._loop is not loop:
+            # Timers and futures belong to a loop, never mix them across loops
+            self._loop = loop
+            self._pending = []
+            self._timer = None
+            self._tasks = set()
+
+        request = _ScoringRequest(transaction, user_id, loop.create_future(), pending)
+        self._pending.append(request)
+
+        if len(self._pending) >= ai_settings.SCORING_BATCH_MAX_SIZE:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(
+                ai_settings.SCORING_BATCH_WINDOW_MS / 1000, self._dispatch
+            )
+
+        return await request.future
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = self._loop.create_task(self._flush(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, batch: list[_ScoringRequest]) -> None:
+        started = time.perf_counter()
+
+        self.batches += 1
+        self.requests += len(batch)
+        self.batch_sizes[len(batch)] += 1
+        self.queue_delays_ms.extend(
+            (started - request.enqueued_at) * 1000 for request in batch
+        )
+
+        try:
+            views = await self._load_histories(batch)
+        except Exception as e:
+            logger.error(f"Error loading histories for {len(batch)} transactions: {e}")
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_result((0.8, {"error": str(e)}, None))
+            return
+
+        for request, view in zip(batch, views):
+            if request.future.done():
+                continue
+
+            if isinstance(view, tuple):
+                risk_score, risk_factors = view
+                request.future.set_result((risk_score, risk_factors, None))
+                continue
+
+            try:
+                risk_scores, recent_count, recent_volume = (
+                    self.analyzer.calculate_risk_scores(request.transaction, view)
+                )
+                risk_score, risk_factors = self.analyzer.build_risk_factors(
+                    request.transaction, risk_scores, recent_count, recent_volume
+                )
+                request.future.set_result((risk_score, risk_factors, risk_scores))
+            except Exception as e:
+                logger.error(f"Error analyzing transaction: {str(e)}")
+                request.future.set_result((0.8, {"error": str(e)}, None))
+
+    async def _load_histories(
+        self, batch: list[_ScoringRequest]
+    ) -> list[HistoryView | tuple[float, dict]]:
+        # Profile hits come back as summaries, misses proven low risk by the
+        # screening stage as (score, factors), the rest as full histories
+        views: list = feature_store.get_summaries(
+            [(request.user_id, request.transaction) for request in batch]
+        )
+
+        # A pending transaction is only recorded once its caller commits
+        for index, request in enumerate(batch):
+            if views[index] is not None and request.pending:
+                views[index] = views[index].including(
+                    float(request.transaction.amount),
+                    to_epoch_us(request.transaction.created_at),
+                )
+
+        missing = [index for index, view in enumerate(views) if view is None]
+
+        if missing and self.analyzer.cascade_applies():
+            activity = await self._fetch_recent_activity(
+                [batch[index] for index in missing]
+            )
+
+            unresolved, cold = [], []
+            for index, (recent_count, recent_volume) in zip(missing, activity):
+                screened = self.analyzer.screen_transaction(
+                    batch[index].transaction, recent_count, recent_volume
+                )
+                if screened is None:
+                    unresolved.append(index)
+                else:
+                    views[index] = screened
+                    cold.append(batch[index].user_id)
+
+            # Their profiles stay cold until a worker rebuilds them
+            feature_store.queue_rebuild(cold)
+            missing = unresolved
+
+        if not missing:
+            return views
+
+        requests = [batch[index] for index in missing]
+
+        if (
+            not ai_settings.FEATURE_STORE_ENABLED
+            and ai_settings.FEATURE_QUERY_MODE == "aggregate"
+        ):
+            loaded: list[HistoryView] = await self._fetch_summaries(requests)
+        else:
+            histories = await self._fetch_histories(
+                list({request.user_id for request in requests})
+            )
+
+            for user_id, history in histories.items():
+                feature_store.rebuild(user_id, history)
+
+            loaded = [histories[request.user_id] for request in requests]
+
+        # Profiles only hold committed rows, a pending transaction is added
+        # to its own view and recorded by its caller after the commit
+        for index, request, view in zip(missing, requests, loaded):
+            if request.pending:
+                view = view.including(
+                    float(request.transaction.amount),
+                    to_epoch_us(request.transaction.created_at),
+                )
+            views[index] = view
+
+        return views
+
+    async def _fetch_recent_activity(
+        self, requests: list[_ScoringRequest]
+    ) -> list[tuple[int, float | int]]:
+        # 24h count and volume before each request's transaction, one query
+        cutoff_date = datetime.now(timezone.utc) - timedelta(
+            days=ai_settings.ANALYSIS_WINDOW_DAYS
+        )
+        earliest = min(request.transaction.created_at for request in requests)
+
+        query = select(
+            Transaction.sender_id, Transaction.amount, Transaction.created_at
+        ).where(
+            Transaction.sender_id == any_(list({r.user_id for r in requests})),
+            Transaction.created_at >= cutoff_date,
+            Transaction.created_at >= earliest - timedelta(hours=24),
+        )
+
+        async with async_session() as session:
+            result = await session.exec(query)
+            rows = result.all()
+
+        grouped: dict[UUID, list[tuple]] = {}
+        for sender_id, amount, created_at in rows:
+            grouped.setdefault(sender_id, []).append((amount, created_at))
+
+        activity = []
+        for request in requests:
+            recent_cutoff = request.transaction.created_at - timedelta(hours=24)
+            amounts = [
+                float(amount)
+                for amount, created_at in grouped.get(request.user_id, [])
+                if created_at >= recent_cutoff
+            ]
+            # The dispatcher's session cannot see a transaction its caller
+            # has not committed yet
+            if request.pending:
+                amounts.append(float(request.transaction.amount))
+            activity.append((len(amounts), sum(amounts)))
+
+        return activity
+
+    async def _fetch_histories(self, user_ids: list[UUID]) -> dict[UUID, HistoryArrays]:
+        cutoff_date = datetime.now(timezone.utc) - timedelta(
+            days=ai_settings.ANALYSIS_WINDOW_DAYS
+        )
+        query = select(
+            Transaction.sender_id, Transaction.amount, Transaction.created_at
+        ).where(
+            Transaction.sender_id == any_(user_ids),
+            Transaction.created_at >= cutoff_date,
+        )
+
+        async with async_session() as session:
+            result = await session.exec(query)
+            rows = result.all()
+
+        grouped: dict[UUID, list[tuple]] = {user_id: [] for user_id in user_ids}
+        for sender_id, amount, created_at in rows:
+            grouped[sender_id].append((amount, created_at))
+
+        return {
+            user_id: HistoryArrays.from_rows(user_rows)
+            for user_id, user_rows in grouped.items()
+        }
+
+    async def _fetch_summaries(
+        self, requests: list[_ScoringRequest]
+    ) -> list[HistorySummary]:
+        # The aggregate feature query for every request at once, each request
+        # is one row of a VALUES list joined to its sender's history
+        cutoff_date = datetime.now(timezone.utc) - timedelta(
+            days=ai_settings.ANALYSIS_WINDOW_DAYS
+        )
+        scored = values(
+            column("position", Integer),
+            column("sender_id", Uuid),
+            column("amount", Numeric),
+            column("created_at", DateTime(timezone=True)),
+            name="scored",
+        ).data(
+            [
+                (
+                    position,
+                    request.user_id,
+                    request.transaction.amount,
+                    request.transaction.created_at,
+                )
+                for position, request in enumerate(requests)
+            ]
+        )
+        is_recent = Transaction.created_at >= scored.c.created_at - timedelta(
+            hours=24
+        )
+
+        query = (
+            select(
+                scored.c.position,
+                func.count(Transaction.id),
+                func.avg(Transaction.amount),
+                func.count(Transaction.id).filter(is_recent),
+                func.sum(Transaction.amount).filter(is_recent),
+                func.min(Transaction.created_at),
+                func.max(Transaction.created_at),
+                func.count(Transaction.id).filter(
+                    func.abs(Transaction.amount - scored.c.amount) < 0.01
+                ),
+            )
+            .select_from(scored)
+            .outerjoin(
+                Transaction,
+                and_(
+                    Transaction.sender_id == scored.c.sender_id,
+                    Transaction.created_at >= cutoff_date,
+                ),
+            )
+            .group_by(scored.c.position)
+        )
+
+        async with async_session() as session:
+            result = await session.exec(query)
+            rows = result.all()
+
+        summaries: list = [None] * len(requests)
+        for position, *aggregates in rows:
+            summaries[position] = HistorySummary.from_aggregates(*aggregates)
+
+        return summaries
+
+    def stats(self) -> dict:
+        delays = np.fromiter(self.queue_delays_ms, dtype=np.float64)
+
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "mean_batch_size": (
+                round(self.requests / self.batches, 2) if self.batches else 0.0
+            ),
+            "batch_sizes": {
+                str(size): count for size, count in sorted(self.batch_sizes.items())
+            },
+            "queue_delay_ms": {
+                "p50": round(float(np.percentile(delays, 50)), 3) if delays.size else None,
+                "p99": round(float(np.percentile(delays, 99)), 3) if delays.size else None,
+                "max": round(float(delays.max()), 3) if delays.size else None,
+            },
+        }
+
+
+scoring_dispatcher = ScoringDispatcher()
@@ -0,0 +1,416 @@
+import time
+from decimal import Decimal
+from uuid import UUID
+
+import numpy as np
+from redis import Redis
+
+from backend.app.core.ai.config import ai_settings
+from backend.app.core.ai.kernel import (
+    DAY_MICROSECONDS,
+    HistoryArrays,
+    HistorySummary,
+    sequential_sum,
+    to_epoch_us,
+)
+from backend.app.core.config import settings
+from backend.app.core.logging import get_logger
+from backend.app.transaction.models import Transaction
+
+logger = get_logger()
+
+# Atomically folds one transaction into an existing profile. A cold profile is
+# left alone so that a partial state is never mistaken for a full rebuild.
+RECORD_TRANSACTION_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+
+local amount = tonumber(ARGV[1])
+local timestamp = tonumber(ARGV[3])
+local bucket = tonumber(ARGV[4])
+local slot = bucket % tonumber(ARGV[5])
+
+local profile = redis.call('HMGET', KEYS[1], 'count', 'mean', 'm2', 'sum', 'first_ts', 'last_ts')
+local count = tonumber(profile[1]) + 1
+local mean = tonumber(profile[2])
+local m2 = tonumber(profile[3])
+local delta = amount - mean
+mean = mean + delta / count
+m2 = m2 + delta * (amount - mean)
+
+local first_ts = tonumber(profile[5]) or timestamp
+local last_ts = tonumber(profile[6]) or timestamp
+
+redis.call('HSET', KEYS[1],
+    'count', count,
+    'mean', string.format('%.17g', mean),
+    'm2', string.format('%.17g', m2),
+    'sum', string.format('%.17g', tonumber(profile[4]) + amount),
+    'first_ts', string.format('%d', math.min(first_ts, timestamp)),
+    'last_ts', string.format('%d', math.max(last_ts, timestamp)))
+
+if tonumber(redis.call('HGET', KEYS[1], 'bucket:' .. slot)) ~= bucket then
+    redis.call('HSET', KEYS[1], 'bucket:' .. slot, bucket, 'count:' .. slot, 0, 'volume:' .. slot, 0)
+end
+redis.call('HINCRBY', KEYS[1], 'count:' .. slot, 1)
+redis.call('HINCRBYFLOAT', KEYS[1], 'volume:' .. slot, ARGV[1])
+
+redis.call('HINCRBY', KEYS[2], ARGV[2], 1)
+
+redis.call('ZADD', KEYS[3], timestamp, ARGV[7])
+redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', '(' .. ARGV[8])
+
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[6]))
+redis.call('EXPIRE', KEYS[2], tonumber(ARGV[6]))
+redis.call('EXPIRE', KEYS[3], tonumber(ARGV[6]))
+return 1
+"""
+
+
+def amount_to_cents(amount: Decimal | float) -> str:
+    return str(int((Decimal(str(amount)) * 100).to_integral_value()))
+
+
+class FeatureStore:
+    # Incremental per-user behavioural profile kept in Redis. Each profile is a
+    # hash with running count, sum and Welford mean/M2 of amounts, first and
+    # last timestamp, and a ring of time buckets covering the last 24 hours.
+    # A second hash maps amount in cents to the number of times it was sent.
+    # The oldest bucket of a window is only partly inside it, so a sorted set
+    # keeps the exact timestamp and amount of the last day plus one bucket.
+    def __init__(self):
+        self._client: Redis | None = None
+        self._record_script = None
+
+    @property
+    def client(self) -> Redis:
+        if self._client is None:
+            self._client = Redis(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                db=settings.REDIS_DB,
+                decode_responses=True,
+            )
+        return self._client
+
+    @property
+    def bucket_us(self) -> int:
+        return ai_settings.FEATURE_STORE_BUCKET_SECONDS * 1_000_000
+
+    @property
+    def ring_size(self) -> int:
+        # Enough buckets to cover 24 hours, rounded up, and the partly covered
+        # bucket at the start of the window
+        return -(-DAY_MICROSECONDS // self.bucket_us) + 1
+
+    @property
+    def key_ttl(self) -> int:
+        return ai_settings.FEATURE_STORE_MAX_AGE_SECONDS * 2
+
+    def _profile_key(self, user_id: UUID) -> str:
+        return f"fraud_features:{user_id}"
+
+    def _amounts_key(self, user_id: UUID) -> str:
+        return f"fraud_features:{user_id}:amounts"
+
+    def _recent_key(self, user_id: UUID) -> str:
+        return f"fraud_features:{user_id}:recent"
+
+    def _keys(self, user_id: UUID) -> list[str]:
+        return [
+            self._profile_key(user_id),
+            self._amounts_key(user_id),
+            self._recent_key(user_id),
+        ]
+
+    def _recent_since(self, timestamp: int) -> int:
+        # Oldest timestamp a window ending at or after this one can still need
+        return timestamp - DAY_MICROSECONDS - self.bucket_us
+
+    def _record_args(self, transaction: Transaction) -> list:
+        timestamp = to_epoch_us(transaction.created_at)
+
+        return [
+            repr(float(transaction.amount)),
+            amount_to_cents(transaction.amount),
+            timestamp,
+            timestamp // self.bucket_us,
+            self.ring_size,
+            self.key_ttl,
+            f"{float(transaction.amount)!r}:{transaction.id}",
+            self._recent_since(timestamp),
+        ]
+
+    def _script(self):
+        if self._record_script is None:
+            self._record_script = self.client.register_script(
+                RECORD_TRANSACTION_SCRIPT
+            )
+        return self._record_script
+
+    def record_transaction(self, user_id: UUID | None, transaction: Transaction) -> bool:
+        if not ai_settings.FEATURE_STORE_ENABLED or user_id is None:
+            return False
+
+        try:
+            recorded = self._script()(
+                keys=self._keys(user_id), args=self._record_args(transaction)
+            )
+            return bool(recorded)
+
+        except Exception as e:
+            logger.error(f"Failed to update fraud feature store for {user_id}: {e}")
+            return False
+
+    def record_transactions(
+        self, user_id: UUID | None, transactions: list[Transaction]
+    ) -> int:
+        # Same as record_transaction for a whole batch, in one pipelined
+        # round trip
+        if not ai_settings.FEATURE_STORE_ENABLED or user_id is None:
+            return 0
+
+        try:
+            script = self._script()
+            pipe = self.client.pipeline(transaction=False)
+            keys = self._keys(user_id)
+
+            for transaction in transactions:
+                script(keys=keys, args=self._record_args(transaction), client=pipe)
+
+            return sum(pipe.execute())
+
+        except Exception as e:
+            logger.error(f"Failed to update fraud feature store for {user_id}: {e}")
+            return 0
+
+    def _profile(self, history: HistoryArrays) -> dict[str, str | int]:
+        profile: dict[str, str | int] = {
+            "count": len(history),
+            "mean": repr(history.mean_amount()) if len(history) else "0",
+            "m2": (
+                repr(float(np.var(history.amounts)) * len(history))
+                if len(history)
+                else "0"
+            ),
+            "sum": repr(float(sequential_sum(history.amounts))),
+            "built_at": repr(time.time()),
+        }
+
+        if len(history):
+            profile["first_ts"] = int(history.timestamps.min())
+            profile["last_ts"] = int(history.timestamps.max())
+
+        buckets = history.timestamps // self.bucket_us
+        newest_bucket = int(buckets.max()) if len(history) else 0
+        in_ring = buckets > newest_bucket - self.ring_size
+
+        for bucket in np.unique(buckets[in_ring]):
+            slot = int(bucket) % self.ring_size
+            mask = buckets == bucket
+            profile[f"bucket:{slot}"] = int(bucket)
+            profile[f"count:{slot}"] = int(np.count_nonzero(mask))
+            profile[f"volume:{slot}"] = repr(float(history.amounts[mask].sum()))
+
+        return profile
+
+    def _recent(self, history: HistoryArrays) -> dict[str, int]:
+        # Members are amount:position, rebuilt rows have no id to tell them apart
+        if not len(history):
+            return {}
+
+        since = self._recent_since(int(history.timestamps.max()))
+        return {
+            f"{float(history.amounts[position])!r}:{position}": int(
+                history.timestamps[position]
+            )
+            for position in np.flatnonzero(history.timestamps >= since)
+        }
+
+    def rebuild(self, user_id: UUID, history: HistoryArrays) -> None:
+        if not ai_settings.FEATURE_STORE_ENABLED:
+            return
+
+        try:
+            profile = self._profile(history)
+            recent = self._recent(history)
+            cents, counts = np.unique(
+                np.rint(history.amounts * 100).astype(np.int64), return_counts=True
+            )
+
+            pipe = self.client.pipeline()
+            pipe.delete(*self._keys(user_id))
+            pipe.hset(self._profile_key(user_id), mapping=profile)
+            if cents.size:
+                pipe.hset(
+                    self._amounts_key(user_id),
+                    mapping={str(c): int(n) for c, n in zip(cents, counts)},
+                )
+                pipe.expire(self._amounts_key(user_id), self.key_ttl)
+            if recent:
+                pipe.zadd(self._recent_key(user_id), recent)
+                pipe.expire(self._recent_key(user_id), self.key_ttl)
+            pipe.expire(self._profile_key(user_id), self.key_ttl)
+            pipe.execute()
+
+        except Exception as e:
+            logger.error(f"Failed to rebuild fraud feature store for {user_id}: {e}")
+
+    def queue_rebuild(self, user_ids: list[UUID]) -> int:
+        # Hands cold profiles to the warm_feature_profiles task, skipping
+        # users already queued within the window
+        if not ai_settings.FEATURE_STORE_ENABLED or not user_ids:
+            return 0
+
+        try:
+            user_ids = list(dict.fromkeys(user_ids))
+            pipe = self.client.pipeline(transaction=False)
+            for user_id in user_ids:
+                pipe.set(
+                    f"fraud_features:{user_id}:warming",
+                    1,
+                    nx=True,
+                    ex=ai_settings.FEATURE_STORE_WARM_WINDOW_SECONDS,
+                )
+            claimed = [
+                str(user_id)
+                for user_id, queued in zip(user_ids, pipe.execute())
+                if queued
+            ]
+
+            if claimed:
+                # The task modules import this one
+                from backend.app.core.celery_app import celery_app
+
+                celery_app.send_task(
+                    "warm_feature_profiles",
+                    args=[claimed],
+                    countdown=ai_settings.FEATURE_STORE_WARM_DELAY_SECONDS,
+                )
+            return len(claimed)
+
+        except Exception as e:
+            logger.error(f"Failed to queue fraud feature store rebuilds: {e}")
+            return 0
+
+    def get_summary(
+        self, user_id: UUID, transaction: Transaction
+    ) -> HistorySummary | None:
+        return self.get_summaries([(user_id, transaction)])[0]
+
+    def get_summaries(
+        self, items: list[tuple[UUID, Transaction]]
+    ) -> list[HistorySummary | None]:
+        # All profiles are read in one pipelined round trip
+        if not ai_settings.FEATURE_STORE_ENABLED:
+            return [None] * len(items)
+
+        try:
+            pipe = self.client.pipeline()
+            for user_id, transaction in items:
+                pipe.hgetall(self._profile_key(user_id))
+                pipe.hget(
+                    self._amounts_key(user_id), amount_to_cents(transaction.amount)
+                )
+                # Only the part of the oldest bucket that is inside the window
+                window_start, boundary_end = self._boundary(transaction)
+                pipe.zrangebyscore(
+                    self._recent_key(user_id), window_start, boundary_end
+                )
+            replies = pipe.execute()
+
+        except Exception as e:
+            logger.error(f"Failed to read fraud feature store: {e}")
+            return [None] * len(items)
+
+        summaries = []
+
+        for index, (user_id, transaction) in enumerate(items):
+            profile, repeated, boundary = replies[3 * index : 3 * index + 3]
+            try:
+                summaries.append(
+                    self._summary(profile, repeated, boundary, transaction)
+                )
+            except Exception as e:
+                logger.error(f"Failed to read fraud feature store for {user_id}: {e}")
+                summaries.append(None)
+
+        return summaries
+
+    def _boundary(self, transaction: Transaction) -> tuple[int, int]:
+        # First timestamp of the 24h window and the last one of its bucket
+        window_start = to_epoch_us(transaction.created_at) - DAY_MICROSECONDS
+        return window_start, (window_start // self.bucket_us + 1) * self.bucket_us - 1
+
+    def _summary(
+        self,
+        profile: dict,
+        repeated: str | None,
+        boundary: list[str],
+        transaction: Transaction,
+    ) -> HistorySummary | None:
+        if not profile:
+            return None
+
+        if (
+            time.time() - float(profile.get("built_at", 0))
+            > ai_settings.FEATURE_STORE_MAX_AGE_SECONDS
+        ):
+            return None
+
+        count = int(profile["count"])
+        current_bucket = to_epoch_us(transaction.created_at) // self.bucket_us
+        boundary_bucket = self._boundary(transaction)[0] // self.bucket_us
+
+        # The boundary bucket comes from the sorted set, already cut to the
+        # window, and the ring supplies the whole buckets after it
+        recent_count = len(boundary)
+        recent_volume = sum(float(member.split(":", 1)[0]) for member in boundary)
+
+        for slot in range(self.ring_size):
+            bucket = profile.get(f"bucket:{slot}")
+            if bucket is None:
+                continue
+            if boundary_bucket < int(bucket) <= current_bucket:
+                recent_count += int(profile[f"count:{slot}"])
+                recent_volume += float(profile[f"volume:{slot}"])
+
+        return HistorySummary(
+            count=count,
+            average_amount=float(profile["mean"]),
+            recent_count=recent_count,
+            recent_volume=recent_volume if recent_count else 0,
+            first_timestamp=int(profile["first_ts"]) if count else None,
+            last_timestamp=int(profile["last_ts"]) if count else None,
+            repeated_count=int(repeated or 0),
+        )
+
+    def invalidate(self, user_id: UUID) -> None:
+        self.client.delete(*self._keys(user_id))
+
+
+def compare_summaries(store: HistorySummary, history: HistorySummary) -> dict:
+    # Side by side view of the incremental profile and a full-history rebuild
+    fields = [
+        "count",
+        "average_amount",
+        "recent_count",
+        "recent_volume",
+        "first_timestamp",
+        "last_timestamp",
+        "repeated_count",
+    ]
+    return {
+        field: {
+            "store": getattr(store, field),
+            "history": getattr(history, field),
+            "matches": bool(
+                np.isclose(getattr(store, field) or 0, getattr(history, field) or 0)
+            ),
+        }
+        for field in fields
+    }
+
+
+feature_store = FeatureStore()
@@ -0,0 +1,96 @@
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.app.core.ai.transaction_analyzer import TransactionAnalyzer
+from backend.app.core.config import settings
+from backend.app.core.model_registry import load_models
+from backend.app.transaction.models import Transaction
+
+
+async def run_check(users: int, hours: int) -> dict:
+    # Compare the Redis profile of recently active senders with their history
+    # in the database, as seen by a transaction made now
+    engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+    analyzer = TransactionAnalyzer()
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
+
+    checked, cold = 0, 0
+    mismatches = []
+
+    try:
+        async with AsyncSession(engine) as session:
+            senders = await session.exec(
+                select(Transaction.sender_id, func.max(Transaction.amount))
+                .where(
+                    Transaction.sender_id.is_not(None),
+                    Transaction.created_at >= since,
+                )
+                .group_by(Transaction.sender_id)
+                .order_by(func.max(Transaction.created_at).desc())
+                .limit(users)
+            )
+
+            for sender_id, amount in senders.all():
+                probe = Transaction(
+                    amount=Decimal(str(amount)),
+                    created_at=datetime.now(timezone.utc),
+                )
+                comparison = await analyzer.verify_feature_store(
+                    probe, sender_id, session
+                )
+
+                if comparison is None:
+                    cold += 1
+                    continue
+
+                checked += 1
+                fields = {
+                    field: values
+                    for field, values in comparison.items()
+                    if not values["matches"]
+                }
+                if fields:
+                    mismatches.append({"user_id": str(sender_id), "fields": fields})
+    finally:
+        await engine.dispose()
+
+    return {
+        "checked": checked,
+        "cold": cold,
+        "mismatches": mismatches,
+        "consistent": not mismatches,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Check the incremental fraud feature store of recently "
+        "active senders against a rebuild from their transaction history"
+    )
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument(
+        "--hours", type=int, default=24, help="Senders active in this many hours"
+    )
+    args = parser.parse_args()
+
+    load_models()
+
+    result = asyncio.run(run_check(args.users, args.hours))
+    print(json.dumps(result, indent=2, default=str))
+
+    if not result["consistent"]:
+        print("Feature store check failed", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Sequence
+
+import numpy as np
+
+from backend.app.transaction.models import Transaction
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+MICROSECONDS_PER_HOUR = 3600 * 1_000_000
+DAY_MICROSECONDS = 24 * MICROSECONDS_PER_HOUR
+
+
+def to_epoch_us(moment: datetime) -> int:
+    # Integer microseconds keep gaps exact, so they match timedelta.total_seconds()
+    epoch = _EPOCH if moment.tzinfo else _NAIVE_EPOCH
+    return (moment - epoch) // _ONE_MICROSECOND
+
+
+def sequential_sum(values: np.ndarray) -> float | int:
+    # np.sum uses pairwise summation and the builtin sum() is compensated since
+    # Python 3.12, deferring to sum() keeps stored risk factors bit for bit
+    # identical on every interpreter
+    return sum(values.tolist())
+
+
+class HistoryArrays:
+    # Contiguous column view of a user's transaction history. Rows keep the
+    # order in which they were loaded, amounts are float64 and timestamps are
+    # int64 microseconds since the epoch.
+    __slots__ = ("amounts", "timestamps")
+
+    def __init__(self, amounts: np.ndarray, timestamps: np.ndarray):
+        self.amounts = np.ascontiguousarray(amounts, dtype=np.float64)
+        self.timestamps = np.ascontiguousarray(timestamps, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return int(self.amounts.size)
+
+    @classmethod
+    def from_transactions(cls, history: Sequence[Transaction]) -> "HistoryArrays":
+        count = len(history)
+
+        amounts = np.fromiter(
+            (float(t.amount) for t in history), dtype=np.float64, count=count
+        )
+        timestamps = np.fromiter(
+            (to_epoch_us(t.created_at) for t in history), dtype=np.int64, count=count
+        )
+        return cls(amounts, timestamps)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple]) -> "HistoryArrays":
+        # Rows are (amount, created_at) pairs
+        rows = list(rows)
+        count = len(rows)
+
+        amounts = np.fromiter(
+            (float(amount) for amount, _ in rows), dtype=np.float64, count=count
+        )
+        timestamps = np.fromiter(
+            (to_epoch_us(created_at) for _, created_at in rows),
+            dtype=np.int64,
+            count=count,
+        )
+        return cls(amounts, timestamps)
+
+    def recent_mask(self, reference_us: int) -> np.ndarray:
+        return self.timestamps >= reference_us - DAY_MICROSECONDS
+
+    def recent_activity(self, reference_us: int) -> tuple[int, float | int]:
+        # Count and volume of transactions in the 24 hours before the reference
+        mask = self.recent_mask(reference_us)
+        return int(np.count_nonzero(mask)), sequential_sum(self.amounts[mask])
+
+    def mean_gap_hours(self) -> tuple[float, int] | None:
+        # Mean gap between consecutive transactions and the latest timestamp
+        if self.timestamps.size < 2:
+            return None
+
+        ordered = np.sort(self.timestamps)
+        gaps = np.diff(ordered) / 1_000_000 / 3600
+
+        return float(np.mean(gaps)), int(ordered[-1])
+
+    def repeated_amount_count(self, amount: float) -> int:
+        return int(np.count_nonzero(np.abs(self.amounts - amount) < 0.01))
+
+    def mean_amount(self) -> float:
+        return float(np.mean(self.amounts))
+
+    def including(
+        self, amounts: float | np.ndarray, timestamps: int | np.ndarray
+    ) -> "HistoryArrays":
+        # The same history with transactions that are not committed yet
+        return HistoryArrays(
+            np.append(self.amounts, amounts), np.append(self.timestamps, timestamps)
+        )
+
+    def summarize(self, amount: float, reference_us: int) -> "HistorySummary":
+        recent_count, recent_volume = self.recent_activity(reference_us)
+
+        return HistorySummary(
+            count=len(self),
+            average_amount=self.mean_amount() if len(self) else 0.0,
+            recent_count=recent_count,
+            recent_volume=recent_volume,
+            first_timestamp=int(self.timestamps.min()) if len(self) else None,
+            last_timestamp=int(self.timestamps.max()) if len(self) else None,
+            repeated_count=self.repeated_amount_count(amount),
+        )
+
+
+class HistorySummary:
+    # Pre-aggregated history as returned by the SQL feature query. It answers
+    # the same questions as HistoryArrays, but the recent activity and the
+    # repeated amount count are only valid for the transaction it was built for.
+    __slots__ = (
+        "count",
+        "average_amount",
+        "recent_count",
+        "recent_volume",
+        "first_timestamp",
+        "last_timestamp",
+        "repeated_count",
+    )
+
+    def __init__(
+        self,
+        *,
+        count: int,
+        average_amount: float,
+        recent_count: int,
+        recent_volume: float | int,
+        first_timestamp: int | None,
+        last_timestamp: int | None,
+        repeated_count: int,
+    ):
+        self.count = count
+        self.average_amount = average_amount
+        self.recent_count = recent_count
+        self.recent_volume = recent_volume
+        self.first_timestamp = first_timestamp
+        self.last_timestamp = last_timestamp
+        self.repeated_count = repeated_count
+
+    def __len__(self) -> int:
+        return self.count
+
+    @classmethod
+    def from_aggregates(
+        cls,
+        count: int,
+        average_amount,
+        recent_count: int,
+        recent_volume,
+        first_created_at: datetime | None,
+        last_created_at: datetime | None,
+        repeated_count: int,
+    ) -> "HistorySummary":
+        # One row of the aggregate feature query, in its column order
+        return cls(
+            count=count,
+            average_amount=float(average_amount) if count else 0.0,
+            recent_count=recent_count,
+            recent_volume=float(recent_volume) if recent_count else 0,
+            first_timestamp=to_epoch_us(first_created_at) if count else None,
+            last_timestamp=to_epoch_us(last_created_at) if count else None,
+            repeated_count=repeated_count,
+        )
+
+    def recent_activity(self, reference_us: int) -> tuple[int, float | int]:
+        return self.recent_count, self.recent_volume
+
+    def mean_gap_hours(self) -> tuple[float, int] | None:
+        # The mean of consecutive gaps telescopes to (last - first) / (n - 1)
+        if self.count < 2 or self.first_timestamp is None:
+            return None
+
+        span = (self.last_timestamp - self.first_timestamp) / 1_000_000 / 3600
+
+        return span / (self.count - 1), self.last_timestamp
+
+    def repeated_amount_count(self, amount: float) -> int:
+        return self.repeated_count
+
+    def mean_amount(self) -> float:
+        return self.average_amount
+
+    def including(
+        self,
+        amounts: float | np.ndarray,
+        timestamps: int | np.ndarray,
+        reference_amount: float | None = None,
+    ) -> "HistorySummary":
+        # The same summary with transactions not yet recorded in the profile,
+        # made in the 24 hours up to the reference time of this summary.
+        # Without a reference amount they are the transaction it was built for.
+        amounts = np.atleast_1d(np.asarray(amounts, dtype=np.float64))
+        timestamps = np.atleast_1d(np.asarray(timestamps, dtype=np.int64))
+        added = int(amounts.size)
+        count = self.count + added
+        total = sequential_sum(amounts)
+
+        if reference_amount is None:
+            repeated = added
+        else:
+            repeated = int(np.count_nonzero(np.abs(amounts - reference_amount) < 0.01))
+
+        first, last = int(timestamps.min()), int(timestamps.max())
+
+        return HistorySummary(
+            count=count,
+            average_amount=self.average_amount
+            + (total - added * self.average_amount) / count,
+            recent_count=self.recent_count + added,
+            recent_volume=self.recent_volume + total,
+            first_timestamp=min(self.first_timestamp or first, first),
+            last_timestamp=max(self.last_timestamp or last, last),
+            repeated_count=self.repeated_count + repeated,
+        )
+
+
+HistoryView = HistoryArrays | HistorySummary
+
+
+def history_view(history: "Sequence[Transaction] | HistoryView") -> HistoryView:
+    if isinstance(history, (HistoryArrays, HistorySummary)):
+        return history
+    return HistoryArrays.from_transactions(history)
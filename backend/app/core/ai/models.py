@@ -37,3 +37,28 @@ class TransactionRiskScore(SQLModel, table=True):
         nullable=True,
     )
     is_confirmed_fraud: bool | None = Field(default=None)
+
+
+class TransactionShadowScore(SQLModel, table=True):
+    # Score a candidate model would have given a live transaction
+    id: uuid.UUID = Field(
+        sa_column=Column(
+            pg.UUID(as_uuid=True),
+            primary_key=True,
+        ),
+        default_factory=uuid.uuid4,
+    )
+    transaction_id: UUID = Field(foreign_key="transaction.id", index=True)
+    ai_model_version: str = Field(index=True)
+    risk_score: float
+    production_model_version: str
+    production_score: float
+
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(
+            pg.TIMESTAMP(timezone=True),
+            nullable=False,
+            server_default=text("CURRENT_TIMESTAMP"),
+        ),
+    )
@@ -0,0 +1,257 @@
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from redis import Redis
+from sqlalchemy import String, cast, delete, func, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import any_
+
+from backend.app.core.ai.config import ai_settings
+from backend.app.core.ai.kernel import HistoryArrays, to_epoch_us
+from backend.app.core.ai.models import TransactionRiskScore
+from backend.app.core.ai.transaction_analyzer import TransactionAnalyzer
+from backend.app.core.config import settings
+from backend.app.core.logging import get_logger
+from backend.app.transaction.models import Transaction
+
+logger = get_logger()
+
+
+def partition_clause(partition: int, partitions: int):
+    # Stable split of senders across workers, every sender lives in one partition
+    sender_hash = func.hashtext(cast(Transaction.sender_id, String)).op("&")(
+        0x7FFFFFFF
+    )
+    return sender_hash % partitions == partition
+
+
+def checkpoint_key(run_id: str, partition: int) -> str:
+    return f"rescore:{run_id}:{partition}"
+
+
+def check_rescore_version(model_version: str) -> None:
+    # A run replaces the rows of its version, those of the live version are
+    # the ones reviews read and label
+    if model_version == ai_settings.MODEL_VERSION:
+        raise ValueError(
+            f"{model_version} is the live model version, re-score into a new one"
+        )
+
+
+class PartitionRescorer:
+    # Streams one partition of the transaction table ordered by sender and
+    # time through a server-side cursor. Each sender's rows are scored against
+    # a sliding 90-day window of that sender's own history, the same view the
+    # live analyzer had at the time, and written as new versioned score rows.
+    def __init__(
+        self,
+        *,
+        run_id: str,
+        partition: int,
+        partitions: int,
+        model_version: str,
+        redis_client: Redis,
+        since: datetime | None = None,
+        chunk_size: int = ai_settings.RESCORE_CHUNK_SIZE,
+    ):
+        check_rescore_version(model_version)
+
+        self.run_id = run_id
+        self.partition = partition
+        self.partitions = partitions
+        self.model_version = model_version
+        self.redis_client = redis_client
+        self.since = since
+        self.chunk_size = chunk_size
+        self.analyzer = TransactionAnalyzer()
+        self.window_us = ai_settings.ANALYSIS_WINDOW_DAYS * 86_400 * 1_000_000
+        self.checkpoint_key = checkpoint_key(run_id, partition)
+
+        self.scored = 0
+        self.already_scored = 0
+        self.failed = 0
+        self.started_at = 0.0
+
+    def _score_sender(self, rows: list) -> list[dict]:
+        amounts = np.fromiter(
+            (float(row.amount) for row in rows), dtype=np.float64, count=len(rows)
+        )
+        timestamps = np.fromiter(
+            (to_epoch_us(row.created_at) for row in rows),
+            dtype=np.int64,
+            count=len(rows),
+        )
+
+        lower = np.searchsorted(timestamps, timestamps - self.window_us, "left")
+        upper = np.searchsorted(timestamps, timestamps, "right")
+
+        items = [
+            (row, HistoryArrays(amounts[lo:hi], timestamps[lo:hi]))
+            for row, lo, hi in zip(rows, lower, upper)
+            if self.since is None or row.created_at >= self.since
+        ]
+
+        scored_at = datetime.now(timezone.utc)
+        scores = []
+
+        for (row, _), (risk_score, risk_factors) in zip(
+            items, self.analyzer.score_batch(items)
+        ):
+            # The live fallback score is not a score of this model, the row is
+            # left without one and a later run can fill it in
+            if "error" in risk_factors:
+                self.failed += 1
+                continue
+
+            scores.append(
+                {
+                    "id": uuid.uuid4(),
+                    "transaction_id": row.id,
+                    "risk_score": risk_score,
+                    "risk_factors": risk_factors,
+                    "ai_model_version": self.model_version,
+                    "created_at": scored_at,
+                }
+            )
+
+        return scores
+
+    async def _flush(self, conn, pending: list[dict], last_sender) -> None:
+        if pending:
+            transaction_ids = [score["transaction_id"] for score in pending]
+
+            # Replacing rows of the same version keeps resumed runs idempotent
+            async with conn.begin():
+                # The latest review of each transaction stays with its scores
+                reviews_result = await conn.execute(
+                    select(
+                        TransactionRiskScore.transaction_id,
+                        TransactionRiskScore.is_confirmed_fraud,
+                        TransactionRiskScore.reviewed_by,
+                    )
+                    .where(
+                        TransactionRiskScore.transaction_id == any_(transaction_ids),
+                        TransactionRiskScore.is_confirmed_fraud.is_not(None),
+                    )
+                    .order_by(TransactionRiskScore.created_at)
+                )
+                reviews = {row.transaction_id: row for row in reviews_result}
+
+                for score in pending:
+                    review = reviews.get(score["transaction_id"])
+                    score["is_confirmed_fraud"] = (
+                        review.is_confirmed_fraud if review else None
+                    )
+                    score["reviewed_by"] = review.reviewed_by if review else None
+
+                await conn.execute(
+                    delete(TransactionRiskScore).where(
+                        TransactionRiskScore.ai_model_version == self.model_version,
+                        TransactionRiskScore.transaction_id == any_(transaction_ids),
+                    )
+                )
+                await conn.execute(insert(TransactionRiskScore), pending)
+
+        self.scored += len(pending)
+        elapsed = time.perf_counter() - self.started_at
+        scored_now = self.scored - self.already_scored
+        rows_per_second = scored_now / elapsed if elapsed else 0.0
+
+        self.redis_client.hset(
+            self.checkpoint_key,
+            mapping={
+                "last_sender_id": str(last_sender),
+                "scored": self.scored,
+                "rows_per_second": f"{rows_per_second:.1f}",
+            },
+        )
+        self.redis_client.expire(
+            self.checkpoint_key, ai_settings.RESCORE_CHECKPOINT_TTL_SECONDS
+        )
+
+        logger.info(
+            f"Rescore {self.run_id} partition {self.partition}/{self.partitions}: "
+            f"{self.scored} rows, {rows_per_second:.0f} rows/sec"
+        )
+
+    async def run(self) -> dict:
+        checkpoint = self.redis_client.hgetall(self.checkpoint_key)
+        resumed_from = checkpoint.get("last_sender_id") if checkpoint else None
+        self.scored = int(checkpoint.get("scored", 0)) if checkpoint else 0
+        self.already_scored = self.scored
+
+        query = (
+            select(
+                Transaction.id,
+                Transaction.sender_id,
+                Transaction.amount,
+                Transaction.created_at,
+            )
+            .where(
+                Transaction.sender_id.is_not(None),
+                partition_clause(self.partition, self.partitions),
+            )
+            .order_by(Transaction.sender_id, Transaction.created_at, Transaction.id)
+            .execution_options(yield_per=self.chunk_size)
+        )
+
+        if self.since:
+            # Rows before the cut-off are still needed as history
+            query = query.where(
+                Transaction.created_at
+                >= self.since - timedelta(days=ai_settings.ANALYSIS_WINDOW_DAYS)
+            )
+
+        if resumed_from:
+            query = query.where(Transaction.sender_id > uuid.UUID(resumed_from))
+
+        engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+        self.started_at = time.perf_counter()
+
+        try:
+            pending: list[dict] = []
+            sender_rows: list = []
+            current_sender = None
+
+            # The cursor keeps its own connection open, writes use a second one
+            async with engine.connect() as read_conn, engine.connect() as write_conn:
+                result = await read_conn.stream(query)
+
+                async for chunk in result.partitions():
+                    for row in chunk:
+                        if row.sender_id != current_sender and sender_rows:
+                            pending.extend(self._score_sender(sender_rows))
+                            sender_rows = []
+
+                            if len(pending) >= self.chunk_size:
+                                await self._flush(write_conn, pending, current_sender)
+                                pending = []
+
+                        current_sender = row.sender_id
+                        sender_rows.append(row)
+
+                if sender_rows:
+                    pending.extend(self._score_sender(sender_rows))
+
+                if current_sender is not None:
+                    await self._flush(write_conn, pending, current_sender)
+
+        finally:
+            await engine.dispose()
+
+        elapsed = time.perf_counter() - self.started_at
+        scored_now = self.scored - self.already_scored
+
+        return {
+            "run_id": self.run_id,
+            "partition": self.partition,
+            "model_version": self.model_version,
+            "resumed_from": resumed_from,
+            "scored": self.scored,
+            "failed": self.failed,
+            "elapsed_seconds": round(elapsed, 2),
+            "rows_per_second": round(scored_now / elapsed, 1) if elapsed else 0.0,
+        }
@@ -0,0 +1,224 @@
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from backend.app.core.ai.config import ai_settings
+from backend.app.core.logging import get_logger
+
+logger = get_logger()
+
+ARTIFACT_DIR = os.path.join(os.path.dirname(__file__), "artifacts")
+
+# Order of the per-factor risk scores in a feature vector
+RISK_FACTORS = ["amount", "time", "frequency", "pattern", "velocity_amount"]
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -35.0, 35.0)))
+
+
+def model_path(version: str) -> str:
+    directory = ai_settings.MODEL_ARTIFACT_DIR or ARTIFACT_DIR
+    return os.path.join(directory, f"fraud_model_{version}.npz")
+
+
+class RiskModel:
+    # Turns the per-factor risk scores of a transaction into its base score.
+    # Subclasses only differ in how the weighted factors are combined.
+    name = ""
+
+    def __init__(
+        self,
+        *,
+        version: str,
+        weights: np.ndarray,
+        bias: float = 0.0,
+        feature_names: list[str] = RISK_FACTORS,
+    ):
+        self.version = version
+        self.weights = np.ascontiguousarray(weights, dtype=np.float64)
+        self.bias = float(bias)
+        self.feature_names = list(feature_names)
+
+    @property
+    def factor_weights(self) -> dict[str, float]:
+        return {
+            name: float(weight)
+            for name, weight in zip(self.feature_names, self.weights)
+        }
+
+    def vectorize(self, risk_scores: dict[str, float]) -> np.ndarray:
+        return np.fromiter(
+            (risk_scores[name] for name in self.feature_names),
+            dtype=np.float64,
+            count=len(self.feature_names),
+        )
+
+    def score(self, risk_scores: dict[str, float]) -> float:
+        return float(self.score_matrix(self.vectorize(risk_scores)[np.newaxis, :])[0])
+
+    def score_matrix(self, features: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def upper_bound(
+        self, lower: dict[str, float], upper: dict[str, float]
+    ) -> float:
+        # Both models are monotonic in every factor, so the highest reachable
+        # score takes each factor at the end of its range its weight favours
+        worst_case = np.where(
+            self.weights >= 0, self.vectorize(upper), self.vectorize(lower)
+        )
+        return float(self.score_matrix(worst_case[np.newaxis, :])[0])
+
+
+class WeightedSumModel(RiskModel):
+    # The hand-tuned RISK_WEIGHTS
+    name = "weighted_sum"
+
+    @classmethod
+    def from_settings(cls) -> "WeightedSumModel":
+        weights = ai_settings.RISK_WEIGHTS
+        return cls(
+            version=ai_settings.MODEL_VERSION,
+            weights=np.array([weights[name] for name in RISK_FACTORS]),
+            feature_names=RISK_FACTORS,
+        )
+
+    def score(self, risk_scores: dict[str, float]) -> float:
+        # Summed in Python so existing scores stay bit for bit identical
+        weights = self.factor_weights
+        return sum(score * weights[factor] for factor, score in risk_scores.items())
+
+    def score_matrix(self, features: np.ndarray) -> np.ndarray:
+        return features @ self.weights
+
+
+class LogisticRegressionModel(RiskModel):
+    # Learned from reviewer labels, inference is one dot product and a sigmoid
+    name = "logistic_regression"
+
+    def score(self, risk_scores: dict[str, float]) -> float:
+        return float(_sigmoid(self.vectorize(risk_scores) @ self.weights + self.bias))
+
+    def score_matrix(self, features: np.ndarray) -> np.ndarray:
+        return _sigmoid(features @ self.weights + self.bias)
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez_compressed(
+            path,
+            model=np.array(self.name),
+            version=np.array(self.version),
+            feature_names=np.array(self.feature_names),
+            weights=self.weights,
+            bias=np.array(self.bias),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "LogisticRegressionModel":
+        with np.load(path, allow_pickle=False) as artifact:
+            if str(artifact["model"]) != cls.name:
+                raise ValueError(f"{path} is not a {cls.name} artifact")
+
+            return cls(
+                version=str(artifact["version"]),
+                weights=artifact["weights"],
+                bias=float(artifact["bias"]),
+                feature_names=[str(name) for name in artifact["feature_names"]],
+            )
+
+
+def train_logistic_regression(
+    features: np.ndarray,
+    labels: np.ndarray,
+    *,
+    version: str,
+    feature_names: list[str] = RISK_FACTORS,
+    l2: float = 1e-3,
+    learning_rate: float = 0.5,
+    epochs: int = 2000,
+) -> LogisticRegressionModel:
+    # Full-batch gradient descent on class-balanced log loss
+    features = np.asarray(features, dtype=np.float64)
+    labels = np.asarray(labels, dtype=np.float64)
+    count = labels.size
+
+    positives = float(labels.sum())
+    negatives = count - positives
+
+    if not positives or not negatives:
+        raise ValueError("Training data needs both fraud and non-fraud labels")
+
+    sample_weights = np.where(
+        labels == 1, count / (2 * positives), count / (2 * negatives)
+    )
+
+    weights = np.zeros(features.shape[1])
+    bias = 0.0
+
+    for _ in range(epochs):
+        error = (_sigmoid(features @ weights + bias) - labels) * sample_weights
+        weights -= learning_rate * (features.T @ error / count + l2 * weights)
+        bias -= learning_rate * float(error.mean())
+
+    return LogisticRegressionModel(
+        version=version, weights=weights, bias=bias, feature_names=feature_names
+    )
+
+
+@lru_cache(maxsize=4)
+def _load_risk_model(model_type: str, version: str) -> RiskModel:
+    if model_type == LogisticRegressionModel.name:
+        path = model_path(version)
+        try:
+            model = LogisticRegressionModel.load(path)
+            logger.info(f"Loaded fraud model {model.name} {model.version} from {path}")
+            return model
+        except Exception as e:
+            logger.error(
+                f"Failed to load fraud model {version} from {path}, "
+                f"falling back to weighted sum: {e}"
+            )
+
+    return WeightedSumModel.from_settings()
+
+
+def get_risk_model() -> RiskModel:
+    # Artifacts are read once per process and version
+    return _load_risk_model(ai_settings.MODEL_TYPE, ai_settings.MODEL_VERSION)
+
+
+@lru_cache(maxsize=4)
+def _load_shadow_models(
+    versions: tuple[str, ...], weights: tuple[tuple[str, tuple[float, ...]], ...]
+) -> tuple[RiskModel, ...]:
+    models: list[RiskModel] = []
+
+    for version in versions:
+        path = model_path(version)
+        try:
+            models.append(LogisticRegressionModel.load(path))
+        except Exception as e:
+            logger.error(f"Skipping shadow model {version} from {path}: {e}")
+
+    for name, factor_weights in weights:
+        models.append(
+            WeightedSumModel(
+                version=name,
+                weights=np.array(factor_weights),
+                feature_names=RISK_FACTORS,
+            )
+        )
+
+    return tuple(models)
+
+
+def get_shadow_models() -> tuple[RiskModel, ...]:
+    return _load_shadow_models(
+        tuple(ai_settings.SHADOW_MODEL_VERSIONS),
+        tuple(
+            (name, tuple(weights[factor] for factor in RISK_FACTORS))
+            for name, weights in sorted(ai_settings.SHADOW_RISK_WEIGHTS.items())
+        ),
+    )
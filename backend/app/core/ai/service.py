@@ -1,10 +1,17 @@
 from uuid import UUID
 from datetime import datetime, timezone
-from sqlmodel import select
+import numpy as np
+from sqlalchemy import insert, true
+from sqlalchemy.orm import aliased
+from sqlmodel import desc, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from backend.app.core.ai.models import TransactionRiskScore
 from backend.app.core.ai.enums import AIReviewStatusEnum
 from backend.app.core.ai.config import ai_settings
+from backend.app.core.ai.dispatcher import scoring_dispatcher
+from backend.app.core.ai.feature_store import feature_store
+from backend.app.core.ai.kernel import HistorySummary, to_epoch_us
+from backend.app.core.ai.shadow import shadow_scorer
 from backend.app.core.ai.transaction_analyzer import TransactionAnalyzer
 from backend.app.transaction.models import Transaction
 from backend.app.core.logging import get_logger
@@ -14,6 +21,30 @@ from backend.app.transaction.enums import TransactionFailureReason
 logger = get_logger()
 
 
+def production_risk_score():
+    # A transaction can have score rows from several model versions and rescore
+    # runs. Reviews read and label one of them: the production version's row
+    # if there is one, else the newest.
+    current = (
+        select(TransactionRiskScore)
+        .where(TransactionRiskScore.transaction_id == Transaction.id)
+        .order_by(
+            desc(TransactionRiskScore.ai_model_version == ai_settings.MODEL_VERSION),
+            desc(TransactionRiskScore.created_at),
+            desc(TransactionRiskScore.id),
+        )
+        .limit(1)
+        .lateral()
+    )
+    return aliased(TransactionRiskScore, current)
+
+
+def with_risk_score():
+    # Each transaction joined to its production risk score
+    risk_score = production_risk_score()
+    return select(Transaction, risk_score).join(risk_score, true()), risk_score
+
+
 class TransactionAIService:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -23,13 +54,30 @@ class TransactionAIService:
         self,
         transaction: Transaction,
         user_id: UUID,
+        commit: bool = True,
     ) -> dict:
+        # commit=False leaves the risk score, and a transaction that was never
+        # committed, to be persisted with the caller's commit
         try:
-            risk_score, risk_factors = await self.analyzer.analyze_transaction(
-                transaction,
-                user_id,
-                self.session,
-            )
+            if ai_settings.SCORING_BATCH_ENABLED:
+                (
+                    risk_score,
+                    risk_factors,
+                    risk_scores,
+                ) = await scoring_dispatcher.score(
+                    transaction, user_id, pending=not commit
+                )
+            else:
+                (
+                    risk_score,
+                    risk_factors,
+                    risk_scores,
+                ) = await self.analyzer.analyze_with_risk_scores(
+                    transaction,
+                    user_id,
+                    self.session,
+                    pending=not commit,
+                )
 
             risk_score_record = TransactionRiskScore(
                 transaction_id=transaction.id,
@@ -48,9 +96,6 @@ class TransactionAIService:
                 else AIReviewStatusEnum.CLEARED
             )
 
-            await self.session.commit()
-            await self.session.refresh(risk_score_record)
-
             response = {
                 "risk_score": risk_score,
                 "risk_factors": risk_factors,
@@ -58,8 +103,14 @@ class TransactionAIService:
                 "recommendation": "block" if needs_review else "allow",
                 "model_version": ai_settings.MODEL_VERSION,
                 "score_id": risk_score_record.id,
+                "risk_scores": risk_scores,
             }
 
+            if commit:
+                await self.session.commit()
+                await self.session.refresh(risk_score_record)
+                self.submit_shadow_scores(transaction, response)
+
             if needs_review:
                 logger.warning(
                     f"High risk transaction detected: {transaction.id}, "
@@ -79,6 +130,95 @@ class TransactionAIService:
                 "error": str(e),
             }
 
+    async def analyze_batch(
+        self, transactions: list[Transaction], user_id: UUID
+    ) -> list[dict]:
+        # Every leg of a bulk transfer sees the sender's history plus the legs
+        # up to and including itself, as if they had been sent one by one.
+        # The profile is read once for all of them.
+        try:
+            views = feature_store.get_summaries(
+                [(user_id, transaction) for transaction in transactions]
+            )
+
+            if any(view is None for view in views):
+                history = await self.analyzer.get_user_history_columns(
+                    user_id, self.session
+                )
+                feature_store.rebuild(user_id, history)
+                views = [history if view is None else view for view in views]
+
+            amounts = np.fromiter(
+                (float(transaction.amount) for transaction in transactions),
+                dtype=np.float64,
+                count=len(transactions),
+            )
+            timestamps = np.fromiter(
+                (to_epoch_us(transaction.created_at) for transaction in transactions),
+                dtype=np.int64,
+                count=len(transactions),
+            )
+
+            def legs():
+                for index, (transaction, view) in enumerate(zip(transactions, views)):
+                    batch = amounts[: index + 1], timestamps[: index + 1]
+                    if isinstance(view, HistorySummary):
+                        yield transaction, view.including(*batch, amounts[index])
+                    else:
+                        yield transaction, view.including(*batch)
+
+            scores = self.analyzer.score_batch(legs())
+        except Exception as e:
+            logger.error(f"Error analyzing {len(transactions)} transactions: {e}")
+            scores = [(0.8, {"error": str(e)})] * len(transactions)
+
+        analyses = []
+        for transaction, (risk_score, risk_factors) in zip(transactions, scores):
+            needs_review = risk_score >= ai_settings.RISK_SCORE_TRESHOLD
+
+            transaction.ai_review_status = (
+                AIReviewStatusEnum.FLAGGED
+                if needs_review
+                else AIReviewStatusEnum.CLEARED
+            )
+            analyses.append(
+                {
+                    "risk_score": risk_score,
+                    "risk_factors": risk_factors,
+                    "needs_review": needs_review,
+                    "model_version": ai_settings.MODEL_VERSION,
+                }
+            )
+
+        return analyses
+
+    async def save_batch_scores(
+        self, transactions: list[Transaction], analyses: list[dict]
+    ) -> None:
+        # Bulk insert, once the transactions themselves are written
+        await self.session.exec(
+            insert(TransactionRiskScore),
+            params=[
+                {
+                    "transaction_id": transaction.id,
+                    "risk_score": analysis["risk_score"],
+                    "risk_factors": analysis["risk_factors"],
+                    "ai_model_version": analysis["model_version"],
+                }
+                for transaction, analysis in zip(transactions, analyses)
+            ],
+        )
+
+    def submit_shadow_scores(self, transaction: Transaction, risk_analysis: dict) -> None:
+        # Shadow scores reference the transaction, they are only queued once
+        # it is committed
+        shadow_scorer.submit(
+            transaction.id,
+            risk_analysis.get("risk_scores"),
+            risk_analysis["risk_score"],
+            risk_analysis["model_version"],
+        )
+
     async def handle_flagged_transacion(
         self,
         transaction: Transaction,
@@ -143,11 +283,8 @@ class TransactionAIService:
         notes: str | None = None,
     ) -> TransactionRiskScore:
         try:
-            query = (
-                select(Transaction, TransactionRiskScore)
-                .join(TransactionRiskScore)
-                .where(Transaction.id == transaction_id)
-            )
+            query, _ = with_risk_score()
+            query = query.where(Transaction.id == transaction_id)
 
             result = await self.session.exec(query)
             transaction_data = result.first()
@@ -0,0 +1,253 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import Integer, cast, func, insert
+from sqlmodel import and_, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.app.core.ai.config import ai_settings
+from backend.app.core.ai.models import TransactionRiskScore, TransactionShadowScore
+from backend.app.core.ai.risk_models import RISK_FACTORS, RiskModel, get_shadow_models
+from backend.app.core.db import async_session
+from backend.app.core.logging import get_logger
+
+logger = get_logger()
+
+_AMOUNT = RISK_FACTORS.index("amount")
+_FREQUENCY = RISK_FACTORS.index("frequency")
+
+
+def final_scores(model: RiskModel, features: np.ndarray) -> np.ndarray:
+    # Same amplification and rounding as TransactionAnalyzer.final_score,
+    # applied to a whole batch of feature vectors at once
+    base_scores = model.score_matrix(features)
+    amplified = (features[:, _AMOUNT] > 0.7) & (features[:, _FREQUENCY] > 0.7)
+
+    return np.round(np.where(amplified, np.maximum(base_scores, 0.9), base_scores), 2)
+
+
+class ShadowScorer:
+    # Candidate models never run on the request path. The production scorer
+    # only enqueues the feature vector it already computed, a background task
+    # on the same event loop scores queued vectors in batches and writes them
+    # to the shadow score table.
+    def __init__(self):
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self.scored = 0
+        self.dropped = 0
+        self.excluded = 0
+
+    def submit(
+        self,
+        transaction_id: UUID,
+        risk_scores: dict[str, float] | None,
+        production_score: float,
+        production_version: str,
+    ) -> None:
+        if not get_shadow_models():
+            return
+
+        # Screened and failed analyses have no per-factor scores to replay,
+        # they are counted instead of being scored
+        if risk_scores is None:
+            self.excluded += 1
+            return
+
+        try:
+            if self._queue is None:
+                self._queue = asyncio.Queue(maxsize=ai_settings.SHADOW_QUEUE_SIZE)
+
+            if self._worker is None or self._worker.done():
+                self._worker = asyncio.get_running_loop().create_task(self._run())
+
+            self._queue.put_nowait(
+                (
+                    transaction_id,
+                    [risk_scores[factor] for factor in RISK_FACTORS],
+                    production_score,
+                    production_version,
+                )
+            )
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"Shadow scoring queue full, {self.dropped} dropped")
+        except Exception as e:
+            logger.error(f"Failed to queue shadow scoring for {transaction_id}: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+
+            while len(batch) < ai_settings.SHADOW_BATCH_SIZE and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                await self._write(batch)
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} shadow scores: {e}")
+
+    async def _write(self, batch: list[tuple]) -> None:
+        models = get_shadow_models()
+        if not models:
+            return
+
+        features = np.array([item[1] for item in batch], dtype=np.float64)
+        created_at = datetime.now(timezone.utc)
+
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "transaction_id": transaction_id,
+                "ai_model_version": model.version,
+                "risk_score": float(score),
+                "production_model_version": production_version,
+                "production_score": production_score,
+                "created_at": created_at,
+            }
+            for model in models
+            for (transaction_id, _, production_score, production_version), score in zip(
+                batch, final_scores(model, features)
+            )
+        ]
+
+        async with async_session() as session:
+            await session.execute(insert(TransactionShadowScore), rows)
+            await session.commit()
+
+        self.scored += len(batch)
+
+    async def stop(self) -> None:
+        # Write out whatever is still queued before the engine goes away
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+        if self._queue is None or self._queue.empty():
+            return
+
+        batch = []
+        while not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+
+        try:
+            await self._write(batch)
+        except Exception as e:
+            logger.error(f"Failed to write {len(batch)} shadow scores on shutdown: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "scored": self.scored,
+            "dropped": self.dropped,
+            "excluded": self.excluded,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+
+async def shadow_report(
+    session: AsyncSession,
+    start_date: datetime | None = None,
+    end_date: datetime | None = None,
+) -> list[dict]:
+    # Flag rate of every candidate next to production on the same transactions,
+    # how often both agree, and how each did on reviewed fraud
+    threshold = ai_settings.RISK_SCORE_TRESHOLD
+    shadow_flagged = TransactionShadowScore.risk_score >= threshold
+    production_flagged = TransactionShadowScore.production_score >= threshold
+    confirmed_fraud = TransactionRiskScore.is_confirmed_fraud.is_(True)
+
+    query = (
+        select(
+            TransactionShadowScore.ai_model_version,
+            func.count().label("transactions"),
+            func.avg(cast(shadow_flagged, Integer)).label("flag_rate"),
+            func.avg(cast(production_flagged, Integer)).label("production_flag_rate"),
+            func.avg(cast(shadow_flagged == production_flagged, Integer)).label(
+                "agreement"
+            ),
+            func.count().filter(shadow_flagged & ~production_flagged).label(
+                "only_shadow_flagged"
+            ),
+            func.count().filter(production_flagged & ~shadow_flagged).label(
+                "only_production_flagged"
+            ),
+            func.avg(
+                func.abs(
+                    TransactionShadowScore.risk_score
+                    - TransactionShadowScore.production_score
+                )
+            ).label("mean_score_difference"),
+            func.count().filter(confirmed_fraud).label("confirmed_fraud"),
+            func.count().filter(confirmed_fraud & shadow_flagged).label(
+                "confirmed_fraud_flagged"
+            ),
+            func.count().filter(confirmed_fraud & production_flagged).label(
+                "confirmed_fraud_production_flagged"
+            ),
+        )
+        .outerjoin(
+            TransactionRiskScore,
+            and_(
+                TransactionRiskScore.transaction_id
+                == TransactionShadowScore.transaction_id,
+                TransactionRiskScore.ai_model_version
+                == TransactionShadowScore.production_model_version,
+            ),
+        )
+        .group_by(TransactionShadowScore.ai_model_version)
+        .order_by(TransactionShadowScore.ai_model_version)
+    )
+
+    if start_date:
+        query = query.where(TransactionShadowScore.created_at >= start_date)
+
+    if end_date:
+        query = query.where(TransactionShadowScore.created_at <= end_date)
+
+    result = await session.exec(query)
+
+    return [
+        {
+            "model_version": row.ai_model_version,
+            "transactions": row.transactions,
+            "flag_rate": round(float(row.flag_rate), 4),
+            "production_flag_rate": round(float(row.production_flag_rate), 4),
+            "agreement": round(float(row.agreement), 4),
+            "only_shadow_flagged": row.only_shadow_flagged,
+            "only_production_flagged": row.only_production_flagged,
+            "mean_score_difference": round(float(row.mean_score_difference), 4),
+            "confirmed_fraud": row.confirmed_fraud,
+            "confirmed_fraud_flagged": row.confirmed_fraud_flagged,
+            "confirmed_fraud_production_flagged": row.confirmed_fraud_production_flagged,
+        }
+        for row in result.all()
+    ]
+
+
+async def screened_count(
+    session: AsyncSession,
+    start_date: datetime | None = None,
+    end_date: datetime | None = None,
+) -> int:
+    # Production scores settled by the screening stage, which never reach the
+    # shadow models, so the report compares them on the remaining traffic only
+    query = select(func.count()).where(
+        TransactionRiskScore.ai_model_version == ai_settings.MODEL_VERSION,
+        TransactionRiskScore.risk_factors.has_key("screening"),
+    )
+
+    if start_date:
+        query = query.where(TransactionRiskScore.created_at >= start_date)
+
+    if end_date:
+        query = query.where(TransactionRiskScore.created_at <= end_date)
+
+    result = await session.exec(query)
+    return result.one()
+
+
+shadow_scorer = ShadowScorer()
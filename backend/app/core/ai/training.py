@@ -0,0 +1,161 @@
+import argparse
+import asyncio
+import json
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from backend.app.core.ai.config import ai_settings
+from backend.app.core.ai.enums import AIReviewStatusEnum
+from backend.app.core.ai.models import TransactionRiskScore
+from backend.app.core.ai.risk_models import (
+    RISK_FACTORS,
+    RiskModel,
+    model_path,
+    train_logistic_regression,
+)
+from backend.app.core.config import settings
+from backend.app.core.logging import get_logger
+from backend.app.core.model_registry import load_models
+from backend.app.transaction.models import Transaction
+
+logger = get_logger()
+
+
+async def load_training_data(
+    source_version: str, include_cleared: bool = False, chunk_size: int = 10_000
+) -> tuple[np.ndarray, np.ndarray]:
+    # Features are the stored per-factor scores of source_version, labels come
+    # from fraud reviews. Transactions that were never flagged can be added as
+    # negatives, they passed the threshold and were not reported afterwards.
+    reviewed = TransactionRiskScore.is_confirmed_fraud.is_not(None)
+    if include_cleared:
+        reviewed = reviewed | (
+            Transaction.ai_review_status == AIReviewStatusEnum.CLEARED
+        )
+
+    query = (
+        select(
+            TransactionRiskScore.risk_factors,
+            TransactionRiskScore.is_confirmed_fraud,
+            Transaction.ai_review_status,
+        )
+        .join(Transaction, Transaction.id == TransactionRiskScore.transaction_id)
+        .where(TransactionRiskScore.ai_model_version == source_version, reviewed)
+        .execution_options(yield_per=chunk_size)
+    )
+
+    features: list[list[float]] = []
+    labels: list[int] = []
+
+    engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+    try:
+        async with engine.connect() as conn:
+            result = await conn.stream(query)
+
+            async for risk_factors, is_confirmed_fraud, review_status in result:
+                if not risk_factors or "error" in risk_factors:
+                    continue
+
+                # Screened transactions only stored bounds of their factors
+                if "screening" in risk_factors:
+                    continue
+
+                features.append(
+                    [float(risk_factors[name]["score"]) for name in RISK_FACTORS]
+                )
+                labels.append(
+                    int(
+                        bool(is_confirmed_fraud)
+                        or review_status == AIReviewStatusEnum.CONFIRMED_FRAUD
+                    )
+                )
+    finally:
+        await engine.dispose()
+
+    return (
+        np.array(features, dtype=np.float64).reshape(-1, len(RISK_FACTORS)),
+        np.array(labels, dtype=np.int8),
+    )
+
+
+def evaluate(model: RiskModel, features: np.ndarray, labels: np.ndarray) -> dict:
+    predicted = model.score_matrix(features) > ai_settings.RISK_SCORE_TRESHOLD
+    actual = labels.astype(bool)
+
+    true_positives = int(np.count_nonzero(predicted & actual))
+    false_positives = int(np.count_nonzero(predicted & ~actual))
+    false_negatives = int(np.count_nonzero(~predicted & actual))
+
+    flagged = true_positives + false_positives
+    fraud = true_positives + false_negatives
+
+    return {
+        "samples": int(labels.size),
+        "fraud": fraud,
+        "accuracy": round(float(np.mean(predicted == actual)), 4),
+        "precision": round(true_positives / flagged, 4) if flagged else None,
+        "recall": round(true_positives / fraud, 4) if fraud else None,
+        "flag_rate": round(flagged / labels.size, 4) if labels.size else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Train the logistic regression fraud model from reviewed scores"
+    )
+    parser.add_argument("--version", required=True, help="Version of the new model")
+    parser.add_argument(
+        "--source-version",
+        default=ai_settings.MODEL_VERSION,
+        help="Model version whose stored risk factors are used as features",
+    )
+    parser.add_argument("--include-cleared", action="store_true")
+    parser.add_argument("--epochs", type=int, default=2000)
+    parser.add_argument("--l2", type=float, default=1e-3)
+    parser.add_argument("--test-fraction", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    load_models()
+
+    features, labels = asyncio.run(
+        load_training_data(args.source_version, args.include_cleared)
+    )
+
+    order = np.random.default_rng(args.seed).permutation(labels.size)
+    test_size = int(labels.size * args.test_fraction)
+    test, train = order[:test_size], order[test_size:]
+
+    model = train_logistic_regression(
+        features[train],
+        labels[train],
+        version=args.version,
+        l2=args.l2,
+        epochs=args.epochs,
+    )
+
+    path = model_path(args.version)
+    model.save(path)
+
+    logger.info(f"Saved fraud model {args.version} to {path}")
+
+    print(
+        json.dumps(
+            {
+                "version": args.version,
+                "path": path,
+                "weights": model.factor_weights,
+                "bias": model.bias,
+                "train": evaluate(model, features[train], labels[train]),
+                "test": evaluate(model, features[test], labels[test]),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
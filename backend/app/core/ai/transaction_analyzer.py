@@ -1,12 +1,20 @@
 from datetime import datetime, timedelta, timezone
-from typing import Tuple
+from typing import Iterable, Tuple
 from uuid import UUID
 
-import numpy as np
-from sqlmodel import select
+from sqlmodel import func, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from backend.app.core.ai.config import ai_settings
+from backend.app.core.ai.feature_store import compare_summaries, feature_store
+from backend.app.core.ai.kernel import (
+    HistoryArrays,
+    HistorySummary,
+    HistoryView,
+    history_view,
+    to_epoch_us,
+)
+from backend.app.core.ai.risk_models import RiskModel, get_risk_model
 from backend.app.core.logging import get_logger
 from backend.app.core.utils.number_format import format_currency
 from backend.app.transaction.models import Transaction
@@ -14,8 +22,29 @@ from backend.app.transaction.models import Transaction
 logger = get_logger()
 
 
-class TransactionAnalyzer:
+class CascadeStats:
+    # Per-process counters of the screening stage
     def __init__(self):
+        self.screened = 0
+        self.early_exits = 0
+
+    def stats(self) -> dict:
+        return {
+            "screened": self.screened,
+            "early_exits": self.early_exits,
+            "early_exit_fraction": (
+                round(self.early_exits / self.screened, 4) if self.screened else 0.0
+            ),
+        }
+
+
+cascade_stats = CascadeStats()
+
+
+class TransactionAnalyzer:
+    def __init__(self, model: RiskModel | None = None):
+        # Without an explicit model the configured one is used
+        self.model = model
         self.features = [
             "amount",
             "time_of_day",
@@ -39,6 +68,142 @@ class TransactionAnalyzer:
         result = await session.exec(query)
         return list(result)
 
+    async def get_user_history_columns(
+        self,
+        user_id: UUID,
+        session: AsyncSession,
+        days: int = ai_settings.ANALYSIS_WINDOW_DAYS,
+        exclude: UUID | None = None,
+    ) -> HistoryArrays:
+        cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
+        query = select(Transaction.amount, Transaction.created_at).where(
+            Transaction.sender_id == user_id, Transaction.created_at >= cutoff_date
+        )
+        if exclude is not None:
+            query = query.where(Transaction.id != exclude)
+        result = await session.exec(query)
+        return HistoryArrays.from_rows(result.all())
+
+    async def get_user_history_summary(
+        self,
+        transaction: Transaction,
+        user_id: UUID,
+        session: AsyncSession,
+        days: int = ai_settings.ANALYSIS_WINDOW_DAYS,
+    ) -> HistorySummary:
+        cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
+        recent_cutoff = transaction.created_at - timedelta(hours=24)
+        is_recent = Transaction.created_at >= recent_cutoff
+
+        query = select(
+            func.count(),
+            func.avg(Transaction.amount),
+            func.count().filter(is_recent),
+            func.sum(Transaction.amount).filter(is_recent),
+            func.min(Transaction.created_at),
+            func.max(Transaction.created_at),
+            func.count().filter(
+                func.abs(Transaction.amount - transaction.amount) < 0.01
+            ),
+        ).where(Transaction.sender_id == user_id, Transaction.created_at >= cutoff_date)
+
+        result = await session.exec(query)
+        return HistorySummary.from_aggregates(*result.one())
+
+    async def get_user_recent_activity(
+        self,
+        transaction: Transaction,
+        user_id: UUID,
+        session: AsyncSession,
+        days: int = ai_settings.ANALYSIS_WINDOW_DAYS,
+    ) -> tuple[int, float | int]:
+        # Only reads the last 24 hours, the same rows the velocity checks see
+        cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
+        recent_cutoff = transaction.created_at - timedelta(hours=24)
+
+        query = select(func.count(), func.sum(Transaction.amount)).where(
+            Transaction.sender_id == user_id,
+            Transaction.created_at >= cutoff_date,
+            Transaction.created_at >= recent_cutoff,
+        )
+
+        result = await session.exec(query)
+        recent_count, recent_volume = result.one()
+
+        return recent_count, float(recent_volume) if recent_count else 0
+
+    def cascade_applies(self) -> bool:
+        # The aggregate query is already as cheap as the screening query
+        return ai_settings.CASCADE_ENABLED and (
+            ai_settings.FEATURE_STORE_ENABLED
+            or ai_settings.FEATURE_QUERY_MODE == "columns"
+        )
+
+    async def load_history(
+        self,
+        transaction: Transaction,
+        user_id: UUID,
+        session: AsyncSession,
+        days: int = ai_settings.ANALYSIS_WINDOW_DAYS,
+    ) -> HistoryView:
+        if ai_settings.FEATURE_STORE_ENABLED:
+            summary = feature_store.get_summary(user_id, transaction)
+
+            if summary is not None:
+                return summary
+
+        return await self.load_history_from_db(transaction, user_id, session, days)
+
+    async def load_history_from_db(
+        self,
+        transaction: Transaction,
+        user_id: UUID,
+        session: AsyncSession,
+        days: int = ai_settings.ANALYSIS_WINDOW_DAYS,
+        pending: bool = False,
+    ) -> HistoryView:
+        if ai_settings.FEATURE_STORE_ENABLED:
+            # Cold or stale profile, rebuild it from the analysis window. The
+            # profile only holds committed rows, a pending transaction is
+            # recorded by its caller after the commit.
+            history = await self.get_user_history_columns(
+                user_id, session, days, exclude=transaction.id if pending else None
+            )
+            feature_store.rebuild(user_id, history)
+
+            if pending:
+                return history.including(
+                    float(transaction.amount), to_epoch_us(transaction.created_at)
+                )
+            return history
+
+        if ai_settings.FEATURE_QUERY_MODE == "aggregate":
+            return await self.get_user_history_summary(
+                transaction, user_id, session, days
+            )
+        return await self.get_user_history_columns(user_id, session, days)
+
+    async def verify_feature_store(
+        self,
+        transaction: Transaction,
+        user_id: UUID,
+        session: AsyncSession,
+        days: int = ai_settings.ANALYSIS_WINDOW_DAYS,
+    ) -> dict | None:
+        stored = feature_store.get_summary(user_id, transaction)
+
+        if stored is None:
+            return None
+
+        history = await self.get_user_history_columns(user_id, session, days)
+
+        return compare_summaries(
+            stored,
+            history.summarize(
+                float(transaction.amount), to_epoch_us(transaction.created_at)
+            ),
+        )
+
     def _normalize_hour(self, hour: int) -> float:
         banking_hours = (ai_settings.BANKING_HOURS_START, ai_settings.BANKING_HOURS_END)
 
@@ -50,33 +215,31 @@ class TransactionAnalyzer:
             return ai_settings.OFF_HOURS_RISK
 
     def _calculate_frequency(
-        self, transaction: Transaction, history: list[Transaction]
+        self, transaction: Transaction, history: list[Transaction] | HistoryView
     ) -> float:
-        if not history:
-            return 0.5
-
-        timestamps = sorted([t.created_at for t in history])
+        view = history_view(history)
 
-        gaps = []
+        if not len(view):
+            return 0.5
 
-        for i in range(1, len(timestamps)):
-            gap = (timestamps[i] - timestamps[i - 1]).total_seconds() / 3600
-            gaps.append(gap)
+        gap_stats = view.mean_gap_hours()
 
-        if not gaps:
+        if gap_stats is None:
             return 0.5
 
-        avg_gap = float(np.mean(gaps))
+        avg_gap, last_timestamp = gap_stats
 
         if avg_gap == 0:
             return 1.0
 
-        current_gap = (transaction.created_at - timestamps[-1]).total_seconds() / 3600
+        current_gap = (
+            (to_epoch_us(transaction.created_at) - last_timestamp) / 1_000_000 / 3600
+        )
 
         return min(1.0, abs(1 - (current_gap / avg_gap)))
 
     def _check_round_amounts(
-        self, transaction: Transaction, history: list[Transaction]
+        self, transaction: Transaction, history: list[Transaction] | HistoryView
     ) -> float:
         amount = float(transaction.amount)
 
@@ -91,38 +254,46 @@ class TransactionAnalyzer:
         return risk_score
 
     def _check_repeated_amounts(
-        self, transaction: Transaction, history: list[Transaction]
+        self, transaction: Transaction, history: list[Transaction] | HistoryView
     ) -> float:
-        if not history:
+        view = history_view(history)
+
+        if not len(view):
             return 0.0
 
-        current_amount = float(transaction.amount)
-        same_amount_count = sum(
-            1 for t in history if abs(float(t.amount) - current_amount) < 0.01
-        )
+        same_amount_count = view.repeated_amount_count(float(transaction.amount))
 
-        return min(1.0, same_amount_count / len(history))
+        return min(1.0, same_amount_count / len(view))
 
     def _check_velocity(
-        self, transaction: Transaction, history: list[Transaction]
+        self,
+        transaction: Transaction,
+        history: list[Transaction] | HistoryView,
+        recent_activity: tuple[int, float | int] | None = None,
     ) -> dict:
-        if not history:
+        view = history_view(history)
+
+        if not len(view):
             return {"frequency_score": 0.0, "amount_velocity_score": 0.0}
 
-        recent_cutoff = transaction.created_at - timedelta(hours=24)
+        if recent_activity is None:
+            recent_activity = view.recent_activity(
+                to_epoch_us(transaction.created_at)
+            )
 
-        recent_transactions = [t for t in history if t.created_at >= recent_cutoff]
+        tx_count, recent_volume = recent_activity
 
-        if not recent_transactions:
+        if not tx_count:
             return {"frequency_score": 0.0, "amount_velocity_score": 0.0}
 
-        tx_count = len(recent_transactions)
+        return self._velocity_scores(transaction, tx_count, recent_volume)
 
+    def _velocity_scores(
+        self, transaction: Transaction, tx_count: int, recent_volume: float | int
+    ) -> dict:
         freq_score = min(1.0, tx_count / ai_settings.FREQUENCY_THRESHOLD)
 
-        total_volume = sum(float(t.amount) for t in recent_transactions) + float(
-            transaction.amount
-        )
+        total_volume = recent_volume + float(transaction.amount)
 
         amount_velocity_score = min(1.0, total_volume / ai_settings.VELOCITY_THRESHOLD)
 
@@ -154,15 +325,23 @@ class TransactionAnalyzer:
         )
 
     def _detect_patterns(
-        self, transaction: Transaction, history: list[Transaction]
+        self,
+        transaction: Transaction,
+        history: list[Transaction] | HistoryView,
+        velocity_metrics: dict | None = None,
     ) -> float:
-        if not history:
+        view = history_view(history)
+
+        if not len(view):
             return 0.5
 
+        if velocity_metrics is None:
+            velocity_metrics = self._check_velocity(transaction, view)
+
         patterns = {
-            "round_amounts": self._check_round_amounts(transaction, history),
-            "repeated_amounts": self._check_repeated_amounts(transaction, history),
-            "velocity": self._check_velocity(transaction, history)["combined_score"],
+            "round_amounts": self._check_round_amounts(transaction, view),
+            "repeated_amounts": self._check_repeated_amounts(transaction, view),
+            "velocity": velocity_metrics["combined_score"],
         }
         return sum(
             score * ai_settings.PATTERN_WEIGHTS[pattern]
@@ -170,19 +349,21 @@ class TransactionAnalyzer:
         )
 
     def extract_features(
-        self, transaction: Transaction, history: list[Transaction]
+        self,
+        transaction: Transaction,
+        history: list[Transaction] | HistoryView,
+        velocity_metrics: dict | None = None,
     ) -> dict:
+        view = history_view(history)
+
+        if velocity_metrics is None:
+            velocity_metrics = self._check_velocity(transaction, view)
+
         features = {}
 
         features["amount"] = float(transaction.amount)
 
-        amounts = (
-            [float(t.amount) for t in history]
-            if history
-            else [float(transaction.amount)]
-        )
-
-        avg_amount = float(np.mean(amounts))
+        avg_amount = view.mean_amount() if len(view) else features["amount"]
 
         features["amount_ratio"] = features["amount"] / avg_amount if avg_amount else 1
 
@@ -192,102 +373,268 @@ class TransactionAnalyzer:
 
         features["day_of_week"] = transaction.created_at.weekday() / 6
 
-        features["frequency"] = self._calculate_frequency(transaction, history)
-
-        features["pattern_match"] = self._detect_patterns(transaction, history)
+        features["frequency"] = self._calculate_frequency(transaction, view)
 
-        velocity_metrics = self._check_velocity(transaction, history)
+        features["pattern_match"] = self._detect_patterns(
+            transaction, view, velocity_metrics
+        )
 
         features["velocity_amount"] = velocity_metrics["amount_velocity_score"]
 
         return features
 
-    async def analyze_transaction(
-        self, transaction: Transaction, user_id: UUID, session: AsyncSession
-    ) -> Tuple[float, dict]:
-        try:
-            history = await self.get_user_transaction_history(
-                user_id, session, ai_settings.ANALYSIS_WINDOW_DAYS
-            )
+    @property
+    def risk_model(self) -> RiskModel:
+        return self.model or get_risk_model()
 
-            features = self.extract_features(transaction, history)
+    def screen_transaction(
+        self,
+        transaction: Transaction,
+        recent_count: int,
+        recent_volume: float | int,
+    ) -> Tuple[float, dict] | None:
+        # First stage of the cascade. Amount, time and 24h activity fix every
+        # factor except the amount ratio and the repeated amount share, which
+        # both depend on the full history and are taken at their worst case.
+        # Returns the upper bound of the final score and a compact factor
+        # summary when that bound cannot reach the threshold, otherwise None.
+        cascade_stats.screened += 1
+
+        # An empty 24h window takes a different (error) path in the full analysis
+        if not recent_count:
+            return None
 
-            velocity_metrics = self._check_velocity(transaction, history)
+        amount = float(transaction.amount)
+        velocity_metrics = self._velocity_scores(
+            transaction, recent_count, recent_volume
+        )
+        pattern_weights = ai_settings.PATTERN_WEIGHTS
+        known_patterns = (
+            self._check_round_amounts(transaction, [])
+            * pattern_weights["round_amounts"]
+            + velocity_metrics["combined_score"] * pattern_weights["velocity"]
+        )
+        time_risk = self._calculate_time_risk(
+            self._normalize_hour(transaction.created_at.hour),
+            transaction.created_at.weekday() / 6,
+        )
 
-            risk_scores = {
-                "amount": self._calculate_amount_risk(
-                    features["amount_ratio"], float(transaction.amount)
-                ),
-                "time": self._calculate_time_risk(
-                    features["time_of_day"], features["day_of_week"]
-                ),
-                "frequency": velocity_metrics["frequency_score"],
-                "pattern": features["pattern_match"],
-                "velocity_amount": velocity_metrics["amount_velocity_score"],
-            }
+        lower = {
+            "amount": min(1.0, amount / ai_settings.HIGH_AMOUNT_THRESHOLD),
+            "time": time_risk,
+            "frequency": velocity_metrics["frequency_score"],
+            "pattern": known_patterns,
+            "velocity_amount": velocity_metrics["amount_velocity_score"],
+        }
+        upper = dict(
+            lower,
+            amount=1.0,
+            pattern=known_patterns + pattern_weights["repeated_amounts"],
+        )
 
-            weights = ai_settings.RISK_WEIGHTS
+        upper_bound = self.risk_model.upper_bound(lower, upper)
 
-            base_score = sum(
-                score * weights[factor] for factor, score in risk_scores.items()
-            )
+        if upper["amount"] > 0.7 and upper["frequency"] > 0.7:
+            upper_bound = max(upper_bound, 0.9)
 
-            final_score = (
-                max(base_score, 0.9)
-                if (risk_scores["amount"] > 0.7 and risk_scores["frequency"] > 0.7)
-                else base_score
-            )
+        # The margin absorbs float differences between SQL and NumPy sums
+        if round(upper_bound + 1e-9, 2) >= ai_settings.RISK_SCORE_TRESHOLD:
+            return None
 
-            final_score = round(final_score, 2)
+        cascade_stats.early_exits += 1
 
-            high_risk_triggers = []
+        risk_factors = {
+            "screening": {
+                "stage": "screen",
+                "upper_bound": round(upper_bound, 4),
+                "threshold": ai_settings.RISK_SCORE_TRESHOLD,
+                "bounds": {
+                    factor: [round(lower[factor], 2), round(upper[factor], 2)]
+                    for factor in lower
+                },
+            },
+            "transaction_summary": {
+                "amount": format_currency(str(transaction.amount)),
+                "time": transaction.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+                "24h_total_volume": str(recent_volume),
+                "24h_transaction_count": recent_count,
+            },
+        }
 
-            if final_score > ai_settings.HIGH_RISK_SCORE_THRESHOLD:
-                if risk_scores["amount"] > 0.7:
-                    high_risk_triggers.append("high_amount")
+        # The stored score of a screened transaction is its upper bound
+        return round(upper_bound, 2), risk_factors
 
-                if risk_scores["frequency"] > 0.7:
-                    high_risk_triggers.append("high_frequency")
+    def calculate_risk_scores(
+        self, transaction: Transaction, history: list[Transaction] | HistoryView
+    ) -> tuple[dict[str, float], int, float | int]:
+        # Per-factor risk scores plus the 24h activity they were derived from
+        view = history_view(history)
 
-                if risk_scores["velocity_amount"] > 0.7:
-                    high_risk_triggers.append("high_velocity")
+        recent_count, recent_volume = view.recent_activity(
+            to_epoch_us(transaction.created_at)
+        )
 
-            risk_factors = {
-                factor: {
-                    "score": round(score, 2),
-                    "weight": weights[factor],
-                    "contribution": round(score * weights[factor], 2),
-                }
-                for factor, score in risk_scores.items()
-            }
+        velocity_metrics = self._check_velocity(
+            transaction, view, (recent_count, recent_volume)
+        )
 
-            risk_factors["risk_triggers"] = {
-                "triggers": high_risk_triggers,
-                "score": final_score,
-                "threshold": ai_settings.HIGH_RISK_SCORE_THRESHOLD,
-            }
+        features = self.extract_features(transaction, view, velocity_metrics)
+
+        risk_scores = {
+            "amount": self._calculate_amount_risk(
+                features["amount_ratio"], float(transaction.amount)
+            ),
+            "time": self._calculate_time_risk(
+                features["time_of_day"], features["day_of_week"]
+            ),
+            "frequency": velocity_metrics["frequency_score"],
+            "pattern": features["pattern_match"],
+            "velocity_amount": velocity_metrics["amount_velocity_score"],
+        }
+        return risk_scores, recent_count, recent_volume
 
-            risk_factors["transaction_summary"] = {
-                "amount": format_currency(str(transaction.amount)),
-                "time": transaction.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                "24h_total_volume": str(
-                    sum(
-                        float(t.amount)
-                        for t in history
-                        if (transaction.created_at - t.created_at).total_seconds()
-                        <= 86400
-                    )
-                ),
-                "24h_transaction_count": len(
-                    [
-                        t
-                        for t in history
-                        if (transaction.created_at - t.created_at).total_seconds()
-                        <= 86400
-                    ]
-                ),
+    def final_score(
+        self, risk_scores: dict[str, float], model: RiskModel | None = None
+    ) -> float:
+        base_score = (model or self.risk_model).score(risk_scores)
+
+        final_score = (
+            max(base_score, 0.9)
+            if (risk_scores["amount"] > 0.7 and risk_scores["frequency"] > 0.7)
+            else base_score
+        )
+
+        return round(final_score, 2)
+
+    def score_transaction(
+        self, transaction: Transaction, history: list[Transaction] | HistoryView
+    ) -> Tuple[float, dict]:
+        risk_scores, recent_count, recent_volume = self.calculate_risk_scores(
+            transaction, history
+        )
+        return self.build_risk_factors(
+            transaction, risk_scores, recent_count, recent_volume
+        )
+
+    def build_risk_factors(
+        self,
+        transaction: Transaction,
+        risk_scores: dict[str, float],
+        recent_count: int,
+        recent_volume: float | int,
+    ) -> Tuple[float, dict]:
+        model = self.risk_model
+        weights = model.factor_weights
+
+        final_score = self.final_score(risk_scores, model)
+
+        high_risk_triggers = []
+
+        if final_score > ai_settings.HIGH_RISK_SCORE_THRESHOLD:
+            if risk_scores["amount"] > 0.7:
+                high_risk_triggers.append("high_amount")
+
+            if risk_scores["frequency"] > 0.7:
+                high_risk_triggers.append("high_frequency")
+
+            if risk_scores["velocity_amount"] > 0.7:
+                high_risk_triggers.append("high_velocity")
+
+        risk_factors = {
+            factor: {
+                "score": round(score, 2),
+                "weight": weights[factor],
+                "contribution": round(score * weights[factor], 2),
             }
-            return final_score, risk_factors
+            for factor, score in risk_scores.items()
+        }
+
+        risk_factors["risk_triggers"] = {
+            "triggers": high_risk_triggers,
+            "score": final_score,
+            "threshold": ai_settings.HIGH_RISK_SCORE_THRESHOLD,
+        }
+
+        risk_factors["transaction_summary"] = {
+            "amount": format_currency(str(transaction.amount)),
+            "time": transaction.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "24h_total_volume": str(recent_volume),
+            "24h_transaction_count": recent_count,
+        }
+        return final_score, risk_factors
+
+    def score_batch(
+        self, items: Iterable[tuple[Transaction, list[Transaction] | HistoryView]]
+    ) -> list[Tuple[float, dict]]:
+        results = []
+
+        for transaction, history in items:
+            try:
+                results.append(self.score_transaction(transaction, history))
+            except Exception as e:
+                logger.error(f"Error scoring transaction: {str(e)}")
+                results.append((0.8, {"error": str(e)}))
+
+        return results
+
+    async def analyze_transaction(
+        self, transaction: Transaction, user_id: UUID, session: AsyncSession
+    ) -> Tuple[float, dict]:
+        risk_score, risk_factors, _ = await self.analyze_with_risk_scores(
+            transaction, user_id, session
+        )
+        return risk_score, risk_factors
+
+    async def analyze_with_risk_scores(
+        self,
+        transaction: Transaction,
+        user_id: UUID,
+        session: AsyncSession,
+        pending: bool = False,
+    ) -> Tuple[float, dict, dict[str, float] | None]:
+        # Also hands back the per-factor scores so other models can reuse them,
+        # screened transactions have none. A pending transaction is flushed to
+        # the session's history but not yet recorded in the profile.
+        try:
+            view = None
+
+            if ai_settings.FEATURE_STORE_ENABLED:
+                view = feature_store.get_summary(user_id, transaction)
+
+            if view is not None and pending:
+                view = view.including(
+                    float(transaction.amount), to_epoch_us(transaction.created_at)
+                )
+
+            if view is None and self.cascade_applies():
+                recent_count, recent_volume = await self.get_user_recent_activity(
+                    transaction, user_id, session
+                )
+                screened = self.screen_transaction(
+                    transaction, recent_count, recent_volume
+                )
+
+                if screened is not None:
+                    feature_store.queue_rebuild([user_id])
+                    risk_score, risk_factors = screened
+                    return risk_score, risk_factors, None
+
+            if view is None:
+                view = await self.load_history_from_db(
+                    transaction,
+                    user_id,
+                    session,
+                    ai_settings.ANALYSIS_WINDOW_DAYS,
+                    pending=pending,
+                )
+
+            risk_scores, recent_count, recent_volume = self.calculate_risk_scores(
+                transaction, view
+            )
+            risk_score, risk_factors = self.build_risk_factors(
+                transaction, risk_scores, recent_count, recent_volume
+            )
+            return risk_score, risk_factors, risk_scores
         except Exception as e:
             logger.error(f"Error analyzing transaction: {str(e)}")
-            return 0.8, {"error": str(e)}
+            return 0.8, {"error": str(e)}, None
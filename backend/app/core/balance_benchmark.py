@@ -0,0 +1,196 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from decimal import Decimal
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.app.auth.models import User
+from backend.app.bank_account.balance import (
+    adjust_balance,
+    load_total_balance,
+    set_balance_shards,
+)
+from backend.app.bank_account.models import BankAccount
+from backend.app.core.config import settings
+from backend.app.core.model_registry import load_models
+from backend.app.core.statement_benchmark import _account, _user
+
+SHARD_COUNTS = [0, 4, 16]
+CREDIT = Decimal("1.25")
+DEBIT = Decimal("2.00")
+
+
+async def _credit_worker(
+    engine: AsyncEngine, account: BankAccount, credits: int, hold_ms: float
+) -> None:
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        mine = await session.get(BankAccount, account.id)
+
+        for _ in range(credits):
+            await adjust_balance(session, mine, CREDIT)
+            # The rest of a payment, inserting its transaction row and so on,
+            # happens while the balance row is still locked
+            if hold_ms:
+                await asyncio.sleep(hold_ms / 1000)
+            await session.commit()
+
+
+async def _debit_worker(
+    engine: AsyncEngine, account: BankAccount, debits: int, hold_ms: float
+) -> Decimal:
+    # Debits of a sharded account fold the shards in when account_balance
+    # alone cannot cover them, racing the credits landing in those shards
+    paid = Decimal("0")
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        mine = await session.get(BankAccount, account.id)
+
+        for _ in range(debits):
+            if await adjust_balance(session, mine, -DEBIT) is not None:
+                paid += DEBIT
+            if hold_ms:
+                await asyncio.sleep(hold_ms / 1000)
+            await session.commit()
+
+    return paid
+
+
+async def measure_credits(
+    engine: AsyncEngine,
+    shards: int,
+    concurrency: int,
+    credits: int,
+    hold_ms: float,
+    debit_workers: int,
+) -> dict:
+    user = _user("merchant")
+    account = _account(user)
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        session.add_all([user, account])
+        await session.commit()
+
+    # Seeded data has to be committed, every worker has its own connection
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            if shards:
+                await set_balance_shards(session, account, shards)
+                await session.commit()
+
+        started = time.perf_counter()
+        _, *debited = await asyncio.gather(
+            asyncio.gather(
+                *(
+                    _credit_worker(engine, account, credits, hold_ms)
+                    for _ in range(concurrency)
+                )
+            ),
+            *(
+                _debit_worker(engine, account, credits, hold_ms)
+                for _ in range(debit_workers)
+            ),
+        )
+        wall_s = time.perf_counter() - started
+
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            final = await session.get(BankAccount, account.id)
+            balance = await load_total_balance(session, final)
+    finally:
+        async with AsyncSession(engine) as session:
+            await session.exec(
+                delete(BankAccount).where(BankAccount.id == account.id)
+            )
+            await session.exec(delete(User).where(User.id == user.id))
+            await session.commit()
+
+    paid = sum(debited, Decimal("0"))
+    expected = CREDIT * concurrency * credits - paid
+
+    return {
+        "credits": concurrency * credits,
+        "credits_per_s": round(concurrency * credits / wall_s, 1),
+        "debits": int(paid / DEBIT),
+        "debits_refused": debit_workers * credits - int(paid / DEBIT),
+        "wall_s": round(wall_s, 3),
+        "consistent": balance.quantize(Decimal("0.01")) == expected
+        and balance >= 0,
+    }
+
+
+async def run_benchmarks(
+    shard_counts: list[int],
+    concurrency: int,
+    credits: int,
+    hold_ms: float,
+    debit_workers: int,
+) -> dict:
+    engine = create_async_engine(
+        settings.DATABASE_URL,
+        pool_size=concurrency + debit_workers + 1,
+        max_overflow=0,
+    )
+    results = {}
+
+    try:
+        for shards in shard_counts:
+            results[str(shards)] = await measure_credits(
+                engine, shards, concurrency, credits, hold_ms, debit_workers
+            )
+            print(
+                f"{shards} shards: {results[str(shards)]['credits_per_s']} credits/s",
+                file=sys.stderr,
+            )
+    finally:
+        await engine.dispose()
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Credit one seeded account from concurrent sessions while "
+        "others debit it, with and without balance shards, and check that no "
+        "credit is lost when the shards are folded in"
+    )
+    parser.add_argument("--shards", type=int, nargs="+", default=SHARD_COUNTS)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--credits", type=int, default=100)
+    parser.add_argument(
+        "--hold-ms",
+        type=float,
+        default=2.0,
+        help="Time each credit keeps its transaction open after the update",
+    )
+    parser.add_argument(
+        "--debit-workers",
+        type=int,
+        default=4,
+        help="Sessions debiting the account meanwhile, which folds the shards",
+    )
+    args = parser.parse_args()
+
+    load_models()
+
+    results = asyncio.run(
+        run_benchmarks(
+            args.shards,
+            args.concurrency,
+            args.credits,
+            args.hold_ms,
+            args.debit_workers,
+        )
+    )
+    print(json.dumps({"results": results}, indent=2))
+
+    if not all(result["consistent"] for result in results.values()):
+        print("Balance check failed", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
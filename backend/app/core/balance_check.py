@@ -0,0 +1,144 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from decimal import Decimal
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.app.auth.models import User
+from backend.app.bank_account.balance import adjust_balance
+from backend.app.bank_account.models import BankAccount
+from backend.app.core.config import settings
+from backend.app.core.model_registry import load_models
+from backend.app.core.statement_benchmark import _account, _user
+
+STARTING_BALANCE = Decimal("1000.00")
+
+
+def _deltas(operations: int, seed: int) -> list[Decimal]:
+    # Withdrawals outweigh deposits, so the guard has to refuse some of them
+    rng = random.Random(seed)
+    return [
+        Decimal(rng.randint(1, 5000)) / 100 * (-1 if rng.random() < 0.6 else 1)
+        for _ in range(operations)
+    ]
+
+
+async def _worker(
+    engine: AsyncEngine, account: BankAccount, deltas: list[Decimal], naive: bool
+) -> tuple[Decimal, int, Decimal]:
+    applied, refused, lowest = Decimal("0"), 0, STARTING_BALANCE
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        mine = await session.get(BankAccount, account.id)
+
+        for delta in deltas:
+            if naive:
+                # What the money paths did before, read, add in Python, write
+                await session.refresh(mine)
+                new_balance = Decimal(str(mine.account_balance)) + delta
+                if new_balance < 0:
+                    new_balance = None
+                else:
+                    mine.account_balance = float(new_balance)
+                    session.add(mine)
+            else:
+                new_balance = await adjust_balance(session, mine, delta)
+
+            await session.commit()
+
+            if new_balance is None:
+                refused += 1
+            else:
+                applied += delta
+                lowest = min(lowest, new_balance)
+
+    return applied, refused, lowest
+
+
+async def run_check(concurrency: int, operations: int, naive: bool) -> dict:
+    engine = create_async_engine(
+        settings.DATABASE_URL, pool_size=concurrency, max_overflow=0
+    )
+    user = _user("balance")
+    account = _account(user)
+    account.account_balance = float(STARTING_BALANCE)
+
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            session.add_all([user, account])
+            await session.commit()
+
+        # Seeded data has to be committed, every worker has its own connection
+        try:
+            started = time.perf_counter()
+            outcomes = await asyncio.gather(
+                *(
+                    _worker(engine, account, _deltas(operations, seed), naive)
+                    for seed in range(concurrency)
+                )
+            )
+            wall_s = time.perf_counter() - started
+
+            async with AsyncSession(engine) as session:
+                final = await session.get(BankAccount, account.id)
+                final_balance = Decimal(str(final.account_balance))
+        finally:
+            async with AsyncSession(engine) as session:
+                await session.exec(
+                    delete(BankAccount).where(BankAccount.id == account.id)
+                )
+                await session.exec(delete(User).where(User.id == user.id))
+                await session.commit()
+    finally:
+        await engine.dispose()
+
+    applied = sum((outcome[0] for outcome in outcomes), Decimal("0"))
+    expected = STARTING_BALANCE + applied
+    lowest = min(outcome[2] for outcome in outcomes)
+
+    return {
+        "mode": "naive" if naive else "atomic",
+        "concurrency": concurrency,
+        "operations": concurrency * operations,
+        "refused": sum(outcome[1] for outcome in outcomes),
+        "expected_balance": str(expected),
+        "final_balance": str(final_balance.quantize(Decimal("0.01"))),
+        "lowest_balance": str(lowest),
+        "consistent": final_balance.quantize(Decimal("0.01")) == expected
+        and lowest >= 0,
+        "ops_per_s": round(concurrency * operations / wall_s, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Hammer one seeded account from concurrent sessions and "
+        "check that no balance change is lost and it never goes negative"
+    )
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--operations", type=int, default=200)
+    parser.add_argument(
+        "--naive",
+        action="store_true",
+        help="Use the old read, compute, write update to show the lost updates",
+    )
+    args = parser.parse_args()
+
+    load_models()
+
+    result = asyncio.run(run_check(args.concurrency, args.operations, args.naive))
+    print(json.dumps(result, indent=2))
+
+    if not result["consistent"]:
+        print("Balance check failed", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
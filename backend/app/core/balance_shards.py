@@ -0,0 +1,68 @@
+import argparse
+import asyncio
+import json
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.app.bank_account.balance import set_balance_shards
+from backend.app.bank_account.models import BankAccount
+from backend.app.core.config import settings
+from backend.app.core.logging import get_logger
+from backend.app.core.model_registry import load_models
+
+logger = get_logger()
+
+
+async def shard_account(account_number: str, shards: int) -> dict:
+    engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            result = await session.exec(
+                select(BankAccount)
+                .where(BankAccount.account_number == account_number)
+                .with_for_update()
+            )
+            account = result.first()
+
+            if not account:
+                raise ValueError(f"Account {account_number} not found")
+
+            previous = account.balance_shards
+            balance = await set_balance_shards(session, account, shards)
+            await session.commit()
+    finally:
+        await engine.dispose()
+
+    logger.info(
+        f"Balance shards of {account_number} changed from {previous} to {shards}"
+    )
+    return {
+        "account_number": account_number,
+        "previous_shards": previous,
+        "shards": shards,
+        "balance": str(balance),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Spread the credits of a high-volume receiving account over "
+        "several balance rows, 0 folds them back into one"
+    )
+    parser.add_argument("--account-number", required=True)
+    parser.add_argument("--shards", type=int, required=True)
+    args = parser.parse_args()
+
+    if not 0 <= args.shards <= settings.BALANCE_MAX_SHARDS:
+        parser.error(f"--shards must be between 0 and {settings.BALANCE_MAX_SHARDS}")
+
+    load_models()
+
+    print(json.dumps(asyncio.run(shard_account(args.account_number, args.shards))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from decimal import Decimal
+
+from sqlalchemy import event
+
+from backend.app.api.services.bulk_transfer import (
+    complete_bulk_transfer,
+    initiate_bulk_transfer,
+)
+from backend.app.bank_account.models import BankAccount
+from backend.app.core.db import async_session, engine
+from backend.app.core.model_registry import load_models
+from backend.app.core.statement_benchmark import QueryCounter, _account, _user
+from backend.app.core.transfer_benchmark import _cleanup
+from backend.app.transaction.schema import BulkTransferLegSchema
+
+LEG_AMOUNT = Decimal("12.50")
+
+
+async def run_benchmark(legs: int, receivers: int) -> dict:
+    sender = _user("payroll")
+    sender_account = _account(sender)
+    sender_account.account_balance = float(LEG_AMOUNT * legs * 2)
+    payees = [_user(f"payee{index}") for index in range(receivers)]
+    payee_accounts = [_account(payee) for payee in payees]
+
+    async with async_session() as session:
+        session.add_all([sender, sender_account, *payees, *payee_accounts])
+        await session.commit()
+
+    batch = [
+        BulkTransferLegSchema(
+            receiver_account_number=payee_accounts[index % receivers].account_number,
+            amount=LEG_AMOUNT,
+        )
+        for index in range(legs)
+    ]
+
+    statements = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", statements)
+    phases = {}
+
+    try:
+        async with async_session() as session:
+            started = time.perf_counter()
+            batch_reference, initiated, initiating_user = await initiate_bulk_transfer(
+                sender_id=sender.id,
+                sender_account_id=sender_account.id,
+                legs=batch,
+                description="Bulk transfer benchmark",
+                security_answer=sender.security_answer,
+                session=session,
+            )
+            phases["initiate"] = {
+                "ms": round((time.perf_counter() - started) * 1000, 1),
+                "statements": statements.count,
+            }
+
+        statements.count = 0
+        async with async_session() as session:
+            started = time.perf_counter()
+            completed, _, _ = await complete_bulk_transfer(
+                sender_id=sender.id,
+                batch_reference=batch_reference,
+                otp=initiating_user.otp,
+                session=session,
+            )
+            phases["complete"] = {
+                "ms": round((time.perf_counter() - started) * 1000, 1),
+                "statements": statements.count,
+            }
+
+        async with async_session() as session:
+            final = await session.get(BankAccount, sender_account.id)
+            final_balance = Decimal(str(final.account_balance))
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", statements)
+        await _cleanup([sender, *payees])
+        await engine.dispose()
+
+    paid = sum(
+        (Decimal(leg["amount"]) for leg in completed if leg["status"] == "completed"),
+        Decimal("0"),
+    )
+
+    return {
+        "legs": legs,
+        "receivers": receivers,
+        "flagged": sum(1 for leg in initiated if leg["status"] == "failed"),
+        "completed": sum(1 for leg in completed if leg["status"] == "completed"),
+        "phases": phases,
+        "consistent": final_balance
+        == Decimal(str(sender_account.account_balance)) - paid,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Initiate and complete one bulk transfer to seeded accounts "
+        "and report the database round trips and time of each step"
+    )
+    parser.add_argument("--legs", type=int, default=5000)
+    parser.add_argument("--receivers", type=int, default=500)
+    args = parser.parse_args()
+
+    load_models()
+
+    result = asyncio.run(run_benchmark(args.legs, args.receivers))
+    print(
+        f"initiate {result['phases']['initiate']['ms']}ms, "
+        f"complete {result['phases']['complete']['ms']}ms",
+        file=sys.stderr,
+    )
+    print(json.dumps(result, indent=2))
+
+    if not result["consistent"]:
+        print("Balance check failed", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.schedules import crontab
 from backend.app.core.config import settings
 
 celery_app = Celery(
@@ -33,6 +34,13 @@ celery_app.conf.update(
     worker_task_log_format="[%(asctime)s: %(levelname)s/%(processName)s][%(task_name)s(%(task_id)s)] %(message)s",
 )
 
+celery_app.conf.beat_schedule = {
+    "prerender-month-statements": {
+        "task": "prerender_month_statements",
+        "schedule": crontab(minute=0, hour=1, day_of_month=1),
+    },
+}
+
 celery_app.autodiscover_tasks(
     packages=["backend.app.core.tasks"],
     related_name="tasks",
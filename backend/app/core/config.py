@@ -77,6 +77,41 @@ class Settings(BaseSettings):
     CURRENCY_CODE_PLN: str = ""
     MAX_BANK_ACCOUNTS: int = 3
 
+    # Rows fetched per round trip when the statement task streams transactions
+    STATEMENT_CHUNK_SIZE: int = 1000
+    # platypus lays the table out with flowables, canvas draws it directly
+    STATEMENT_DEFAULT_RENDERER: str = "platypus"
+    # Statements of several accounts or long periods are rendered as sections
+    # on parallel workers and merged, ranges longer than STATEMENT_FANOUT_MONTHS
+    # are split by calendar month
+    STATEMENT_FANOUT_ENABLED: bool = True
+    STATEMENT_FANOUT_MONTHS: int = 3
+    STATEMENT_FANOUT_MAX_SECTIONS: int = 24
+    # Month-end statements of every active account, rendered by beat on the
+    # first of the month in batches of STATEMENT_PRERENDER_BATCH_SIZE
+    STATEMENT_PRERENDER_ENABLED: bool = True
+    STATEMENT_PRERENDER_BATCH_SIZE: int = 50
+    STATEMENT_PRERENDER_TTL_SECONDS: int = 35 * 24 * 3600
+    # Rows fetched and encoded per chunk of a transaction export
+    EXPORT_CHUNK_SIZE: int = 1000
+    # Upper bound on the balance rows a sharded account spreads credits over
+    BALANCE_MAX_SHARDS: int = 64
+    # Legs accepted by one bulk transfer. Each adds three bind parameters to
+    # the UPDATE that completes the batch, one statement carries at most 32767.
+    BULK_TRANSFER_MAX_LEGS: int = 5000
+    # Teller CSV deposits are posted in chunks, one database transaction each
+    BULK_DEPOSIT_MAX_BYTES: int = 20 * 1024 * 1024
+    BULK_DEPOSIT_CHUNK_ROWS: int = 5000
+    BULK_DEPOSIT_UPLOAD_TTL_SECONDS: int = 24 * 3600
+    # Who queued each batch and its report, read by the status endpoint
+    BULK_DEPOSIT_REPORT_TTL_SECONDS: int = 7 * 24 * 3600
+    # Responses of money-moving requests are kept for retries with the same
+    # Idempotency-Key. A duplicate that arrives while the first is running
+    # waits for its response, at most as long as the first holds the key.
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24
+    IDEMPOTENCY_LOCK_SECONDS: int = 30
+    IDEMPOTENCY_POLL_MS: int = 50
+
 
 settings = Settings()
 
@@ -0,0 +1,285 @@
+import asyncio
+import json
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from redis import Redis, RedisError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.app.core.config import settings
+from backend.app.core.logging import get_logger
+from backend.app.transaction.models import IdempotencyKey
+
+logger = get_logger()
+
+RESPONSE_PREFIX = "idempotency:response"
+LOCK_PREFIX = "idempotency:lock"
+METRICS_KEY = "idempotency:metrics"
+
+# hits and db_hits are answered from a stored response, coalesced ones by
+# waiting for the request that held the key
+OUTCOMES = ["hits", "db_hits", "coalesced", "executed", "timeouts", "redis_errors"]
+
+# Only the request that took the lock may release it
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Extends the lock only while this request still holds it
+RENEW_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class IdempotencyClaim:
+    # Handed to the route: either the stored response of an earlier request
+    # with the same key, or the right to execute and save its own
+    def __init__(
+        self,
+        store: "IdempotencyStore",
+        scope: str,
+        key: str | None,
+        user_id: uuid.UUID,
+        endpoint: str,
+        session: AsyncSession,
+        response: dict | None = None,
+    ):
+        self.store = store
+        self.scope = scope
+        self.key = key
+        self.user_id = user_id
+        self.endpoint = endpoint
+        self.session = session
+        self.response = response
+
+    async def save(self, response, response_code: int) -> None:
+        # The database row is the durable copy, Redis answers the retries
+        if self.key is None:
+            return
+
+        body = jsonable_encoder(response)
+        expires_at = datetime.now(timezone.utc) + timedelta(
+            hours=settings.IDEMPOTENCY_KEY_TTL_HOURS
+        )
+
+        self.session.add(
+            IdempotencyKey(
+                key=self.key,
+                user_id=self.user_id,
+                endpoint=self.endpoint,
+                response_code=response_code,
+                response_body=body,
+                expires_at=expires_at,
+            )
+        )
+        await self.session.commit()
+
+        self.store.cache(self.scope, body, expires_at)
+
+
+class IdempotencyStore:
+    def __init__(self):
+        self._client: Redis | None = None
+        self._release_script = None
+        self._renew_script = None
+
+    @property
+    def client(self) -> Redis:
+        if self._client is None:
+            self._client = Redis(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                db=settings.REDIS_DB,
+                decode_responses=True,
+            )
+        return self._client
+
+    def cache(self, scope: str, body: dict, expires_at: datetime) -> None:
+        ttl = int((expires_at - datetime.now(timezone.utc)).total_seconds())
+        if ttl <= 0:
+            return
+
+        try:
+            self.client.set(f"{RESPONSE_PREFIX}:{scope}", json.dumps(body), ex=ttl)
+        except RedisError as e:
+            logger.warning(f"Failed to cache idempotent response: {e}")
+
+    def record(self, outcome: str) -> None:
+        try:
+            self.client.hincrby(METRICS_KEY, outcome, 1)
+        except RedisError as e:
+            logger.warning(f"Failed to record idempotency {outcome}: {e}")
+
+    def stats(self) -> dict:
+        counts = self.client.hgetall(METRICS_KEY)
+        stats = {outcome: int(counts.get(outcome, 0)) for outcome in OUTCOMES}
+        requests = stats["hits"] + stats["db_hits"] + stats["coalesced"]
+        requests += stats["executed"]
+
+        stats["replay_ratio"] = (
+            round((requests - stats["executed"]) / requests, 4) if requests else 0.0
+        )
+        return stats
+
+    def _release(self, lock_key: str, token: str) -> None:
+        try:
+            if self._release_script is None:
+                self._release_script = self.client.register_script(
+                    RELEASE_LOCK_SCRIPT
+                )
+            self._release_script(keys=[lock_key], args=[token])
+        except RedisError as e:
+            # It expires on its own
+            logger.warning(f"Failed to release idempotency lock: {e}")
+
+    async def _renew(self, lock_key: str, token: str) -> None:
+        # Keeps the lock alive while the operation runs, however long it
+        # takes, so a duplicate never finds it expired and runs it again.
+        # Duplicates still give up with a 409 after IDEMPOTENCY_LOCK_SECONDS.
+        interval = settings.IDEMPOTENCY_LOCK_SECONDS / 3
+
+        while True:
+            await asyncio.sleep(interval)
+
+            try:
+                if self._renew_script is None:
+                    self._renew_script = self.client.register_script(
+                        RENEW_LOCK_SCRIPT
+                    )
+                renewed = self._renew_script(
+                    keys=[lock_key],
+                    args=[token, settings.IDEMPOTENCY_LOCK_SECONDS * 1000],
+                )
+            except RedisError as e:
+                logger.warning(f"Failed to renew idempotency lock: {e}")
+                continue
+
+            if not renewed:
+                logger.warning(f"Idempotency lock {lock_key} was lost")
+                return
+
+    async def _acquire(self, scope: str, token: str) -> dict | bool:
+        # The stored response, or True once this request holds the lock.
+        # Duplicates arriving while another request holds it poll for its
+        # response rather than running the operation a second time.
+        response_key = f"{RESPONSE_PREFIX}:{scope}"
+        lock_key = f"{LOCK_PREFIX}:{scope}"
+        deadline = time.monotonic() + settings.IDEMPOTENCY_LOCK_SECONDS
+        waited = False
+
+        while True:
+            cached = self.client.get(response_key)
+            if cached is not None:
+                self.record("coalesced" if waited else "hits")
+                return json.loads(cached)
+
+            if self.client.set(
+                lock_key, token, nx=True, ex=settings.IDEMPOTENCY_LOCK_SECONDS
+            ):
+                return True
+
+            if time.monotonic() >= deadline:
+                self.record("timeouts")
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail={
+                        "status": "error",
+                        "message": "A request with this idempotency key is still "
+                        "being processed",
+                        "action": "Please retry shortly",
+                    },
+                )
+
+            waited = True
+            await asyncio.sleep(settings.IDEMPOTENCY_POLL_MS / 1000)
+
+    @asynccontextmanager
+    async def claim(
+        self,
+        *,
+        key: str | None,
+        user_id: uuid.UUID,
+        endpoint: str,
+        session: AsyncSession,
+    ) -> AsyncIterator[IdempotencyClaim]:
+        scope = f"{user_id}:{endpoint}:{key}"
+
+        # Routes where the key is optional run as before without one
+        if key is None:
+            yield IdempotencyClaim(self, scope, key, user_id, endpoint, session)
+            return
+
+        lock_key = f"{LOCK_PREFIX}:{scope}"
+        token = uuid.uuid4().hex
+        locked = False
+        renewal = None
+
+        try:
+            acquired = await self._acquire(scope, token)
+        except RedisError as e:
+            # Without Redis the database alone answers retries, concurrent
+            # duplicates are no longer held back
+            logger.warning(f"Idempotency store unavailable: {e}")
+            acquired = True
+        else:
+            locked = acquired is True
+
+        if isinstance(acquired, dict):
+            yield IdempotencyClaim(
+                self, scope, key, user_id, endpoint, session, response=acquired
+            )
+            return
+
+        if locked:
+            renewal = asyncio.get_running_loop().create_task(
+                self._renew(lock_key, token)
+            )
+
+        try:
+            # Redis may have lost the response, the database row outlives it
+            existing_result = await session.exec(
+                select(IdempotencyKey).where(
+                    IdempotencyKey.key == key,
+                    IdempotencyKey.user_id == user_id,
+                    IdempotencyKey.endpoint == endpoint,
+                    IdempotencyKey.expires_at > datetime.now(timezone.utc),
+                )
+            )
+            existing = existing_result.first()
+
+            if existing:
+                self.record("db_hits")
+                self.cache(scope, existing.response_body, existing.expires_at)
+                yield IdempotencyClaim(
+                    self,
+                    scope,
+                    key,
+                    user_id,
+                    endpoint,
+                    session,
+                    response=existing.response_body,
+                )
+                return
+
+            self.record("executed" if locked else "redis_errors")
+            yield IdempotencyClaim(self, scope, key, user_id, endpoint, session)
+        finally:
+            if renewal is not None:
+                renewal.cancel()
+            if locked:
+                self._release(lock_key, token)
+
+
+idempotency_store = IdempotencyStore()
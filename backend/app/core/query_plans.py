@@ -0,0 +1,290 @@
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Awaitable, Callable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.pool import NullPool
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from sqlmodel import desc, select
+
+from backend.app.api.services.export import transaction_export_query
+from backend.app.api.services.statement import statement_transactions_query
+from backend.app.api.services.transaction import (
+    risk_history_query,
+    transaction_history_query,
+)
+from backend.app.core.ai.enums import AIReviewStatusEnum
+from backend.app.core.ai.transaction_analyzer import TransactionAnalyzer
+from backend.app.core.config import settings
+from backend.app.core.model_registry import load_models
+from backend.app.transaction.enums import (
+    TransactionCategoryEnum,
+    TransactionStatusEnum,
+    TransactionTypeEnum,
+)
+from backend.app.transaction.models import Transaction
+
+# Temporary copies shadow the real tables for the rest of the session, they
+# keep every index but none of the rows, so the real data is never touched
+_SETUP = [
+    "CREATE TEMP TABLE transaction "
+    "(LIKE public.transaction INCLUDING DEFAULTS INCLUDING INDEXES) ON COMMIT DROP",
+    "CREATE TEMP TABLE transactionriskscore "
+    "(LIKE public.transactionriskscore INCLUDING DEFAULTS INCLUDING INDEXES) "
+    "ON COMMIT DROP",
+    "CREATE TEMP TABLE plan_party ON COMMIT DROP AS "
+    "SELECT n, gen_random_uuid() AS user_id, gen_random_uuid() AS account_id "
+    "FROM generate_series(1, {users}) AS n",
+]
+
+_SEED = [
+    """
+    INSERT INTO transaction (
+        id, amount, description, reference, transaction_type,
+        transaction_category, transaction_status, balance_before, balance_after,
+        sender_id, receiver_id, sender_account_id, receiver_account_id,
+        created_at, updated_at, ai_review_status
+    )
+    SELECT
+        gen_random_uuid(),
+        round((random() * 1000)::numeric, 2),
+        'Query plan check',
+        'PLAN' || g,
+        'Transfer',
+        'Debit',
+        (CASE WHEN random() < 0.95 THEN 'Completed' ELSE 'Pending' END)::transactionstatusenum,
+        0,
+        0,
+        sender.user_id,
+        receiver.user_id,
+        sender.account_id,
+        receiver.account_id,
+        now() - random() * interval '365 days',
+        now(),
+        (CASE WHEN random() < 0.005 THEN 'FLAGGED' ELSE 'CLEARED' END)::aireviewstatusenum
+    FROM generate_series(1, {rows}) AS g
+    JOIN plan_party AS sender ON sender.n = 1 + (g * 7919) % {users}
+    JOIN plan_party AS receiver ON receiver.n = 1 + (g * 104729 + 13) % {users}
+    """,
+    """
+    INSERT INTO transactionriskscore (
+        id, transaction_id, risk_score, risk_factors, ai_model_version, created_at
+    )
+    SELECT gen_random_uuid(), id, random(), '{{}}'::jsonb, '1.0.0', created_at
+    FROM transaction
+    """,
+    "ANALYZE transaction",
+    "ANALYZE transactionriskscore",
+]
+
+_CHECKED_RELATIONS = {"transaction"}
+_INDEX_SCANS = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+
+class _Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement, analyze: bool = False):
+        self.statement = statement
+        self.analyze = analyze
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element: _Explain, compiler, **kw) -> str:
+    options = "ANALYZE, BUFFERS, " if element.analyze else ""
+    return f"EXPLAIN ({options}FORMAT JSON) " + compiler.process(
+        element.statement, **kw
+    )
+
+
+class _Captured(Exception):
+    def __init__(self, statement):
+        self.statement = statement
+
+
+class _CapturingSession:
+    # Stands in for the session of an analyzer query method, the first
+    # statement it is asked to run is handed back instead of executed
+    async def exec(self, statement):
+        raise _Captured(statement)
+
+
+async def _capture(method: Callable[..., Awaitable], *args):
+    try:
+        await method(*args, _CapturingSession())
+    except _Captured as captured:
+        return captured.statement
+
+    raise RuntimeError(f"{method.__name__} did not run a query")
+
+
+def _walk(node: dict):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+
+def inspect_plan(plan: dict) -> dict:
+    scans = []
+    for node in _walk(plan["Plan"]):
+        relation = node.get("Relation Name")
+        index = node.get("Index Name")
+        if relation or index:
+            scans.append(
+                {"node": node["Node Type"], "relation": relation, "index": index}
+            )
+
+    # Bitmap index scans carry no relation name, their heap scan above does
+    sequential = [
+        scan
+        for scan in scans
+        if scan["node"] == "Seq Scan" and scan["relation"] in _CHECKED_RELATIONS
+    ]
+    indexed = [scan for scan in scans if scan["node"] in _INDEX_SCANS]
+
+    report = {
+        "ok": not sequential and bool(indexed),
+        "indexes": sorted({scan["index"] for scan in indexed}),
+        "scans": scans,
+        "total_cost": plan["Plan"]["Total Cost"],
+    }
+
+    if "Execution Time" in plan:
+        report["execution_ms"] = plan["Execution Time"]
+
+    return report
+
+
+async def hot_queries(conn: AsyncConnection) -> dict:
+    result = await conn.execute(
+        text("SELECT user_id, account_id FROM plan_party WHERE n = 1")
+    )
+    user_id, account_id = result.one()
+
+    now = datetime.now(timezone.utc)
+    start_date = now - timedelta(days=30)
+    transaction = Transaction(
+        amount=Decimal("120.00"),
+        description="Query plan check",
+        reference="PLANCHECK",
+        transaction_type=TransactionTypeEnum.Transfer,
+        transaction_category=TransactionCategoryEnum.Debit,
+        transaction_status=TransactionStatusEnum.Completed,
+        balance_before=Decimal("0"),
+        balance_after=Decimal("0"),
+        sender_id=user_id,
+        created_at=now,
+    )
+    analyzer = TransactionAnalyzer()
+
+    return {
+        "analyzer.get_user_transaction_history": await _capture(
+            analyzer.get_user_transaction_history, user_id
+        ),
+        "analyzer.get_user_history_columns": await _capture(
+            analyzer.get_user_history_columns, user_id
+        ),
+        "analyzer.get_user_history_summary": await _capture(
+            analyzer.get_user_history_summary, transaction, user_id
+        ),
+        "analyzer.get_user_recent_activity": await _capture(
+            analyzer.get_user_recent_activity, transaction, user_id
+        ),
+        "get_user_transactions": transaction_history_query(user_id, [account_id]),
+        "get_user_transactions.date_range": transaction_history_query(
+            user_id, [account_id], start_date=start_date, end_date=now
+        ),
+        "export_transactions": transaction_export_query(user_id, [account_id]),
+        "prepare_statement_data": statement_transactions_query(
+            [account_id], start_date, now
+        ),
+        "get_user_risk_history": risk_history_query(user_id).offset(0).limit(20),
+        "flagged_review_queue": select(Transaction)
+        .where(Transaction.ai_review_status == AIReviewStatusEnum.FLAGGED)
+        .order_by(desc(Transaction.created_at))
+        .limit(50),
+    }
+
+
+async def check_plans(rows: int, users: int, analyze: bool) -> dict:
+    engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+    reports = {}
+
+    try:
+        async with engine.connect() as conn:
+            # Everything runs in one transaction that is rolled back at the end
+            async with conn.begin() as transaction:
+                # Utility statements take no bind parameters, both are ints
+                for statement in _SETUP + _SEED:
+                    await conn.execute(
+                        text(statement.format(rows=int(rows), users=int(users)))
+                    )
+
+                # The copies get generated index names, their definitions
+                # tell which of the real indexes a plan used
+                result = await conn.execute(
+                    text(
+                        "SELECT relname, pg_get_indexdef(oid) FROM pg_class "
+                        "WHERE relkind = 'i' AND relnamespace = pg_my_temp_schema()"
+                    )
+                )
+                definitions = dict(result.all())
+
+                for name, query in (await hot_queries(conn)).items():
+                    result = await conn.execute(_Explain(query, analyze))
+                    plan = result.scalar_one()
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+
+                    reports[name] = inspect_plan(plan[0])
+                    reports[name]["definitions"] = [
+                        definitions[index]
+                        for index in reports[name]["indexes"]
+                        if index in definitions
+                    ]
+
+                await transaction.rollback()
+    finally:
+        await engine.dispose()
+
+    return {
+        "rows": rows,
+        "users": users,
+        "ok": all(report["ok"] for report in reports.values()),
+        "queries": reports,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Check that the hot transaction queries are served by indexes"
+    )
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=2_000)
+    parser.add_argument(
+        "--analyze",
+        action="store_true",
+        help="Run EXPLAIN ANALYZE and report execution times",
+    )
+    args = parser.parse_args()
+
+    load_models()
+
+    report = asyncio.run(check_plans(args.rows, args.users, args.analyze))
+    print(json.dumps(report, indent=2))
+
+    for name, query_report in report["queries"].items():
+        if not query_report["ok"]:
+            print(f"{name} is not served by an index", file=sys.stderr)
+
+    sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
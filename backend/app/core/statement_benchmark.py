@@ -0,0 +1,452 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO, Iterator
+
+from reportlab.platypus import SimpleDocTemplate
+
+from sqlalchemy import DateTime, Integer, String, Uuid, bindparam, event, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.app.api.services.statement import prepare_statement_data
+from backend.app.auth.models import User
+from backend.app.auth.schema import SecurityQuestionsSchema
+from backend.app.bank_account.enums import (
+    AccountCurrencyEnum,
+    AccountTypeEnum,
+    BankAccountStatusEnum,
+)
+from backend.app.bank_account.models import BankAccount
+from backend.app.core.config import settings
+from backend.app.core.model_registry import load_models
+from backend.app.core.statement_pdf import (
+    MARGIN,
+    STATEMENT_RENDERERS,
+    StatementPDFRenderer,
+    footer_flowables,
+    history_title_flowables,
+    merge_statement_pdfs,
+    preamble_flowables,
+    transaction_table,
+    transaction_table_row,
+)
+
+STATEMENT_SIZES = [10, 1_000, 50_000]
+RENDER_SIZES = [1_000, 10_000, 100_000]
+FANOUT_SECTIONS = 12
+FANOUT_WORKERS = [1, 2, 4]
+
+# Half of the rows are sent to the counterparty, half received from it
+_SEED_TRANSACTIONS = """
+    INSERT INTO transaction (
+        id, amount, description, reference, transaction_type,
+        transaction_category, transaction_status, balance_before, balance_after,
+        sender_id, receiver_id, sender_account_id, receiver_account_id,
+        created_at, updated_at
+    )
+    SELECT
+        gen_random_uuid(),
+        round((random() * 1000)::numeric, 2),
+        'Statement benchmark',
+        :prefix || g,
+        'Transfer',
+        CASE WHEN g % 2 = 0 THEN 'Debit' ELSE 'Credit' END::transactioncategoryenum,
+        'Completed',
+        0,
+        0,
+        CASE WHEN g % 2 = 0 THEN :user_id ELSE :other_id END,
+        CASE WHEN g % 2 = 0 THEN :other_id ELSE :user_id END,
+        CASE WHEN g % 2 = 0 THEN :account_id ELSE :other_account_id END,
+        CASE WHEN g % 2 = 0 THEN :other_account_id ELSE :account_id END,
+        :end_date - random() * interval '365 days',
+        :end_date
+    FROM generate_series(1, :rows) AS g
+"""
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args, **kwargs) -> None:
+        self.count += 1
+
+
+@contextmanager
+def count_queries(engine: AsyncEngine):
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", counter)
+
+
+def _user(label: str) -> User:
+    suffix = uuid.uuid4().hex[:12]
+
+    return User(
+        email=f"statement-benchmark-{label}-{suffix}@example.com",
+        first_name="Statement",
+        last_name=label.title(),
+        id_no=uuid.uuid4().int % 2_000_000_000 + 1,
+        security_question=SecurityQuestionsSchema.BIRTH_CITY,
+        security_answer="benchmark",
+        hashed_password="",
+    )
+
+
+def _account(user: User) -> BankAccount:
+    return BankAccount(
+        user_id=user.id,
+        account_type=AccountTypeEnum.Current,
+        currency=AccountCurrencyEnum.USD,
+        account_status=BankAccountStatusEnum.Active,
+        account_number=f"9{uuid.uuid4().int % 10**15:015d}",
+        account_name=f"{user.first_name} {user.last_name}",
+    )
+
+
+async def measure_statement(
+    engine: AsyncEngine, conn: AsyncConnection, rows: int, end_date: datetime
+) -> dict:
+    session = AsyncSession(bind=conn, expire_on_commit=False)
+
+    user, other = _user("customer"), _user("counterparty")
+    account, other_account = _account(user), _account(other)
+    session.add_all([user, other, account, other_account])
+    await session.flush()
+
+    await conn.execute(
+        text(_SEED_TRANSACTIONS).bindparams(
+            bindparam("prefix", f"STMT{uuid.uuid4().hex[:8]}", type_=String),
+            bindparam("user_id", user.id, type_=Uuid),
+            bindparam("other_id", other.id, type_=Uuid),
+            bindparam("account_id", account.id, type_=Uuid),
+            bindparam("other_account_id", other_account.id, type_=Uuid),
+            bindparam("end_date", end_date, type_=DateTime(timezone=True)),
+            bindparam("rows", rows, type_=Integer),
+        )
+    )
+
+    with count_queries(engine) as counter:
+        started = time.perf_counter()
+        statement_data = await prepare_statement_data(
+            user_id=user.id,
+            start_date=end_date - timedelta(days=366),
+            end_date=end_date,
+            session=session,
+        )
+        wall_ms = (time.perf_counter() - started) * 1000
+
+    await session.close()
+
+    return {
+        "transactions": len(statement_data["transactions"]),
+        "queries": counter.count,
+        "wall_ms": round(wall_ms, 2),
+    }
+
+
+async def run_benchmarks(sizes: list[int]) -> dict:
+    engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+    end_date = datetime.now(timezone.utc)
+    results = {}
+
+    try:
+        for size in sizes:
+            async with engine.connect() as conn:
+                # Seeded users, accounts and rows are never committed
+                async with conn.begin() as transaction:
+                    results[str(size)] = await measure_statement(
+                        engine, conn, size, end_date
+                    )
+                    await transaction.rollback()
+
+            print(
+                f"{size} transactions: {results[str(size)]['queries']} queries, "
+                f"{results[str(size)]['wall_ms']}ms",
+                file=sys.stderr,
+            )
+    finally:
+        await engine.dispose()
+
+    return results
+
+
+def synthetic_statement(rows: int, offset: int = 0) -> tuple[dict, Iterator[dict]]:
+    header = {
+        "user": {
+            "full_name": "Statement Customer",
+            "username": "statement",
+            "email": "statement@example.com",
+            "accounts": [
+                {
+                    "account_number": "9000000000000001",
+                    "account_name": "Statement Customer",
+                    "account_type": "current",
+                    "currency": "USD",
+                    "balance": 1250.0,
+                }
+            ],
+        },
+        "start_date": "2025-01-01",
+        "end_date": "2025-12-31",
+        "is_single_account": False,
+    }
+
+    start = datetime(2025, 1, 1)
+    transactions = (
+        {
+            "reference": f"TRF{index:012d}",
+            "amount": f"{(index * 37) % 100_000 / 100:.2f}",
+            "description": f"Transfer to account {index % 500} for invoice {index}",
+            "created_at": (start + timedelta(minutes=index)).strftime("%Y-%m-%d"),
+            "transaction_type": "transfer",
+            "transaction_category": "credit" if index % 3 else "debit",
+            "balance_after": f"{(index * 91) % 1_000_000 / 100:.2f}",
+            "sender_account": None,
+            "receiver_account": None,
+            "metadata": None,
+        }
+        for index in range(offset, offset + rows)
+    )
+    return header, transactions
+
+
+def render_single_table(statement_data: dict, output: BinaryIO) -> None:
+    # How the statement task rendered before it streamed pages, kept as the
+    # baseline: one table holding every row, laid out by a single build()
+    doc = SimpleDocTemplate(
+        output,
+        rightMargin=MARGIN,
+        leftMargin=MARGIN,
+        topMargin=MARGIN,
+        bottomMargin=MARGIN,
+    )
+    elements = preamble_flowables(statement_data)
+
+    if statement_data["transactions"]:
+        elements += history_title_flowables()
+        elements.append(
+            transaction_table(
+                [transaction_table_row(trn) for trn in statement_data["transactions"]]
+            )
+        )
+
+    doc.build(elements + footer_flowables())
+
+
+def _render_case(renderer: str, rows: int, chunk_size: int) -> dict:
+    # Runs in a fresh process, so the peak RSS belongs to this render alone
+    baseline_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    header, transactions = synthetic_statement(rows)
+
+    with tempfile.TemporaryFile() as output:
+        started = time.perf_counter()
+
+        if renderer in STATEMENT_RENDERERS:
+            pdf = STATEMENT_RENDERERS[renderer](output, header)
+            chunk = []
+            for trn in transactions:
+                chunk.append(trn)
+                if len(chunk) == chunk_size:
+                    pdf.add_transactions(chunk)
+                    chunk = []
+            pdf.add_transactions(chunk)
+            pdf.finish()
+        else:
+            render_single_table({**header, "transactions": list(transactions)}, output)
+
+        wall_s = time.perf_counter() - started
+        pdf_kib = output.tell() / 1024
+
+    return {
+        "wall_s": round(wall_s, 3),
+        "peak_rss_growth_mib": round(
+            (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_kib) / 1024,
+            1,
+        ),
+        "pdf_kib": round(pdf_kib, 1),
+        "rows_per_s": round(rows / wall_s),
+    }
+
+
+def _render_section(
+    path: str, rows: int, offset: int, preamble: bool, footer: bool
+) -> float:
+    # One section task of a fan-out statement, rendered into path
+    started = time.perf_counter()
+    header, transactions = synthetic_statement(rows, offset)
+
+    with open(path, "wb") as output:
+        pdf = StatementPDFRenderer(
+            output,
+            header,
+            section=f"Transaction History - rows {offset} to {offset + rows}",
+            preamble=preamble,
+            footer=footer,
+        )
+        pdf.add_transactions(transactions)
+        pdf.finish()
+
+    return time.perf_counter() - started
+
+
+def run_fanout_benchmarks(
+    sizes: list[int], sections: int, workers: list[int]
+) -> dict:
+    # Sections render on a pool standing in for the Celery workers, the merge
+    # runs here once all of them are done, as the chord callback would
+    results = {}
+    context = multiprocessing.get_context("spawn")
+
+    for size in sizes:
+        results[str(size)] = {}
+        per_section = -(-size // sections)
+        slices = [
+            (offset, min(per_section, size - offset))
+            for offset in range(0, size, per_section)
+        ]
+
+        for worker_count in workers:
+            with tempfile.TemporaryDirectory() as directory:
+                paths = [f"{directory}/{index}.pdf" for index in range(len(slices))]
+
+                with ProcessPoolExecutor(
+                    max_workers=worker_count, mp_context=context
+                ) as executor:
+                    # Interpreters are started before the clock does
+                    list(executor.map(abs, range(worker_count)))
+
+                    started = time.perf_counter()
+                    section_seconds = list(
+                        executor.map(
+                            _render_section,
+                            paths,
+                            [rows for _, rows in slices],
+                            [offset for offset, _ in slices],
+                            [index == 0 for index in range(len(slices))],
+                            [index == len(slices) - 1 for index in range(len(slices))],
+                        )
+                    )
+                    rendered = time.perf_counter()
+
+                section_files = [open(path, "rb") for path in paths]
+                try:
+                    with tempfile.TemporaryFile() as output:
+                        pages = merge_statement_pdfs(section_files, output)
+                        pdf_kib = output.tell() / 1024
+                finally:
+                    for section_file in section_files:
+                        section_file.close()
+
+                finished = time.perf_counter()
+
+            stats = {
+                "sections": len(slices),
+                "wall_s": round(finished - started, 3),
+                "render_s": round(rendered - started, 3),
+                "merge_s": round(finished - rendered, 3),
+                "slowest_section_s": round(max(section_seconds), 3),
+                "pages": pages,
+                "pdf_kib": round(pdf_kib, 1),
+            }
+            results[str(size)][f"{worker_count}_workers"] = stats
+
+            print(
+                f"{size} rows {len(slices)} sections {worker_count:>2} workers "
+                f"{stats['wall_s']:>8.2f}s (merge {stats['merge_s']:.2f}s)  "
+                f"{pages} pages",
+                file=sys.stderr,
+            )
+
+    return results
+
+
+def run_render_benchmarks(sizes: list[int], baseline_max_rows: int) -> dict:
+    results = {}
+    context = multiprocessing.get_context("spawn")
+
+    for size in sizes:
+        renderers = list(STATEMENT_RENDERERS)
+        if size <= baseline_max_rows:
+            renderers.append("single_table")
+
+        results[str(size)] = {}
+        for renderer in renderers:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                results[str(size)][renderer] = executor.submit(
+                    _render_case, renderer, size, settings.STATEMENT_CHUNK_SIZE
+                ).result()
+
+            stats = results[str(size)][renderer]
+            print(
+                f"{size} rows {renderer:<12} {stats['wall_s']:>9.2f}s  "
+                f"{stats['rows_per_s']:>8} rows/s  "
+                f"peak +{stats['peak_rss_growth_mib']:>7.1f}MiB  "
+                f"{stats['pdf_kib']:>9.1f}KiB",
+                file=sys.stderr,
+            )
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure statement data preparation on seeded statements"
+    )
+    parser.add_argument("--sizes", type=int, nargs="+")
+    parser.add_argument(
+        "--render",
+        action="store_true",
+        help="Compare the PDF renderers on synthetic rows instead, no database needed",
+    )
+    parser.add_argument(
+        "--fanout",
+        action="store_true",
+        help="Render synthetic rows as parallel sections and merge them",
+    )
+    parser.add_argument("--sections", type=int, default=FANOUT_SECTIONS)
+    parser.add_argument("--workers", type=int, nargs="+", default=FANOUT_WORKERS)
+    parser.add_argument(
+        "--baseline-max-rows",
+        type=int,
+        default=100_000,
+        help="Skip the single table renderer above this size, it grows quadratically",
+    )
+    args = parser.parse_args()
+
+    if args.fanout:
+        results = run_fanout_benchmarks(
+            args.sizes or RENDER_SIZES, args.sections, args.workers
+        )
+        print(json.dumps({"results": results}, indent=2))
+        return
+
+    if args.render:
+        results = run_render_benchmarks(
+            args.sizes or RENDER_SIZES, args.baseline_max_rows
+        )
+        print(json.dumps({"results": results}, indent=2))
+        return
+
+    load_models()
+
+    results = asyncio.run(run_benchmarks(args.sizes or STATEMENT_SIZES))
+    print(json.dumps({"results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import uuid
+from datetime import datetime
+
+from backend.app.core.logging import get_logger
+
+logger = get_logger()
+
+STATEMENT_TTL_SECONDS = 3600
+# Long enough for every retry of the task to run out its soft time limit
+STATEMENT_INFLIGHT_TTL_SECONDS = 1800
+
+CACHE_PREFIX = "statement:cache"
+INFLIGHT_PREFIX = "statement:inflight"
+METRICS_KEY = "statement:cache:metrics"
+
+OUTCOMES = ["hits", "misses", "joined"]
+
+
+def statement_fingerprint(
+    user_id: uuid.UUID,
+    account_number: str | None,
+    start_date: datetime,
+    end_date: datetime,
+    user_data: dict,
+    watermark: dict,
+    renderer: str,
+) -> str:
+    # What the PDF is rendered from: the owner and account details in the
+    # header, the period as printed (whole days) and the state of its rows.
+    # Balances are left out, they move with every later transaction and the
+    # PDF shows them as of its generation time anyway.
+    payload = {
+        "user_id": str(user_id),
+        "account_number": account_number,
+        "start_date": start_date.strftime("%Y-%m-%d"),
+        "end_date": end_date.strftime("%Y-%m-%d"),
+        "user": {
+            **user_data,
+            "accounts": [
+                {key: value for key, value in account.items() if key != "balance"}
+                for account in user_data["accounts"]
+            ],
+        },
+        "watermark": watermark,
+        "renderer": renderer,
+    }
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def _decode(value) -> dict | None:
+    if value is None:
+        return None
+    if isinstance(value, bytes):
+        value = value.decode()
+    return json.loads(value)
+
+
+class StatementCache:
+    # Maps fingerprints to finished statements and to the task building one,
+    # so identical requests share a single PDF and a single build
+    def __init__(self, redis_client):
+        self.redis = redis_client
+
+    def lookup(self, fingerprint: str) -> dict | None:
+        key = f"{CACHE_PREFIX}:{fingerprint}"
+        entry = _decode(self.redis.get(key))
+
+        if entry and not self.redis.exists(f"statement:{entry['statement_id']}"):
+            self.redis.delete(key)
+            return None
+
+        return entry
+
+    def claim(self, fingerprint: str, entry: dict) -> dict | None:
+        # Returns None when this caller now owns the build, otherwise the
+        # entry of the build that is already running
+        key = f"{INFLIGHT_PREFIX}:{fingerprint}"
+
+        if self.redis.set(
+            key, json.dumps(entry), nx=True, ex=STATEMENT_INFLIGHT_TTL_SECONDS
+        ):
+            return None
+
+        running = _decode(self.redis.get(key))
+        if running is None:
+            # Finished between the two calls, try once more
+            return self.lookup(fingerprint) or self.claim(fingerprint, entry)
+
+        return running
+
+    def complete(
+        self, fingerprint: str, entry: dict, ttl: int = STATEMENT_TTL_SECONDS
+    ) -> None:
+        pipeline = self.redis.pipeline()
+        pipeline.set(f"{CACHE_PREFIX}:{fingerprint}", json.dumps(entry), ex=ttl)
+        pipeline.delete(f"{INFLIGHT_PREFIX}:{fingerprint}")
+        pipeline.execute()
+
+    def release(self, fingerprint: str) -> None:
+        self.redis.delete(f"{INFLIGHT_PREFIX}:{fingerprint}")
+
+    def record(self, outcome: str) -> None:
+        try:
+            self.redis.hincrby(METRICS_KEY, outcome, 1)
+        except Exception as e:
+            logger.warning(f"Failed to record statement cache {outcome}: {e}")
+
+    def stats(self) -> dict:
+        counts = {
+            (key.decode() if isinstance(key, bytes) else key): int(value)
+            for key, value in self.redis.hgetall(METRICS_KEY).items()
+        }
+        stats = {outcome: counts.get(outcome, 0) for outcome in OUTCOMES}
+        requests = sum(stats.values())
+
+        # A joined request is served without a build of its own too
+        stats["hit_ratio"] = (
+            round((stats["hits"] + stats["joined"]) / requests, 4) if requests else 0.0
+        )
+        return stats
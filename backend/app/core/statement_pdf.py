@@ -0,0 +1,511 @@
+from datetime import datetime
+from typing import BinaryIO, Iterable
+
+from pypdf import PdfReader, PdfWriter
+from reportlab import rl_config
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.pdfbase.pdfmetrics import getFont
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import (
+    BaseDocTemplate,
+    Frame,
+    PageBreak,
+    PageTemplate,
+    Paragraph,
+    Spacer,
+    Table,
+    TableStyle,
+)
+from reportlab.platypus.flowables import Flowable
+
+from backend.app.core.config import settings
+
+PAGE_WIDTH = A4[0]
+MARGIN = 72
+USABLE_WIDTH = PAGE_WIDTH - (2 * MARGIN)
+
+TRANSACTION_HEADER = ["Date", "Reference", "Description", "Type", "Amount", "Balance"]
+TRANSACTION_COL_WIDTHS = [
+    USABLE_WIDTH * ratio for ratio in [0.12, 0.20, 0.30, 0.15, 0.11, 0.12]
+]
+
+# Where the canvas renderer puts the cells, matching what the platypus table
+# draws with TRANSACTION_TABLE_STYLE over the default cell style: centred
+# text, 12pt leading, 3pt padding and a 12pt bottom padding on the header
+COLUMN_EDGES = [
+    MARGIN + sum(TRANSACTION_COL_WIDTHS[:index])
+    for index in range(len(TRANSACTION_COL_WIDTHS) + 1)
+]
+COLUMN_CENTRES = [
+    left + width / 2 for left, width in zip(COLUMN_EDGES, TRANSACTION_COL_WIDTHS)
+]
+HEADER_FONT_SIZE = 10
+HEADER_BASELINE = 12 + 12 - HEADER_FONT_SIZE
+BODY_FONT_SIZE = 8
+BODY_BASELINE = 3 + 12 - BODY_FONT_SIZE
+# Glyph widths of Helvetica in its WinAnsi encoding, per 1000 units of size
+HELVETICA_WIDTHS = getFont("Helvetica").widths
+
+# Page streams are already deflated, wrapping them in ASCII85 on top makes
+# them a quarter bigger and costs time for files that are never sent as text
+rl_config.useA85 = 0
+
+
+def _statement_styles():
+    styles = getSampleStyleSheet()
+
+    styles.add(ParagraphStyle(name="SmallText", parent=styles["Normal"], fontSize=8))
+    styles.add(
+        ParagraphStyle(
+            name="AccountInfo", parent=styles["Normal"], fontSize=10, spaceAfter=6
+        )
+    )
+    styles.add(
+        ParagraphStyle(
+            name="SectionTitle",
+            parent=styles["Heading3"],
+            fontSize=12,
+            spaceAfter=6,
+            alignment=1,
+        )
+    )
+    return styles
+
+
+# Built once per process and shared by every page of every statement
+STYLES = _statement_styles()
+
+INFO_TABLE_STYLE = TableStyle(
+    [
+        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+        ("FONTNAME", (0, 1), (0, -1), "Helvetica-Bold"),
+        ("FONTNAME", (1, 1), (1, -1), "Helvetica"),
+        ("FONTSIZE", (0, 0), (-1, -1), 10),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+        ("TOPPADDING", (0, 0), (-1, -1), 6),
+        ("SPAN", (0, 0), (1, 0)),
+        ("LEFTPADDING", (0, 0), (-1, -1), 6),
+        ("RIGHTPADDING", (0, 0), (-1, -1), 6),
+    ]
+)
+
+WRAPPER_TABLE_STYLE = TableStyle(
+    [
+        ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("LEFTPADDING", (0, 0), (-1, -1), 10),
+        ("RIGHTPADDING", (0, 0), (-1, -1), 10),
+    ]
+)
+
+TRANSACTION_TABLE_STYLE = TableStyle(
+    [
+        ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ("FONTSIZE", (0, 0), (-1, 0), 10),
+        ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
+        ("BACKGROUND", (0, 1), (-1, -1), colors.white),
+        ("TEXTCOLOR", (0, 1), (-1, -1), colors.black),
+        ("FONTSIZE", (0, 1), (-1, -1), 8),
+        ("ALIGN", (0, 1), (-1, -1), "CENTER"),
+        ("GRID", (0, 0), (-1, -1), 1, colors.black),
+    ]
+)
+
+
+def transaction_table_row(trn: dict) -> list:
+    amount_str = (
+        f"+{trn["amount"]}"
+        if trn["transaction_category"] == "credit"
+        else f"-{trn["amount"]}"
+    )
+    description = (
+        trn["description"][:30] + "..."
+        if len(trn["description"]) > 30
+        else trn["description"]
+    )
+    return [
+        trn["created_at"],
+        trn["reference"],
+        description,
+        trn["transaction_type"],
+        amount_str,
+        trn["balance_after"],
+    ]
+
+
+def transaction_table(rows: list[list]) -> Table:
+    return Table(
+        [TRANSACTION_HEADER, *rows],
+        colWidths=TRANSACTION_COL_WIDTHS,
+        repeatRows=1,
+        style=TRANSACTION_TABLE_STYLE,
+    )
+
+
+def preamble_flowables(statement: dict) -> list[Flowable]:
+    elements = [
+        Paragraph(f"{settings.SITE_NAME} Account Statement", STYLES["Heading1"]),
+        Spacer(1, 12),
+        Paragraph(
+            f"Statement Period: {statement['start_date']} to {statement['end_date']}",
+            STYLES["Normal"],
+        ),
+        Spacer(1, 12),
+    ]
+
+    user = statement["user"]
+    account = user["accounts"][0]
+
+    col_width = USABLE_WIDTH / 2
+
+    user_info = [  # Empty string is space for aligment
+        [Paragraph("Customer Information: ", STYLES["Heading4"]), ""],
+        ["Name:", user["full_name"]],
+        ["Username:", user["username"]],
+        ["Email:", user["email"]],
+    ]
+    account_info = [  # Empty string is space for aligment
+        [Paragraph("Account Information: ", STYLES["Heading4"]), ""],
+        ["Account number:", account["account_number"]],
+        ["Account name:", account["account_name"]],
+        ["Account type:", account["account_type"]],
+        ["Currency:", account["currency"]],
+        ["Current Balance:", str(account["balance"])],
+    ]
+
+    label_width = col_width * 0.4
+    value_width = col_width * 0.6
+
+    user_table = Table(
+        user_info, colWidths=[label_width, value_width], style=INFO_TABLE_STYLE
+    )
+    account_table = Table(
+        account_info, colWidths=[label_width, value_width], style=INFO_TABLE_STYLE
+    )
+
+    wrapper_table = Table(
+        [[user_table, account_table]],
+        colWidths=[col_width, col_width],
+        spaceBefore=10,
+        spaceAfter=10,
+        style=WRAPPER_TABLE_STYLE,
+    )
+
+    elements.append(wrapper_table)
+    elements.append(Spacer(1, 20))
+    return elements
+
+
+def history_title_flowables(title: str = "Transaction History") -> list[Flowable]:
+    return [Paragraph(title, STYLES["SectionTitle"]), Spacer(1, 12)]
+
+
+def empty_history_flowables() -> list[Flowable]:
+    return [Paragraph("No transactions found for this period.", STYLES["Normal"])]
+
+
+def footer_flowables() -> list[Flowable]:
+    return [
+        Spacer(1, 12),
+        Paragraph(
+            f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            STYLES["SmallText"],
+        ),
+        Paragraph(
+            f"This is a computer generated statement and does not require signature.",
+            STYLES["SmallText"],
+        ),
+    ]
+
+
+def _measure_rows() -> tuple[float, float]:
+    # Cells hold single line strings, so every body row has the same height
+    sample = ["0000-00-00", "REF", "Description", "transfer", "+0.00", "0.00"]
+    _, header_height = transaction_table([]).wrap(USABLE_WIDTH, A4[1])
+    _, one_row_height = transaction_table([sample]).wrap(USABLE_WIDTH, A4[1])
+    return header_height, one_row_height - header_height
+
+
+class StatementPDFRenderer:
+    # Lays the statement out while its rows stream in. Rows are buffered until
+    # they fill the space left in the current frame, then drawn as one table
+    # that fits it exactly, so only about a page of rows and flowables is held
+    # at a time and no table ever has to be split. Finished pages are kept
+    # compressed by the canvas and written to the output on finish().
+    # A fan-out section leaves out the preamble or footer it does not own.
+    def __init__(
+        self,
+        output: BinaryIO,
+        statement: dict,
+        section: str | None = None,
+        preamble: bool = True,
+        footer: bool = True,
+    ):
+        self.doc = BaseDocTemplate(
+            output,
+            pagesize=A4,
+            rightMargin=MARGIN,
+            leftMargin=MARGIN,
+            topMargin=MARGIN,
+            bottomMargin=MARGIN,
+        )
+        frame = Frame(
+            self.doc.leftMargin,
+            self.doc.bottomMargin,
+            self.doc.width,
+            self.doc.height,
+            id="normal",
+        )
+        self.doc.addPageTemplates(
+            [
+                PageTemplate(id="First", frames=frame, pagesize=A4),
+                PageTemplate(id="Later", frames=frame, pagesize=A4),
+            ]
+        )
+
+        self.header_height, self.row_height = _measure_rows()
+        self.pending: list[list] = []
+        self.rows = 0
+        self.section = section
+        self.footer = footer
+
+        self.doc._startBuild()
+        self.doc.canv._doctemplate = self.doc
+
+        if preamble:
+            for flowable in preamble_flowables(statement):
+                self._draw(flowable)
+
+    def _draw(self, flowable: Flowable) -> None:
+        # One step of BaseDocTemplate.build, for a single flowable
+        flowables = [flowable]
+        while flowables:
+            self.doc.clean_hanging()
+            self.doc.handle_flowable(flowables)
+
+    def _capacity(self) -> int:
+        self.doc.clean_hanging()
+        available = self.doc.frame._y - self.doc.frame._y1p
+        return int((available - self.header_height) // self.row_height)
+
+    def _draw_table(self, final: bool = False) -> None:
+        capacity = self._capacity()
+        if capacity < 1:
+            self._draw(PageBreak())
+            capacity = self._capacity()
+
+        if len(self.pending) < capacity and not final:
+            return
+
+        rows, self.pending = self.pending[:capacity], self.pending[capacity:]
+        self._draw(transaction_table(rows))
+
+    def add_transactions(self, transactions: Iterable[dict]) -> None:
+        for trn in transactions:
+            if not self.rows:
+                for flowable in history_title_flowables(
+                    self.section or "Transaction History"
+                ):
+                    self._draw(flowable)
+
+            self.pending.append(transaction_table_row(trn))
+            self.rows += 1
+
+        while self.pending and len(self.pending) >= self._capacity():
+            self._draw_table()
+
+    def finish(self) -> None:
+        if not self.rows:
+            # An empty section still shows which account or month it covers
+            if self.section:
+                for flowable in history_title_flowables(self.section):
+                    self._draw(flowable)
+            for flowable in empty_history_flowables():
+                self._draw(flowable)
+
+        while self.pending:
+            self._draw_table(final=True)
+
+        if self.footer:
+            for flowable in footer_flowables():
+                self._draw(flowable)
+
+        del self.doc.canv._doctemplate
+        self.doc._endBuild()
+
+
+def _text_operators(
+    cells: list[tuple[float, float, str]], font: str, size: int
+) -> str:
+    # One text object placing each string centred on its x, in the encoding
+    # and escaping the canvas would use for a standard font
+    operators = [f"BT {font} {size} Tf"]
+    for centre, y, value in cells:
+        encoded = value.encode("cp1252", "replace")
+        width = sum(HELVETICA_WIDTHS[byte] for byte in encoded) * size / 1000
+        text = (
+            encoded.decode("latin-1")
+            .replace("\\", "\\\\")
+            .replace("(", "\\(")
+            .replace(")", "\\)")
+        )
+        operators.append(
+            f"1 0 0 1 {centre - width / 2:.2f} {y:.2f} Tm ({text}) Tj"
+        )
+    operators.append("ET")
+    return "\n".join(operators)
+
+
+class CanvasStatementPDFRenderer:
+    # Same statement as StatementPDFRenderer without the table layout: every
+    # column sits at a fixed position and every row has the same height, so a
+    # page of rows is a header, a grid and one text object drawn straight on
+    # the canvas. Only the preamble, titles and footer go through platypus.
+    def __init__(
+        self,
+        output: BinaryIO,
+        statement: dict,
+        section: str | None = None,
+        preamble: bool = True,
+        footer: bool = True,
+    ):
+        self.canv = Canvas(output, pagesize=A4)
+        self.header_height, self.row_height = _measure_rows()
+        self.page_rows: list[list] = []
+        self.capacity = 0
+        self.rows = 0
+        self.section = section
+        self.footer = footer
+
+        self._new_page(show=False)
+
+        if preamble:
+            self._add(preamble_flowables(statement))
+
+    def _new_page(self, show: bool = True) -> None:
+        if show:
+            self.canv.showPage()
+        # The frame StatementPDFRenderer lays its pages out in
+        self.frame = Frame(MARGIN, MARGIN, USABLE_WIDTH, A4[1] - 2 * MARGIN)
+
+    def _add(self, flowables: list[Flowable]) -> None:
+        for flowable in flowables:
+            while not self.frame.add(flowable, self.canv):
+                if self.frame._atTop:
+                    raise ValueError(f"{flowable} does not fit on a page")
+                self._new_page()
+
+    def _start_table(self) -> None:
+        available = self.frame._y - self.frame._y1p
+        self.capacity = int((available - self.header_height) // self.row_height)
+        if self.capacity < 1:
+            self._new_page()
+            self._start_table()
+
+    def _draw_table(self) -> None:
+        canv = self.canv
+        top = self.frame._y
+        header_bottom = top - self.header_height
+        row_tops = [
+            header_bottom - index * self.row_height
+            for index in range(len(self.page_rows) + 1)
+        ]
+        # Registers the font on the page and gives its resource name
+        font = canv._doc.getInternalFontName("Helvetica")
+
+        canv.setFillColor(colors.grey)
+        canv.rect(
+            MARGIN, header_bottom, USABLE_WIDTH, self.header_height, stroke=0, fill=1
+        )
+
+        canv.setFillColor(colors.whitesmoke)
+        canv.addLiteral(
+            _text_operators(
+                [
+                    (centre, header_bottom + HEADER_BASELINE, label)
+                    for centre, label in zip(COLUMN_CENTRES, TRANSACTION_HEADER)
+                ],
+                font,
+                HEADER_FONT_SIZE,
+            )
+        )
+
+        canv.setFillColor(colors.black)
+        canv.addLiteral(
+            _text_operators(
+                [
+                    (centre, row_top - self.row_height + BODY_BASELINE, str(value))
+                    for row, row_top in zip(self.page_rows, row_tops)
+                    for centre, value in zip(COLUMN_CENTRES, row)
+                ],
+                font,
+                BODY_FONT_SIZE,
+            )
+        )
+
+        canv.setStrokeColor(colors.black)
+        canv.setLineWidth(1)
+        canv.grid(COLUMN_EDGES, [top, *row_tops])
+
+        self.frame._y = row_tops[-1]
+        self.frame._atTop = 0
+        self.page_rows = []
+
+    def add_transactions(self, transactions: Iterable[dict]) -> None:
+        for trn in transactions:
+            if not self.rows:
+                self._add(
+                    history_title_flowables(self.section or "Transaction History")
+                )
+                self._start_table()
+            elif len(self.page_rows) == self.capacity:
+                self._draw_table()
+                self._new_page()
+                self._start_table()
+
+            self.page_rows.append(transaction_table_row(trn))
+            self.rows += 1
+
+    def finish(self) -> None:
+        if not self.rows:
+            # An empty section still shows which account or month it covers
+            if self.section:
+                self._add(history_title_flowables(self.section))
+            self._add(empty_history_flowables())
+
+        if self.page_rows:
+            self._draw_table()
+
+        if self.footer:
+            self._add(footer_flowables())
+
+        self.canv.showPage()
+        self.canv.save()
+
+
+STATEMENT_RENDERERS = {
+    "platypus": StatementPDFRenderer,
+    "canvas": CanvasStatementPDFRenderer,
+}
+
+
+def render_statement_pdf(statement_data: dict, output: BinaryIO) -> None:
+    renderer = StatementPDFRenderer(output, statement_data)
+    renderer.add_transactions(statement_data["transactions"])
+    renderer.finish()
+
+
+def merge_statement_pdfs(sections: Iterable[BinaryIO], output: BinaryIO) -> int:
+    # Sections are rendered apart and concatenated in order, page by page.
+    # Their shared objects (a few fonts) are not deduplicated, it costs more
+    # time than the kilobytes it saves.
+    writer = PdfWriter()
+    for section in sections:
+        writer.append(PdfReader(section))
+
+    writer.write(output)
+    return len(writer.pages)
@@ -1,5 +1,30 @@
 from .email import send_email_task
 from .image_upload import upload_profile_image_task
-from .statement import generate_statement_pdf
+from .statement import (
+    generate_statement_pdf,
+    merge_statement_sections,
+    render_statement_section,
+)
+from .statement_prerender import (
+    prerender_account_statement,
+    prerender_month_statements,
+    prerender_statement_batch,
+)
+from .rescore import rescore_transactions, rescore_transactions_partition
+from .bulk_deposit import process_bulk_deposit
+from .feature_store import warm_feature_profiles
 
-__all__ = ["send_email_task", "upload_profile_image_task", "generate_statement_pdf"]
+__all__ = [
+    "send_email_task",
+    "upload_profile_image_task",
+    "generate_statement_pdf",
+    "render_statement_section",
+    "merge_statement_sections",
+    "prerender_month_statements",
+    "prerender_statement_batch",
+    "prerender_account_statement",
+    "rescore_transactions",
+    "rescore_transactions_partition",
+    "process_bulk_deposit",
+    "warm_feature_profiles",
+]
@@ -0,0 +1,118 @@
+import argparse
+import asyncio
+import json
+import uuid
+from typing import TextIO
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.app.api.services.bulk_deposit import (
+    deposit_csv_stream,
+    ingest_bulk_deposit,
+)
+from backend.app.auth.models import User
+from backend.app.core.celery_app import celery_app
+from backend.app.core.config import settings
+from backend.app.core.logging import get_logger
+
+logger = get_logger()
+
+
+def upload_key(batch_reference: str) -> str:
+    return f"bulk_deposit:{batch_reference}"
+
+
+def batch_key(batch_reference: str) -> str:
+    # Hash with the teller_id and task_id of the batch, and its report once done
+    return f"bulk_deposit:batch:{batch_reference}"
+
+
+async def _ingest(
+    stream: TextIO, batch_reference: str, teller_id: uuid.UUID, description: str
+) -> dict:
+    engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            return await ingest_bulk_deposit(
+                stream,
+                batch_reference=batch_reference,
+                teller_id=teller_id,
+                description=description,
+                session=session,
+            )
+    finally:
+        await engine.dispose()
+
+
+@celery_app.task(
+    name="process_bulk_deposit",
+    bind=True,
+    # Thousands of rows outlive the global limit, a run that is redelivered
+    # skips the chunks it had already posted
+    time_limit=30 * 60,
+    soft_time_limit=30 * 60 - 60,
+)
+def process_bulk_deposit(
+    self, batch_reference: str, teller_id: str, description: str
+) -> dict:
+    redis_client = celery_app.backend.client
+    content = redis_client.get(upload_key(batch_reference))
+
+    if content is None:
+        raise ValueError("Bulk deposit file not found or has expired")
+
+    report = asyncio.run(
+        _ingest(
+            deposit_csv_stream(content),
+            batch_reference,
+            uuid.UUID(teller_id),
+            description,
+        )
+    )
+
+    redis_client.delete(upload_key(batch_reference))
+    redis_client.hset(batch_key(batch_reference), "report", json.dumps(report))
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Post the deposits of a teller CSV file and print the "
+        "reconciliation report"
+    )
+    parser.add_argument("file", help="CSV with account_number, amount, description")
+    parser.add_argument("--teller-email", required=True)
+    parser.add_argument("--description", default="Bulk cash deposit")
+    args = parser.parse_args()
+
+    async def run() -> dict:
+        engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+        try:
+            async with AsyncSession(engine) as session:
+                result = await session.exec(
+                    select(User.id).where(User.email == args.teller_email)
+                )
+                teller_id = result.first()
+        finally:
+            await engine.dispose()
+
+        if not teller_id:
+            raise SystemExit(f"No user with the email {args.teller_email}")
+
+        # Read straight from the file, row by row
+        with open(args.file, encoding="utf-8-sig", newline="") as stream:
+            return await _ingest(
+                stream,
+                f"BDP{uuid.uuid4().hex[:8].upper()}",
+                teller_id,
+                args.description,
+            )
+
+    print(json.dumps(asyncio.run(run()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
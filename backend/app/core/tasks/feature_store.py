@@ -0,0 +1,35 @@
+import asyncio
+import uuid
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.app.core.ai.feature_store import feature_store
+from backend.app.core.ai.transaction_analyzer import TransactionAnalyzer
+from backend.app.core.celery_app import celery_app
+from backend.app.core.config import settings
+from backend.app.core.logging import get_logger
+
+logger = get_logger()
+
+
+async def _warm(user_ids: list[uuid.UUID]) -> None:
+    engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+    analyzer = TransactionAnalyzer()
+
+    try:
+        async with AsyncSession(engine) as session:
+            for user_id in user_ids:
+                history = await analyzer.get_user_history_columns(user_id, session)
+                feature_store.rebuild(user_id, history)
+    finally:
+        await engine.dispose()
+
+
+@celery_app.task(name="warm_feature_profiles")
+def warm_feature_profiles(user_ids: list[str]) -> int:
+    # Queued by the screening stage, which answers without the full history
+    asyncio.run(_warm([uuid.UUID(user_id) for user_id in user_ids]))
+    logger.debug(f"Rebuilt fraud feature profiles of {len(user_ids)} users")
+    return len(user_ids)
@@ -0,0 +1,171 @@
+import argparse
+import asyncio
+import json
+import uuid
+from datetime import datetime
+
+from celery import Task, group
+
+from backend.app.core.ai.config import ai_settings
+from backend.app.core.ai.rescore import PartitionRescorer, check_rescore_version
+from backend.app.core.celery_app import celery_app
+from backend.app.core.logging import get_logger
+
+logger = get_logger()
+
+
+class RescoreTask(Task):
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        logger.error(f"Transaction re-scoring failed: {exc}", exc_info=einfo)
+        super().on_failure(exc, task_id, args, kwargs, einfo)
+
+
+def _run_partition(
+    run_id: str,
+    partition: int,
+    partitions: int,
+    model_version: str,
+    since: str | None,
+    chunk_size: int,
+) -> dict:
+    rescorer = PartitionRescorer(
+        run_id=run_id,
+        partition=partition,
+        partitions=partitions,
+        model_version=model_version,
+        redis_client=celery_app.backend.client,
+        since=datetime.fromisoformat(since) if since else None,
+        chunk_size=chunk_size,
+    )
+    return asyncio.run(rescorer.run())
+
+
+@celery_app.task(
+    base=RescoreTask,
+    name="rescore_transactions_partition",
+    bind=True,
+    max_retries=5,
+    # Large partitions outlive the global limit, retries resume from the checkpoint
+    time_limit=4 * 3600,
+    soft_time_limit=4 * 3600 - 60,
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    retry_backoff_max=300,
+)
+def rescore_transactions_partition(
+    self,
+    *,
+    run_id: str,
+    partition: int,
+    partitions: int,
+    model_version: str,
+    since: str | None = None,
+    chunk_size: int = ai_settings.RESCORE_CHUNK_SIZE,
+) -> dict:
+    stats = _run_partition(
+        run_id, partition, partitions, model_version, since, chunk_size
+    )
+    logger.info(f"Re-scoring partition finished: {stats}")
+    return stats
+
+
+@celery_app.task(base=RescoreTask, name="rescore_transactions", bind=True)
+def rescore_transactions(
+    self,
+    *,
+    model_version: str,
+    partitions: int | None = None,
+    since: str | None = None,
+    chunk_size: int | None = None,
+    run_id: str | None = None,
+) -> dict:
+    # Passing the run_id of an earlier run resumes it from its checkpoints
+    check_rescore_version(model_version)
+
+    run_id = run_id or str(uuid.uuid4())
+    partitions = partitions or ai_settings.RESCORE_PARTITIONS
+    chunk_size = chunk_size or ai_settings.RESCORE_CHUNK_SIZE
+
+    job = group(
+        rescore_transactions_partition.s(
+            run_id=run_id,
+            partition=partition,
+            partitions=partitions,
+            model_version=model_version,
+            since=since,
+            chunk_size=chunk_size,
+        )
+        for partition in range(partitions)
+    ).apply_async()
+
+    logger.info(
+        f"Dispatched re-scoring run {run_id} for model {model_version} "
+        f"across {partitions} partitions"
+    )
+
+    return {
+        "run_id": run_id,
+        "group_id": job.id,
+        "model_version": model_version,
+        "partitions": partitions,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Re-score historical transactions with the current fraud model"
+    )
+    parser.add_argument(
+        "--model-version",
+        required=True,
+        help="Version the new scores are stored under, not the live one",
+    )
+    parser.add_argument(
+        "--partitions", type=int, default=ai_settings.RESCORE_PARTITIONS
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=ai_settings.RESCORE_CHUNK_SIZE
+    )
+    parser.add_argument(
+        "--since", default=None, help="Only re-score transactions from this ISO date"
+    )
+    parser.add_argument("--run-id", default=None, help="Resume an earlier run")
+    parser.add_argument(
+        "--inline",
+        action="store_true",
+        help="Run every partition in this process instead of on Celery workers",
+    )
+    args = parser.parse_args()
+
+    try:
+        check_rescore_version(args.model_version)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if not args.inline:
+        result = rescore_transactions.delay(
+            model_version=args.model_version,
+            partitions=args.partitions,
+            since=args.since,
+            chunk_size=args.chunk_size,
+            run_id=args.run_id,
+        )
+        print(json.dumps({"task_id": result.id}))
+        return
+
+    run_id = args.run_id or str(uuid.uuid4())
+
+    for partition in range(args.partitions):
+        stats = _run_partition(
+            run_id,
+            partition,
+            args.partitions,
+            args.model_version,
+            args.since,
+            args.chunk_size,
+        )
+        print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,244 +1,380 @@
-from io import BytesIO
-from datetime import datetime, timedelta
-
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-
-from celery import Task
-
+import asyncio
+import gzip
+import tempfile
+import uuid
+import zlib
+from contextlib import ExitStack
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO
+
+from celery import Task, chord
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.app.api.services.statement import (
+    get_statement_owner,
+    plan_statement_sections,
+    stream_statement_transactions,
+)
 from backend.app.core.celery_app import celery_app
 from backend.app.core.config import settings
 from backend.app.core.logging import get_logger
+from backend.app.core.statement_cache import (
+    STATEMENT_INFLIGHT_TTL_SECONDS,
+    STATEMENT_TTL_SECONDS,
+    StatementCache,
+)
+from backend.app.core.statement_pdf import STATEMENT_RENDERERS, merge_statement_pdfs
 
 logger = get_logger()
 
+# Size of the pieces the finished PDF is appended to Redis in
+STATEMENT_WRITE_CHUNK_BYTES = 1024 * 1024
+
 
 class StatementGenerationTask(Task):
     def on_failure(self, exc, task_id, args, kwargs, einfo):
         logger.error(f"Statement generation failed: {exc}", exc_info=einfo)
+        # Let the next identical request queue a fresh build
+        if kwargs.get("fingerprint"):
+            StatementCache(celery_app.backend.client).release(kwargs["fingerprint"])
         super().on_failure(exc, task_id, args, kwargs, einfo)
 
 
-@celery_app.task(
-    base=StatementGenerationTask,
-    name="generate_statement_pdf",
-    bind=True,  # Bind task to current instance of the class, so self object can be used
-    max_retries=3,
-    soft_time_limit=300,
-)
-def generate_statement_pdf(self, statement_data: dict, statement_id: str) -> dict:
+async def write_statement(
+    output: BinaryIO,
+    session: AsyncSession,
+    user_data: dict,
+    account_ids: list[uuid.UUID],
+    start_date: datetime,
+    end_date: datetime,
+    account_number: str | None = None,
+    section: str | None = None,
+    preamble: bool = True,
+    footer: bool = True,
+    period: tuple[datetime, datetime] | None = None,
+    renderer: str = settings.STATEMENT_DEFAULT_RENDERER,
+) -> int:
+    # Pages are laid out while the cursor streams, the rows never sit in
+    # memory at once. A section covers part of the statement, period is the
+    # whole of it.
+    period_start, period_end = period or (start_date, end_date)
+
+    pdf = STATEMENT_RENDERERS[renderer](
+        output,
+        {
+            "user": user_data,
+            "start_date": period_start.strftime("%Y-%m-%d"),
+            "end_date": period_end.strftime("%Y-%m-%d"),
+            "is_single_account": bool(account_number),
+        },
+        section=section,
+        preamble=preamble,
+        footer=footer,
+    )
+
+    async for chunk in stream_statement_transactions(
+        account_ids, start_date, end_date, session
+    ):
+        pdf.add_transactions(chunk)
+
+    pdf.finish()
+    return pdf.rows
+
+
+async def render_statement(
+    output: BinaryIO,
+    user_id: uuid.UUID,
+    start_date: datetime,
+    end_date: datetime,
+    account_number: str | None = None,
+    **options,
+) -> int:
+    # Each task runs its own event loop, so it gets its own engine
+    engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
     try:
-        buffer = BytesIO()
-        PAGE_WIDTH = A4[0]
-
-        MARGIN = 72
-        USABLE_WIDTH = PAGE_WIDTH - (2 * MARGIN)
-
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=MARGIN,
-            leftMargin=MARGIN,
-            topMargin=MARGIN,
-            bottomMargin=MARGIN,
-        )
-
-        styles = getSampleStyleSheet()
-
-        styles.add(
-            ParagraphStyle(name="SmallText", parent=styles["Normal"], fontSize=8)
-        )
-        styles.add(
-            ParagraphStyle(
-                name="AccountInfo", parent=styles["Normal"], fontSize=10, spaceAfter=6
+        async with AsyncSession(engine) as session:
+            user_data, account_ids = await get_statement_owner(
+                user_id, session, account_number
             )
-        )
-        styles.add(
-            ParagraphStyle(
-                name="SectionTitle",
-                parent=styles["Heading3"],
-                fontSize=12,
-                spaceAfter=6,
-                alignment=1,
+
+            return await write_statement(
+                output,
+                session,
+                user_data,
+                account_ids,
+                start_date,
+                end_date,
+                account_number,
+                **options,
             )
-        )
+    finally:
+        await engine.dispose()
 
-        elements = []
 
-        elements.append(
-            Paragraph(f"{settings.SITE_NAME} Account Statement", styles["Heading1"])
-        )
+def section_key(statement_id: str, index: int) -> str:
+    return f"statement:section:{statement_id}:{index}"
 
-        elements.append(Spacer(1, 12))
 
-        elements.append(
-            Paragraph(
-                f"Statement Period: {statement_data['start_date']} to {statement_data['end_date']}",
-                styles["Normal"],
-            )
-        )
+def store_pdf(
+    redis_client, key: str, pdf_file: BinaryIO, ttl: int = STATEMENT_TTL_SECONDS
+) -> None:
+    # Gzipped and appended piece by piece under a temporary key, the PDF
+    # only becomes visible once it is complete
+    partial_key = f"{key}:partial"
+    compressor = zlib.compressobj(wbits=31)
 
-        elements.append(Spacer(1, 12))
+    redis_client.delete(partial_key)
+    pdf_file.seek(0)
 
-        user = statement_data["user"]
-        account = (
-            user["accounts"][0]
-            if statement_data.get("is_single_account")
-            else user["accounts"][0]
-        )
+    while chunk := pdf_file.read(STATEMENT_WRITE_CHUNK_BYTES):
+        redis_client.append(partial_key, compressor.compress(chunk))
+        redis_client.expire(partial_key, ttl)
 
-        col_width = USABLE_WIDTH / 2
-
-        user_info = [  # Empty string is space for aligment
-            [Paragraph("Customer Information: ", styles["Heading4"]), ""],
-            ["Name:", user["full_name"]],
-            ["Username:", user["username"]],
-            ["Email:", user["email"]],
-        ]
-        account_info = [  # Empty string is space for aligment
-            [Paragraph("Account Information: ", styles["Heading4"]), ""],
-            ["Account number:", account["account_number"]],
-            ["Account name:", account["account_name"]],
-            ["Account type:", account["account_type"]],
-            ["Currency:", account["currency"]],
-            ["Current Balance:", str(account["balance"])],
-        ]
+    redis_client.append(partial_key, compressor.flush())
 
-        table_style = TableStyle(
-            [
-                ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                ("FONTNAME", (0, 1), (0, -1), "Helvetica-Bold"),
-                ("FONTNAME", (1, 1), (1, -1), "Helvetica"),
-                ("FONTSIZE", (0, 0), (-1, -1), 10),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
-                ("TOPPADDING", (0, 0), (-1, -1), 6),
-                ("SPAN", (0, 0), (1, 0)),
-                ("LEFTPADDING", (0, 0), (-1, -1), 6),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 6),
-            ]
-        )
+    pipeline = redis_client.pipeline()
+    pipeline.rename(partial_key, key)
+    pipeline.expire(key, ttl)
+    pipeline.execute()
 
-        label_width = col_width * 0.4
-        value_width = col_width * 0.6
 
-        user_table = Table(user_info, colWidths=[label_width, value_width])
-        user_table.setStyle(table_style)
+def store_statement(redis_client, statement_id: str, pdf_file: BinaryIO) -> None:
+    store_pdf(redis_client, f"statement:{statement_id}", pdf_file)
 
-        account_table = Table(account_info, colWidths=[label_width, value_width])
-        account_table.setStyle(table_style)
 
-        wrapper_table = Table(
-            [[user_table, account_table]],
-            colWidths=[col_width, col_width],
-            spaceBefore=10,
-            spaceAfter=10,
-        )
+def load_pdf(redis_client, key: str, pdf_file: BinaryIO) -> None:
+    data = redis_client.get(key)
+    if data is None:
+        raise ValueError(f"{key} has expired")
 
-        wrapper_table.setStyle(
-            TableStyle(
-                [
-                    ("ALIGN", (0, 0), (-1, -1), "LEFT"),
-                    ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                    ("LEFTPADDING", (0, 0), (-1, -1), 10),
-                    ("RIGHTPADDING", (0, 0), (-1, -1), 10),
-                ]
-            )
-        )
+    pdf_file.write(gzip.decompress(data))
+    pdf_file.seek(0)
 
-        elements.append(wrapper_table)
-        elements.append(Spacer(1, 20))
 
-        transactions = statement_data["transactions"]
+def statement_result(
+    statement_id: str,
+    task_id: str,
+    fingerprint: str | None,
+    ttl: int = STATEMENT_TTL_SECONDS,
+) -> dict:
+    result = {
+        "status": "success",
+        "statement_id": statement_id,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "expires_at": (
+            datetime.now(timezone.utc) + timedelta(seconds=ttl)
+        ).isoformat(),
+    }
 
-        if transactions:
-            elements.append(Paragraph("Transaction History", styles["SectionTitle"]))
-            elements.append(Spacer(1, 12))
+    if fingerprint:
+        StatementCache(celery_app.backend.client).complete(
+            fingerprint, {**result, "task_id": task_id}, ttl=ttl
+        )
 
-            table_data = [
-                ["Date", "Reference", "Description", "Type", "Amount", "Balance"]
-            ]
+    return result
 
-            for trn in transactions:
-                amount_str = (
-                    f"+{trn["amount"]}"
-                    if trn["transaction_category"] == "credit"
-                    else f"-{trn["amount"]}"
-                )
-                description = (
-                    trn["description"][:30] + "..."
-                    if len(trn["description"]) > 30
-                    else trn["description"]
-                )
-                table_data.append(
-                    [
-                        trn["created_at"],
-                        trn["reference"],
-                        description,
-                        trn["transaction_type"],
-                        amount_str,
-                        trn["balance_after"],
-                    ]
-                )
 
-            col_ratios = [0.12, 0.20, 0.30, 0.15, 0.11, 0.12]
-
-            trans_col_widths = [USABLE_WIDTH * ratio for ratio in col_ratios]
-
-            trans_table = Table(table_data, colWidths=trans_col_widths, repeatRows=1)
-            trans_table.setStyle(
-                TableStyle(
-                    [
-                        ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
-                        ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-                        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                        ("FONTSIZE", (0, 0), (-1, 0), 10),
-                        ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-                        ("BACKGROUND", (0, 1), (-1, -1), colors.white),
-                        ("TEXTCOLOR", (0, 1), (-1, -1), colors.black),
-                        ("FONTSIZE", (0, 1), (-1, -1), 8),
-                        ("ALIGN", (0, 1), (-1, -1), "CENTER"),
-                        ("GRID", (0, 0), (-1, -1), 1, colors.black),
-                    ]
+@celery_app.task(
+    base=StatementGenerationTask,
+    name="generate_statement_pdf",
+    bind=True,  # Bind task to current instance of the class, so self object can be used
+    max_retries=3,
+    soft_time_limit=300,
+)
+def generate_statement_pdf(
+    self,
+    user_id: str,
+    start_date: str,
+    end_date: str,
+    statement_id: str,
+    account_number: str | None = None,
+    fingerprint: str | None = None,
+    renderer: str = settings.STATEMENT_DEFAULT_RENDERER,
+) -> dict:
+    try:
+        with tempfile.TemporaryFile() as pdf_file:
+            rows = asyncio.run(
+                render_statement(
+                    pdf_file,
+                    uuid.UUID(user_id),
+                    datetime.fromisoformat(start_date),
+                    datetime.fromisoformat(end_date),
+                    account_number,
+                    renderer=renderer,
                 )
             )
 
-            elements.append(trans_table)
+            store_statement(celery_app.backend.client, statement_id, pdf_file)
 
-        else:
-            elements.append(
-                Paragraph("No transactions found for this period.", styles["Normal"])
-            )
+        logger.info(f"Generated statement {statement_id} with {rows} transactions")
 
-        elements.append(Spacer(1, 12))
-        elements.append(
-            Paragraph(
-                f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-                styles["SmallText"],
+        return statement_result(statement_id, self.request.id, fingerprint)
+    except Exception as e:
+        logger.error(f"Failed to generate statement: {e}")
+        raise self.retry(exc=e, countdown=5)
+
+
+@celery_app.task(
+    base=StatementGenerationTask,
+    name="render_statement_section",
+    bind=True,
+    max_retries=3,
+    soft_time_limit=300,
+)
+def render_statement_section(
+    self,
+    user_id: str,
+    start_date: str,
+    end_date: str,
+    statement_id: str,
+    index: int,
+    period_start: str,
+    period_end: str,
+    account_number: str | None = None,
+    section: str | None = None,
+    preamble: bool = False,
+    footer: bool = False,
+    fingerprint: str | None = None,
+    renderer: str = settings.STATEMENT_DEFAULT_RENDERER,
+) -> dict:
+    try:
+        with tempfile.TemporaryFile() as pdf_file:
+            rows = asyncio.run(
+                render_statement(
+                    pdf_file,
+                    uuid.UUID(user_id),
+                    datetime.fromisoformat(start_date),
+                    datetime.fromisoformat(end_date),
+                    account_number,
+                    section=section,
+                    preamble=preamble,
+                    footer=footer,
+                    period=(
+                        datetime.fromisoformat(period_start),
+                        datetime.fromisoformat(period_end),
+                    ),
+                    renderer=renderer,
+                )
             )
-        )
-        elements.append(
-            Paragraph(
-                f"This is a computer generated statement and does not require signature.",
-                styles["SmallText"],
+
+            # Kept until every retry of the merge could have run
+            store_pdf(
+                celery_app.backend.client,
+                section_key(statement_id, index),
+                pdf_file,
+                ttl=STATEMENT_INFLIGHT_TTL_SECONDS,
             )
-        )
 
-        doc.build(elements)
-        pdf_data = buffer.getvalue()
-        buffer.close()
+        return {"index": index, "rows": rows}
+    except Exception as e:
+        logger.error(f"Failed to render statement {statement_id} section {index}: {e}")
+        raise self.retry(exc=e, countdown=5)
+
 
+@celery_app.task(
+    base=StatementGenerationTask,
+    name="merge_statement_sections",
+    bind=True,
+    max_retries=3,
+    soft_time_limit=300,
+)
+def merge_statement_sections(
+    self,
+    sections: list[dict],
+    statement_id: str,
+    fingerprint: str | None = None,
+) -> dict:
+    try:
         redis_client = celery_app.backend.client
-        redis_key = f"statement:{statement_id}"
-        redis_client.setex(redis_key, 3600, pdf_data)
-
-        return {
-            "status": "success",
-            "statement_id": statement_id,
-            "generated_at": datetime.now().isoformat(),
-            "expires_at": (datetime.now() + timedelta(hours=1)).isoformat(),
-        }
+        keys = [
+            section_key(statement_id, section["index"])
+            for section in sorted(sections, key=lambda section: section["index"])
+        ]
+
+        with ExitStack() as stack:
+            section_files = []
+            for key in keys:
+                section_file = stack.enter_context(tempfile.TemporaryFile())
+                load_pdf(redis_client, key, section_file)
+                section_files.append(section_file)
+
+            with tempfile.TemporaryFile() as pdf_file:
+                pages = merge_statement_pdfs(section_files, pdf_file)
+                store_statement(redis_client, statement_id, pdf_file)
+
+        redis_client.delete(*keys)
+
+        logger.info(
+            f"Generated statement {statement_id} with "
+            f"{sum(section['rows'] for section in sections)} transactions "
+            f"from {len(sections)} sections, {pages} pages"
+        )
+
+        return statement_result(statement_id, self.request.id, fingerprint)
     except Exception as e:
-        logger.error(f"Failed to generate statement: {e}")
+        logger.error(f"Failed to merge statement {statement_id}: {e}")
         raise self.retry(exc=e, countdown=5)
+
+
+def queue_statement(
+    user_id: uuid.UUID,
+    start_date: datetime,
+    end_date: datetime,
+    statement_id: str,
+    task_id: str,
+    account_numbers: list[str],
+    account_number: str | None = None,
+    fingerprint: str | None = None,
+    renderer: str = settings.STATEMENT_DEFAULT_RENDERER,
+) -> None:
+    # Several accounts or a long range fan out into sections rendered by a
+    # chord, the merge task gets task_id so callers wait on the whole build
+    sections = []
+    if settings.STATEMENT_FANOUT_ENABLED and account_numbers:
+        sections = plan_statement_sections(
+            [account_number] if account_number else account_numbers,
+            start_date,
+            end_date,
+        )
+
+    if len(sections) < 2:
+        generate_statement_pdf.apply_async(
+            kwargs={
+                "user_id": str(user_id),
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(),
+                "account_number": account_number,
+                "statement_id": statement_id,
+                "fingerprint": fingerprint,
+                "renderer": renderer,
+            },
+            task_id=task_id,
+        )
+        return
+
+    header = [
+        render_statement_section.s(
+            user_id=str(user_id),
+            start_date=section["start_date"].isoformat(),
+            end_date=section["end_date"].isoformat(),
+            statement_id=statement_id,
+            index=index,
+            period_start=start_date.isoformat(),
+            period_end=end_date.isoformat(),
+            account_number=section["account_number"],
+            section=section["title"],
+            preamble=index == 0,
+            footer=index == len(sections) - 1,
+            fingerprint=fingerprint,
+            renderer=renderer,
+        )
+        for index, section in enumerate(sections)
+    ]
+
+    chord(header)(
+        merge_statement_sections.s(
+            statement_id=statement_id, fingerprint=fingerprint
+        ).set(task_id=task_id)
+    )
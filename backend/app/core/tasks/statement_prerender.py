@@ -0,0 +1,257 @@
+import argparse
+import asyncio
+import json
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO
+
+from celery import chord
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.app.api.services.statement import get_statement_owner, statement_watermark
+from backend.app.bank_account.enums import BankAccountStatusEnum
+from backend.app.bank_account.models import BankAccount
+from backend.app.core.celery_app import celery_app
+from backend.app.core.config import settings
+from backend.app.core.logging import get_logger
+from backend.app.core.statement_cache import StatementCache, statement_fingerprint
+from backend.app.core.tasks.statement import (
+    statement_result,
+    store_pdf,
+    write_statement,
+)
+
+logger = get_logger()
+
+
+def month_period(year: int, month: int) -> tuple[datetime, datetime]:
+    start = datetime(year, month, 1, tzinfo=timezone.utc)
+    next_month = (start + timedelta(days=32)).replace(day=1)
+    return start, next_month - timedelta(microseconds=1)
+
+
+def previous_month(now: datetime) -> tuple[datetime, datetime]:
+    last_day = now.astimezone(timezone.utc).replace(day=1) - timedelta(days=1)
+    return month_period(last_day.year, last_day.month)
+
+
+async def _next_accounts(
+    after: uuid.UUID | None, limit: int
+) -> list[tuple[uuid.UUID, uuid.UUID, str]]:
+    engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+    try:
+        async with AsyncSession(engine) as session:
+            query = (
+                select(BankAccount.id, BankAccount.user_id, BankAccount.account_number)
+                .where(
+                    BankAccount.account_status == BankAccountStatusEnum.Active,
+                    BankAccount.account_number.is_not(None),
+                )
+                .order_by(BankAccount.id)
+                .limit(limit)
+            )
+            if after:
+                query = query.where(BankAccount.id > after)
+
+            result = await session.exec(query)
+            return list(result.all())
+    finally:
+        await engine.dispose()
+
+
+async def _prerender(
+    output: BinaryIO,
+    task_id: str,
+    user_id: uuid.UUID,
+    account_number: str,
+    start_date: datetime,
+    end_date: datetime,
+) -> dict:
+    # The same fingerprint the generate endpoint computes, so a request for
+    # the month is answered from this render
+    cache = StatementCache(celery_app.backend.client)
+    engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+    try:
+        async with AsyncSession(engine) as session:
+            user_data, account_ids = await get_statement_owner(
+                user_id, session, account_number
+            )
+            watermark = await statement_watermark(
+                account_ids, start_date, end_date, session
+            )
+            fingerprint = statement_fingerprint(
+                user_id,
+                account_number,
+                start_date,
+                end_date,
+                user_data,
+                watermark,
+                settings.STATEMENT_DEFAULT_RENDERER,
+            )
+
+            if cache.lookup(fingerprint):
+                return {"status": "cached"}
+
+            statement_id = str(uuid.uuid4())
+            if cache.claim(
+                fingerprint, {"statement_id": statement_id, "task_id": task_id}
+            ):
+                return {"status": "in_progress"}
+
+            try:
+                rows = await write_statement(
+                    output,
+                    session,
+                    user_data,
+                    account_ids,
+                    start_date,
+                    end_date,
+                    account_number,
+                    renderer=settings.STATEMENT_DEFAULT_RENDERER,
+                )
+                store_pdf(
+                    celery_app.backend.client,
+                    f"statement:{statement_id}",
+                    output,
+                    ttl=settings.STATEMENT_PRERENDER_TTL_SECONDS,
+                )
+            except Exception:
+                cache.release(fingerprint)
+                raise
+
+            statement_result(
+                statement_id,
+                task_id,
+                fingerprint,
+                ttl=settings.STATEMENT_PRERENDER_TTL_SECONDS,
+            )
+            return {"status": "rendered", "rows": rows}
+    finally:
+        await engine.dispose()
+
+
+@celery_app.task(
+    name="prerender_account_statement",
+    bind=True,
+    soft_time_limit=300,
+)
+def prerender_account_statement(
+    self,
+    user_id: str,
+    account_number: str,
+    start_date: str,
+    end_date: str,
+) -> dict:
+    # Never raises, a failed account must not stop the batches after it. The
+    # customer can still generate the statement on demand.
+    try:
+        with tempfile.TemporaryFile() as pdf_file:
+            outcome = asyncio.run(
+                _prerender(
+                    pdf_file,
+                    self.request.id,
+                    uuid.UUID(user_id),
+                    account_number,
+                    datetime.fromisoformat(start_date),
+                    datetime.fromisoformat(end_date),
+                )
+            )
+    except Exception as e:
+        logger.error(f"Failed to pre-render statement for {account_number}: {e}")
+        outcome = {"status": "failed"}
+
+    return {**outcome, "account_number": account_number}
+
+
+@celery_app.task(
+    name="prerender_statement_batch",
+    bind=True,
+    max_retries=3,
+)
+def prerender_statement_batch(
+    self,
+    start_date: str,
+    end_date: str,
+    after: str | None = None,
+    batch: int = 0,
+) -> dict:
+    try:
+        accounts = asyncio.run(
+            _next_accounts(
+                uuid.UUID(after) if after else None,
+                settings.STATEMENT_PRERENDER_BATCH_SIZE,
+            )
+        )
+    except Exception as e:
+        logger.error(f"Failed to load statement pre-render batch {batch}: {e}")
+        raise self.retry(exc=e, countdown=30)
+
+    if not accounts:
+        logger.info(
+            f"Pre-rendered statements for {start_date[:7]} in {batch} batches"
+        )
+        return {"batch": batch, "accounts": 0}
+
+    # A batch renders in parallel, the next one is only queued once it has
+    # finished, so pre-rendering never holds more than a batch of workers
+    chord(
+        [
+            prerender_account_statement.s(
+                user_id=str(user_id),
+                account_number=account_number,
+                start_date=start_date,
+                end_date=end_date,
+            )
+            for _, user_id, account_number in accounts
+        ]
+    )(
+        prerender_statement_batch.si(
+            start_date, end_date, after=str(accounts[-1][0]), batch=batch + 1
+        )
+    )
+
+    return {"batch": batch, "accounts": len(accounts)}
+
+
+@celery_app.task(name="prerender_month_statements")
+def prerender_month_statements() -> dict:
+    # Run by beat on the first of the month for the month that just ended
+    if not settings.STATEMENT_PRERENDER_ENABLED:
+        return {"status": "disabled"}
+
+    start_date, end_date = previous_month(datetime.now(timezone.utc))
+    prerender_statement_batch.delay(start_date.isoformat(), end_date.isoformat())
+
+    logger.info(f"Queued statement pre-rendering for {start_date:%Y-%m}")
+    return {"status": "queued", "month": f"{start_date:%Y-%m}"}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Queue the month-end statement pre-rendering for a month"
+    )
+    parser.add_argument(
+        "--month",
+        default=None,
+        help="YYYY-MM, the month before the current one by default",
+    )
+    args = parser.parse_args()
+
+    if args.month:
+        year, month = (int(part) for part in args.month.split("-"))
+        start_date, end_date = month_period(year, month)
+    else:
+        start_date, end_date = previous_month(datetime.now(timezone.utc))
+
+    result = prerender_statement_batch.delay(
+        start_date.isoformat(), end_date.isoformat()
+    )
+    print(json.dumps({"task_id": result.id, "month": f"{start_date:%Y-%m}"}))
+
+
+if __name__ == "__main__":
+    main()
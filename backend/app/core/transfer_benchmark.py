@@ -0,0 +1,153 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from decimal import Decimal
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy import delete, event, or_, select
+
+from backend.app.api.services.transaction import initiate_transfer
+from backend.app.auth.models import User
+from backend.app.bank_account.models import BankAccount
+from backend.app.core.ai.models import TransactionRiskScore, TransactionShadowScore
+from backend.app.core.ai.shadow import shadow_scorer
+from backend.app.core.db import async_session, engine
+from backend.app.core.model_registry import load_models
+from backend.app.core.statement_benchmark import QueryCounter, _account, _user
+from backend.app.transaction.models import Transaction
+
+
+async def _seed_pair() -> tuple[User, BankAccount, User, BankAccount]:
+    sender, receiver = _user("sender"), _user("receiver")
+    sender_account, receiver_account = _account(sender), _account(receiver)
+    sender_account.account_balance = 1_000_000.0
+
+    async with async_session() as session:
+        session.add_all([sender, receiver, sender_account, receiver_account])
+        await session.commit()
+
+    return sender, sender_account, receiver, receiver_account
+
+
+async def _cleanup(users: list[User]) -> None:
+    user_ids = [user.id for user in users]
+    transaction_ids = select(Transaction.id).where(
+        or_(
+            Transaction.sender_id.in_(user_ids),
+            Transaction.receiver_id.in_(user_ids),
+        )
+    )
+
+    async with async_session() as session:
+        for model in (TransactionRiskScore, TransactionShadowScore):
+            await session.exec(
+                delete(model).where(model.transaction_id.in_(transaction_ids))
+            )
+        await session.exec(
+            delete(Transaction).where(Transaction.id.in_(transaction_ids))
+        )
+        await session.exec(
+            delete(BankAccount).where(BankAccount.user_id.in_(user_ids))
+        )
+        await session.exec(delete(User).where(User.id.in_(user_ids)))
+        await session.commit()
+
+
+async def _transfer(
+    sender: User, sender_account: BankAccount, receiver_account: BankAccount
+) -> str:
+    async with async_session() as session:
+        try:
+            await initiate_transfer(
+                sender_id=sender.id,
+                sender_account_id=sender_account.id,
+                receiver_account_number=receiver_account.account_number,
+                amount=Decimal("12.50"),
+                description="Transfer benchmark",
+                security_answer=sender.security_answer,
+                session=session,
+            )
+            return "initiated"
+        except HTTPException:
+            # Flagged by the risk model, the same round trips up to the flag
+            return "flagged"
+
+
+async def run_benchmark(transfers: int, concurrency: int) -> dict:
+    statements, commits = QueryCounter(), QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", statements)
+    event.listen(engine.sync_engine, "commit", commits)
+
+    # One pair per worker, concurrent transfers from one sender would only
+    # measure lock waits on its row
+    pairs = [await _seed_pair() for _ in range(concurrency)]
+    latencies_ms: list[float] = []
+    outcomes: dict[str, int] = {}
+
+    async def worker(pair, count: int) -> None:
+        sender, sender_account, _, receiver_account = pair
+        for _ in range(count):
+            started = time.perf_counter()
+            outcome = await _transfer(sender, sender_account, receiver_account)
+            latencies_ms.append((time.perf_counter() - started) * 1000)
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    try:
+        # Warm the pool and the feature store profiles outside the measurement
+        await asyncio.gather(*(worker(pair, 1) for pair in pairs))
+        latencies_ms.clear()
+        outcomes.clear()
+        statements.count = commits.count = 0
+
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(worker(pair, transfers // concurrency) for pair in pairs)
+        )
+        wall_s = time.perf_counter() - started
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", statements)
+        event.remove(engine.sync_engine, "commit", commits)
+        await shadow_scorer.stop()
+        await _cleanup([user for pair in pairs for user in (pair[0], pair[2])])
+        await engine.dispose()
+
+    timings = np.array(latencies_ms, dtype=np.float64)
+    measured = len(latencies_ms)
+
+    return {
+        "transfers": measured,
+        "outcomes": outcomes,
+        "statements_per_transfer": round(statements.count / measured, 2),
+        "commits_per_transfer": round(commits.count / measured, 2),
+        "p50_ms": round(float(np.percentile(timings, 50)), 2),
+        "p99_ms": round(float(np.percentile(timings, 99)), 2),
+        "transfers_per_s": round(measured / wall_s, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Initiate transfers between seeded accounts and report the "
+        "database round trips and latency of each"
+    )
+    parser.add_argument("--transfers", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    load_models()
+
+    result = asyncio.run(run_benchmark(args.transfers, args.concurrency))
+    print(
+        f"{result['statements_per_transfer']} statements, "
+        f"{result['commits_per_transfer']} commits, "
+        f"p50 {result['p50_ms']}ms, p99 {result['p99_ms']}ms",
+        file=sys.stderr,
+    )
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
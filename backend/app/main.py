@@ -5,6 +5,7 @@ from fastapi import FastAPI, status
 from fastapi.responses import JSONResponse
 
 from backend.app.api.main import api_router
+from backend.app.core.ai.shadow import shadow_scorer
 from backend.app.core.config import settings
 from backend.app.core.db import init_db, engine
 from backend.app.core.logging import get_logger
@@ -72,6 +73,7 @@ async def lifespan(app: FastAPI):
         raise
     finally:
         logger.info("Shutting down application")
+        await shadow_scorer.stop()
         await engine.dispose()
         await healh_checker.cleanup()
 
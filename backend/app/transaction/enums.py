@@ -20,6 +20,11 @@ class TransactionStatusEnum(str, Enum):
     Cancelled = "cancelled"
 
 
+class StatementRendererEnum(str, Enum):
+    Platypus = "platypus"
+    Canvas = "canvas"
+
+
 class TransactionCategoryEnum(str, Enum):
     Credit = "credit"
     Debit = "debit"
@@ -4,7 +4,7 @@ from typing import TYPE_CHECKING
 
 from sqlmodel import Field, Column, Relationship, SQLModel
 from sqlalchemy.dialects import postgresql as pg
-from sqlalchemy import text, func
+from sqlalchemy import Index, text, func
 
 from backend.app.transaction.schema import TransactionBaseSchema
 from sqlalchemy.dialects.postgresql import JSONB
@@ -16,6 +16,40 @@ if TYPE_CHECKING:
 
 
 class Transaction(TransactionBaseSchema, table=True):
+    # Every party column leads a (party, created_at) index, so the OR in the
+    # transaction history becomes a BitmapOr and per-user date ranges stay
+    # index range scans. The account ones carry the status for statements.
+    __table_args__ = (
+        Index("ix_transaction_sender_id_created_at", "sender_id", "created_at"),
+        Index("ix_transaction_receiver_id_created_at", "receiver_id", "created_at"),
+        Index(
+            "ix_transaction_sender_account_id_created_at_status",
+            "sender_account_id",
+            "created_at",
+            "transaction_status",
+        ),
+        Index(
+            "ix_transaction_receiver_account_id_created_at_status",
+            "receiver_account_id",
+            "created_at",
+            "transaction_status",
+        ),
+        # Review queue, only the handful of flagged rows are indexed
+        Index(
+            "ix_transaction_flagged_created_at",
+            "created_at",
+            postgresql_where=text("ai_review_status = 'FLAGGED'"),
+        ),
+        # Legs of a bulk transfer, only rows written by one are indexed
+        Index(
+            "ix_transaction_batch_reference",
+            text("(transaction_metadata ->> 'batch_reference')"),
+            postgresql_where=text(
+                "(transaction_metadata ->> 'batch_reference') IS NOT NULL"
+            ),
+        ),
+    )
+
     id: uuid.UUID = Field(
         sa_column=Column(
             pg.UUID(as_uuid=True),
@@ -5,6 +5,7 @@ from typing_extensions import Annotated
 from sqlmodel import SQLModel, Field, Column
 from fastapi import Query
 from backend.app.transaction.enums import (
+    StatementRendererEnum,
     TransactionTypeEnum,
     TransactionStatusEnum,
     TransactionCategoryEnum,
@@ -57,6 +58,12 @@ class DepositRequestSchema(SQLModel):
     description: str = Field(max_length=250)
 
 
+class BulkDepositRowSchema(SQLModel):
+    account_number: str = Field(min_length=16, max_length=16)
+    amount: Decimal = Field(gt=0, decimal_places=2)
+    description: str | None = Field(default=None, max_length=250)
+
+
 class TransferRequestSchema(SQLModel):
     sender_account_id: uuid.UUID
     receiver_account_number: str = Field(min_length=16, max_length=16)
@@ -76,6 +83,24 @@ class TransferResponseSchema(SQLModel):
     data: dict | None = None
 
 
+class BulkTransferLegSchema(SQLModel):
+    receiver_account_number: str = Field(min_length=16, max_length=16)
+    amount: Decimal = Field(gt=0, decimal_places=2)
+    description: str | None = Field(default=None, max_length=250)
+
+
+class BulkTransferRequestSchema(SQLModel):
+    sender_account_id: uuid.UUID
+    security_answer: str = Field(max_length=30)
+    description: str = Field(max_length=250)
+    legs: list[BulkTransferLegSchema] = Field(min_length=1)
+
+
+class BulkTransferOTPVerificationSchema(SQLModel):
+    batch_reference: str
+    otp: str = Field(min_length=6, max_length=6)
+
+
 class CurrencyConversionSchema(SQLModel):
     amount: Decimal
     from_currency: str
@@ -163,6 +188,10 @@ class StatementRequestSchema(SQLModel):
         max_length=16,
         description="16-digit account number for specific account statements",
     )
+    renderer: StatementRendererEnum | None = Field(
+        default=None,
+        description="PDF renderer, the configured default when omitted",
+    )
 
 
 class StatementResponseSchema(SQLModel):
@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+
+from backend.app.core.ai.benchmark import (
+    InMemoryAnalyzer,
+    synthetic_history,
+    verify_cascade,
+)
+from backend.app.core.ai.config import ai_settings
+from backend.app.core.model_registry import load_models
+
+load_models()
+
+
+@pytest.mark.parametrize("seed", [1, 42, 2024])
+def test_screening_never_clears_what_the_full_analysis_flags(seed):
+    # Every early exit must stay below the threshold under the full analysis,
+    # with a stored upper bound no lower than the full score
+    report = verify_cascade(100, seed)
+
+    assert report["early_exits"] > 0
+    assert report["violations"] == []
+
+
+def test_benchmark_analyzer_times_the_full_analysis(monkeypatch):
+    # The analyze_transaction case must never time the error fallback
+    monkeypatch.setattr(ai_settings, "FEATURE_STORE_ENABLED", False)
+    monkeypatch.setattr(ai_settings, "CASCADE_ENABLED", False)
+    transaction, history = synthetic_history(1_000)
+
+    _, risk_factors = asyncio.run(
+        InMemoryAnalyzer(history).analyze_transaction(transaction, None, None)
+    )
+
+    assert "error" not in risk_factors
+    assert risk_factors["transaction_summary"]["24h_transaction_count"] > 0
@@ -0,0 +1,47 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+
+from backend.app.core.ai import dispatcher
+from backend.app.core.ai.config import ai_settings
+from backend.app.core.ai.kernel import HistorySummary
+from backend.app.core.model_registry import load_models
+from backend.app.transaction.models import Transaction
+
+load_models()
+
+
+def test_aggregate_mode_without_feature_store_runs_one_aggregate_query(monkeypatch):
+    # Same choice as the analyzer: no screening query where the aggregate
+    # query is as cheap, and the summary rather than the history columns
+    monkeypatch.setattr(ai_settings, "FEATURE_STORE_ENABLED", False)
+    monkeypatch.setattr(ai_settings, "FEATURE_QUERY_MODE", "aggregate")
+    monkeypatch.setattr(ai_settings, "CASCADE_ENABLED", True)
+
+    now = datetime(2025, 3, 4, 10, tzinfo=timezone.utc)
+    queries = []
+
+    class Session:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def exec(self, query):
+            queries.append(query)
+            row = (0, 12, Decimal("40"), 3, Decimal("120"), now - timedelta(days=9))
+            row += (now - timedelta(hours=1), 2)
+            return SimpleNamespace(all=lambda: [row])
+
+    monkeypatch.setattr(dispatcher, "async_session", Session)
+
+    transaction = Transaction(id=uuid.uuid4(), amount=Decimal("40.00"), created_at=now)
+    request = dispatcher._ScoringRequest(transaction, uuid.uuid4(), None, pending=True)
+    [view] = asyncio.run(dispatcher.ScoringDispatcher()._load_histories([request]))
+
+    assert len(queries) == 1
+    assert isinstance(view, HistorySummary)
+    assert (view.count, view.recent_count, view.repeated_count) == (13, 4, 3)
@@ -0,0 +1,166 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
+
+from backend.app.core.ai import dispatcher, transaction_analyzer
+from backend.app.core.ai.config import ai_settings
+from backend.app.core.ai.feature_store import FeatureStore
+from backend.app.core.ai.kernel import HistoryArrays, to_epoch_us
+from backend.app.core.model_registry import load_models
+from backend.app.transaction.models import Transaction
+
+load_models()
+
+
+def _history(now: datetime) -> HistoryArrays:
+    # A transaction every seven minutes over three days
+    rows = [
+        (10.0 + index % 13, now - timedelta(minutes=7 * index)) for index in range(620)
+    ]
+    return HistoryArrays.from_rows(rows)
+
+
+def _boundary(store: FeatureStore, history: HistoryArrays, transaction) -> list[str]:
+    # What ZRANGEBYSCORE returns for the oldest bucket of the window
+    window_start, boundary_end = store._boundary(transaction)
+    return [
+        member
+        for member, timestamp in store._recent(history).items()
+        if window_start <= timestamp <= boundary_end
+    ]
+
+
+def test_summary_matches_history_with_a_partial_oldest_bucket():
+    store = FeatureStore()
+    now = datetime(2025, 3, 4, 10, 7, 30, tzinfo=timezone.utc)
+    history = _history(now)
+
+    for offset in [0, 1, 5, 11, 14]:
+        transaction = SimpleNamespace(
+            amount=12.0, created_at=now + timedelta(minutes=offset)
+        )
+        reference_us = to_epoch_us(transaction.created_at)
+
+        summary = store._summary(
+            store._profile(history),
+            None,
+            _boundary(store, history, transaction),
+            transaction,
+        )
+        expected_count, expected_volume = history.recent_activity(reference_us)
+
+        assert summary.recent_count == expected_count
+        assert np.isclose(summary.recent_volume, expected_volume)
+
+
+def test_oldest_bucket_is_in_the_ring_and_the_sorted_set():
+    store = FeatureStore()
+    now = datetime(2025, 3, 4, 10, 7, 30, tzinfo=timezone.utc)
+    history = _history(now)
+    transaction = SimpleNamespace(amount=12.0, created_at=now)
+
+    boundary = _boundary(store, history, transaction)
+
+    assert boundary
+    assert store.ring_size * store.bucket_us > 24 * 3600 * 1_000_000
+
+
+class _ProfileCounts:
+    # Profile counts as the Redis store keeps them: a rebuild sets the count,
+    # recording a transaction only adds to a profile that exists
+    def __init__(self):
+        self.counts = {}
+
+    def get_summaries(self, items):
+        return [None] * len(items)
+
+    def get_summary(self, user_id, transaction):
+        return None
+
+    def rebuild(self, user_id, history):
+        self.counts[user_id] = len(history)
+
+    def record_transaction(self, user_id, transaction):
+        if user_id in self.counts:
+            self.counts[user_id] += 1
+
+    def queue_rebuild(self, user_ids):
+        return 0
+
+
+def _committed(now: datetime, count: int) -> list[tuple]:
+    return [
+        (Decimal("40.00"), now - timedelta(hours=3 * index))
+        for index in range(1, count + 1)
+    ]
+
+
+def _pending_transfer(now: datetime) -> Transaction:
+    return Transaction(id=uuid.uuid4(), amount=Decimal("40.00"), created_at=now)
+
+
+def _cold_store(monkeypatch) -> _ProfileCounts:
+    store = _ProfileCounts()
+    monkeypatch.setattr(ai_settings, "FEATURE_STORE_ENABLED", True)
+    monkeypatch.setattr(ai_settings, "CASCADE_ENABLED", False)
+    monkeypatch.setattr(transaction_analyzer, "feature_store", store)
+    monkeypatch.setattr(dispatcher, "feature_store", store)
+    return store
+
+
+def test_cold_analyzer_score_then_commit_counts_committed_rows(monkeypatch):
+    store = _cold_store(monkeypatch)
+    now = datetime(2025, 3, 4, 10, tzinfo=timezone.utc)
+    user_id, rows = uuid.uuid4(), _committed(now, 30)
+    transaction = _pending_transfer(now)
+
+    analyzer = transaction_analyzer.TransactionAnalyzer()
+
+    async def history_columns(user_id, session, days, exclude=None):
+        # The session autoflushes the pending transfer into its own queries
+        pending = [] if exclude == transaction.id else [(transaction.amount, now)]
+        return HistoryArrays.from_rows(rows + pending)
+
+    monkeypatch.setattr(analyzer, "get_user_history_columns", history_columns)
+
+    _, risk_factors, _ = asyncio.run(
+        analyzer.analyze_with_risk_scores(transaction, user_id, None, pending=True)
+    )
+    store.record_transaction(user_id, transaction)
+
+    assert "error" not in risk_factors
+    assert risk_factors["transaction_summary"]["24h_transaction_count"] == 9
+    assert store.counts[user_id] == len(rows) + 1
+
+
+def test_cold_dispatcher_score_then_commit_counts_committed_rows(monkeypatch):
+    store = _cold_store(monkeypatch)
+    now = datetime(2025, 3, 4, 10, tzinfo=timezone.utc)
+    user_id, rows = uuid.uuid4(), _committed(now, 30)
+    transaction = _pending_transfer(now)
+
+    class Session:
+        # The dispatcher's own session only sees committed rows
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def exec(self, query):
+            return SimpleNamespace(
+                all=lambda: [(user_id, amount, moment) for amount, moment in rows]
+            )
+
+    monkeypatch.setattr(dispatcher, "async_session", Session)
+
+    request = dispatcher._ScoringRequest(transaction, user_id, None, pending=True)
+    [view] = asyncio.run(dispatcher.ScoringDispatcher()._load_histories([request]))
+    store.record_transaction(user_id, transaction)
+
+    assert len(view) == len(rows) + 1
+    assert store.counts[user_id] == len(rows) + 1
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from backend.app.core.ai.kernel import (
+    HistoryArrays,
+    HistorySummary,
+    sequential_sum,
+    to_epoch_us,
+)
+
+
+def test_sequential_sum_matches_builtin_sum():
+    # Cancelling terms are where a plain left to right sum, pairwise np.sum
+    # and the compensated builtin sum() disagree
+    amounts = [1e16, 1.0, -1e16, 0.1, 0.2, 0.3] * 50
+
+    assert sequential_sum(np.array(amounts)) == sum(amounts)
+
+
+def test_sequential_sum_of_nothing_is_integer_zero():
+    total = sequential_sum(np.array([], dtype=np.float64))
+
+    assert total == 0
+    assert isinstance(total, int)
+
+
+def test_recent_activity_matches_the_row_by_row_window():
+    now = datetime(2025, 1, 31, 12, tzinfo=timezone.utc)
+    rows = [
+        (0.1 * (index % 7) + 1e6 * (index % 3), now - timedelta(hours=index))
+        for index in range(72)
+    ]
+    history = HistoryArrays.from_rows(rows)
+
+    count, volume = history.recent_activity(to_epoch_us(now))
+    recent = [amount for amount, moment in rows if moment >= now - timedelta(hours=24)]
+
+    assert count == len(recent)
+    assert volume == sum(recent)
+
+
+def test_summary_including_a_pending_transaction_matches_the_history():
+    now = datetime(2025, 1, 31, 12, tzinfo=timezone.utc)
+    rows = [(25.0 + index % 4, now - timedelta(hours=5 * index)) for index in range(40)]
+    reference_us = to_epoch_us(now)
+
+    before = HistoryArrays.from_rows(rows).summarize(26.0, reference_us)
+    after = HistoryArrays.from_rows(rows + [(26.0, now)]).summarize(26.0, reference_us)
+    including = before.including(26.0, reference_us)
+
+    for field in HistorySummary.__slots__:
+        assert np.isclose(getattr(including, field), getattr(after, field)), field
+
+
+def test_summary_including_earlier_legs_of_a_batch_matches_the_history():
+    now = datetime(2025, 1, 31, 12, tzinfo=timezone.utc)
+    rows = [(25.0 + index % 4, now - timedelta(hours=5 * index)) for index in range(40)]
+    legs = [(26.0, now - timedelta(seconds=3)), (80.0, now - timedelta(seconds=2))]
+    legs += [(26.0, now - timedelta(seconds=1)), (26.0, now)]
+    reference_us = to_epoch_us(now)
+
+    before = HistoryArrays.from_rows(rows).summarize(26.0, reference_us)
+    after = HistoryArrays.from_rows(rows + legs).summarize(26.0, reference_us)
+    including = before.including(
+        np.array([amount for amount, _ in legs]),
+        np.array([to_epoch_us(moment) for _, moment in legs]),
+        26.0,
+    )
+
+    for field in HistorySummary.__slots__:
+        assert np.isclose(getattr(including, field), getattr(after, field)), field
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from backend.app.core.config import settings
+from backend.app.core.model_registry import load_models
+from backend.app.core.query_plans import check_plans
+
+load_models()
+
+SENDER = "(sender_id, created_at)"
+RECEIVER = "(receiver_id, created_at)"
+SENDER_ACCOUNT = "(sender_account_id, created_at, transaction_status)"
+RECEIVER_ACCOUNT = "(receiver_account_id, created_at, transaction_status)"
+
+# Columns of the indexes each hot query must be served by, an OR needs an
+# index on every one of its branches
+EXPECTED_INDEXES = {
+    "analyzer.get_user_transaction_history": [SENDER],
+    "analyzer.get_user_history_columns": [SENDER],
+    "analyzer.get_user_history_summary": [SENDER],
+    "analyzer.get_user_recent_activity": [SENDER],
+    "get_user_transactions": [SENDER, RECEIVER, SENDER_ACCOUNT, RECEIVER_ACCOUNT],
+    "get_user_transactions.date_range": [
+        SENDER,
+        RECEIVER,
+        SENDER_ACCOUNT,
+        RECEIVER_ACCOUNT,
+    ],
+    "export_transactions": [SENDER, RECEIVER, SENDER_ACCOUNT, RECEIVER_ACCOUNT],
+    "prepare_statement_data": [SENDER_ACCOUNT, RECEIVER_ACCOUNT],
+    "get_user_risk_history": [SENDER],
+    "flagged_review_queue": ["(created_at) WHERE (ai_review_status = 'FLAGGED'"],
+}
+
+
+async def _migrated_database() -> bool:
+    engine = create_async_engine(
+        settings.DATABASE_URL, poolclass=NullPool, connect_args={"timeout": 3}
+    )
+    try:
+        async with engine.connect() as conn:
+            result = await conn.execute(
+                text("SELECT to_regclass('public.transaction')")
+            )
+            return result.scalar() is not None
+    finally:
+        await engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def plans() -> dict:
+    try:
+        reachable = asyncio.run(_migrated_database())
+    except Exception:
+        reachable = False
+
+    if not reachable:
+        pytest.skip("No migrated Postgres database to explain the queries on")
+
+    return asyncio.run(check_plans(200_000, 2_000, analyze=False))
+
+
+def test_every_hot_query_is_checked(plans):
+    assert set(plans["queries"]) == set(EXPECTED_INDEXES)
+
+
+@pytest.mark.parametrize("name", sorted(EXPECTED_INDEXES))
+def test_hot_query_uses_its_index(plans, name):
+    report = plans["queries"][name]
+
+    assert report["ok"], report["scans"]
+    for columns in EXPECTED_INDEXES[name]:
+        assert any(
+            columns in definition for definition in report["definitions"]
+        ), report["definitions"]
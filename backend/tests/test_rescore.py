@@ -0,0 +1,16 @@
+import pytest
+
+from backend.app.core.ai.config import ai_settings
+from backend.app.core.ai.rescore import PartitionRescorer
+
+
+def test_rescore_refuses_the_live_model_version():
+    # Its rows carry the reviews, a run would replace them
+    with pytest.raises(ValueError):
+        PartitionRescorer(
+            run_id="run",
+            partition=0,
+            partitions=1,
+            model_version=ai_settings.MODEL_VERSION,
+            redis_client=None,
+        )
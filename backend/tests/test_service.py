@@ -0,0 +1,52 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from backend.app.core.ai import service
+from backend.app.core.ai.kernel import HistoryArrays
+from backend.app.core.model_registry import load_models
+from backend.app.transaction.models import Transaction
+
+load_models()
+
+
+class _ColdStore:
+    def get_summaries(self, items):
+        return [None] * len(items)
+
+    def rebuild(self, user_id, history):
+        pass
+
+
+def test_bulk_transfer_legs_see_the_legs_before_them(monkeypatch):
+    # Sent one by one the same transfers would trip the velocity checks
+    monkeypatch.setattr(service, "feature_store", _ColdStore())
+    now = datetime(2025, 3, 4, 10, tzinfo=timezone.utc)
+    rows = [(Decimal("40.00"), now - timedelta(days=index)) for index in range(2, 30)]
+    legs = [
+        Transaction(
+            id=uuid.uuid4(),
+            amount=Decimal("250.00"),
+            created_at=now + timedelta(milliseconds=index),
+        )
+        for index in range(12)
+    ]
+
+    ai_service = service.TransactionAIService(None)
+
+    async def history_columns(user_id, session):
+        return HistoryArrays.from_rows(rows)
+
+    monkeypatch.setattr(
+        ai_service.analyzer, "get_user_history_columns", history_columns
+    )
+
+    analyses = asyncio.run(ai_service.analyze_batch(legs, uuid.uuid4()))
+    counts = [
+        analysis["risk_factors"]["transaction_summary"]["24h_transaction_count"]
+        for analysis in analyses
+    ]
+
+    assert counts == list(range(1, len(legs) + 1))
+    assert analyses[-1]["risk_score"] > analyses[0]["risk_score"]
@@ -0,0 +1,52 @@
+"""add_balance_shards
+
+Revision ID: 5a7e3c9d2b14
+Revises: c41d8e2a7f90
+Create Date: 2026-10-17 15:42:08.613407
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '5a7e3c9d2b14'
+down_revision: Union[str, None] = 'c41d8e2a7f90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('bankaccount', sa.Column('balance_shards', sa.Integer(), server_default='0', nullable=False))
+    op.create_table('bankaccountbalanceshard',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('account_id', sa.Uuid(), nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('balance', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['bankaccount.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('account_id', 'shard')
+    )
+
+
+def downgrade() -> None:
+    # Credits still sitting in shards would otherwise be lost with the table
+    op.execute(
+        """
+        UPDATE bankaccount
+        SET account_balance = CAST(
+            CAST(bankaccount.account_balance AS NUMERIC) + shards.balance AS FLOAT
+        )
+        FROM (
+            SELECT account_id, SUM(CAST(balance AS NUMERIC)) AS balance
+            FROM bankaccountbalanceshard
+            GROUP BY account_id
+        ) AS shards
+        WHERE bankaccount.id = shards.account_id
+        """
+    )
+    op.drop_table('bankaccountbalanceshard')
+    op.drop_column('bankaccount', 'balance_shards')
@@ -0,0 +1,41 @@
+"""add_shadow_score_table
+
+Revision ID: 9b2f4c7d1e8a
+Revises: 486139076bbc
+Create Date: 2026-10-17 10:12:44.512093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '9b2f4c7d1e8a'
+down_revision: Union[str, None] = '486139076bbc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('transactionshadowscore',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('transaction_id', sa.Uuid(), nullable=False),
+    sa.Column('ai_model_version', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('risk_score', sa.Float(), nullable=False),
+    sa.Column('production_model_version', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('production_score', sa.Float(), nullable=False),
+    sa.Column('created_at', postgresql.TIMESTAMP(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.ForeignKeyConstraint(['transaction_id'], ['transaction.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_transactionshadowscore_ai_model_version'), 'transactionshadowscore', ['ai_model_version'], unique=False)
+    op.create_index(op.f('ix_transactionshadowscore_transaction_id'), 'transactionshadowscore', ['transaction_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_transactionshadowscore_transaction_id'), table_name='transactionshadowscore')
+    op.drop_index(op.f('ix_transactionshadowscore_ai_model_version'), table_name='transactionshadowscore')
+    op.drop_table('transactionshadowscore')
@@ -0,0 +1,37 @@
+"""add_transaction_query_indexes
+
+Revision ID: c41d8e2a7f90
+Revises: 9b2f4c7d1e8a
+Create Date: 2026-10-17 11:03:19.227416
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d8e2a7f90'
+down_revision: Union[str, None] = '9b2f4c7d1e8a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Built concurrently so writes to transaction are not blocked
+    with op.get_context().autocommit_block():
+        op.create_index('ix_transaction_sender_id_created_at', 'transaction', ['sender_id', 'created_at'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_transaction_receiver_id_created_at', 'transaction', ['receiver_id', 'created_at'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_transaction_sender_account_id_created_at_status', 'transaction', ['sender_account_id', 'created_at', 'transaction_status'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_transaction_receiver_account_id_created_at_status', 'transaction', ['receiver_account_id', 'created_at', 'transaction_status'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_transaction_flagged_created_at', 'transaction', ['created_at'], unique=False, postgresql_where=sa.text("ai_review_status = 'FLAGGED'"), postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_transaction_flagged_created_at', table_name='transaction', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_transaction_receiver_account_id_created_at_status', table_name='transaction', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_transaction_sender_account_id_created_at_status', table_name='transaction', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_transaction_receiver_id_created_at', table_name='transaction', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_transaction_sender_id_created_at', table_name='transaction', postgresql_concurrently=True, if_exists=True)
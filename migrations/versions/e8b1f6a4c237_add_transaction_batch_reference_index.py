@@ -0,0 +1,29 @@
+"""add_transaction_batch_reference_index
+
+Revision ID: e8b1f6a4c237
+Revises: 5a7e3c9d2b14
+Create Date: 2026-10-17 17:26:51.804113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b1f6a4c237'
+down_revision: Union[str, None] = '5a7e3c9d2b14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Built concurrently so writes to transaction are not blocked
+    with op.get_context().autocommit_block():
+        op.create_index('ix_transaction_batch_reference', 'transaction', [sa.text("(transaction_metadata ->> 'batch_reference')")], unique=False, postgresql_where=sa.text("(transaction_metadata ->> 'batch_reference') IS NOT NULL"), postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_transaction_batch_reference', table_name='transaction', postgresql_concurrently=True, if_exists=True)